@@ -1,5 +1,6 @@
 import os
-from typing import List
+from typing import Any, Dict, List
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
 
@@ -12,19 +13,226 @@ class Settings(BaseSettings):
     # CORS settings
     cors_origins: List[str] = ["*"]
     
-    # Service URLs
+    # Service URLs (comma-separated to run several replicas of a service); a
+    # "unix:/path/to/service.sock" URL reaches a co-located replica over a Unix socket
     inference_service_url: str = os.getenv("INFERENCE_SERVICE_URL", "http://inference-service:8001")
     agent_service_url: str = os.getenv("AGENT_SERVICE_URL", "http://agent-service:8002")
     retrieval_service_url: str = os.getenv("RETRIEVAL_SERVICE_URL", "http://retrieval-service:8003")
     chat_service_url: str = os.getenv("CHAT_SERVICE_URL", "http://chat-service:8004")
     
+    # Upstream connection pool settings (applied per service)
+    upstream_max_connections: int = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+    upstream_max_keepalive_connections: int = int(os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    upstream_keepalive_expiry: float = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+    upstream_http2: bool = os.getenv("UPSTREAM_HTTP2", "False").lower() == "true"
+    # Per-service overrides, e.g. {"retrieval": {"max_connections": 200, "http2": true}}
+    upstream_pool_overrides: Dict[str, Dict[str, Any]] = {}
+    
+    # Load balancing across replicas: "least_outstanding" or "ewma"
+    load_balancing_strategy: str = os.getenv("LOAD_BALANCING_STRATEGY", "least_outstanding")
+    ewma_decay: float = float(os.getenv("EWMA_DECAY", "0.3"))
+    
+    # Active health checks against each replica's /ready endpoint; replicas that
+    # answer 503 (still starting) are kept alive but routed around
+    health_check_path: str = os.getenv("HEALTH_CHECK_PATH", "/ready")
+    health_check_interval: float = float(os.getenv("HEALTH_CHECK_INTERVAL", "10"))
+    health_check_timeout: float = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+    health_check_failure_threshold: int = int(os.getenv("HEALTH_CHECK_FAILURE_THRESHOLD", "3"))
+    health_check_success_threshold: int = int(os.getenv("HEALTH_CHECK_SUCCESS_THRESHOLD", "2"))
+    # Services that must have a ready replica for the gateway's /ready to pass
+    readiness_required_services: List[str] = ["chat", "inference", "retrieval"]
+    
+    # Upstream timeouts in seconds; a short connect timeout fails fast on dead hosts
+    upstream_connect_timeout: float = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "3"))
+    upstream_timeout: float = float(os.getenv("UPSTREAM_TIMEOUT", "60"))
+    
+    # Time budget per route class by "service" or "service:path prefix" (longest
+    # match wins); forwarded to services as a deadline. Others use upstream_timeout.
+    route_timeouts: Dict[str, float] = {
+        "chat": 15,
+        "inference": 300,
+        "inference:models": 15,
+        "retrieval": 30,
+        "retrieval:files/upload": 600,
+        "retrieval:web": 60,
+    }
+    
+    # Circuit breaker per upstream replica
+    circuit_failure_threshold: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    circuit_reset_timeout: float = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+    circuit_half_open_max_calls: int = int(os.getenv("CIRCUIT_HALF_OPEN_MAX_CALLS", "1"))
+    
+    # Retries for idempotent requests, capped by a global retry budget
+    retry_max_attempts: int = int(os.getenv("RETRY_MAX_ATTEMPTS", "2"))
+    retry_max_body_size: int = int(os.getenv("RETRY_MAX_BODY_SIZE", str(1024 * 1024)))
+    retry_budget_ratio: float = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+    retry_budget_min_per_second: float = float(os.getenv("RETRY_BUDGET_MIN_PER_SECOND", "1"))
+    retry_budget_window: float = float(os.getenv("RETRY_BUDGET_WINDOW", "10"))
+    
+    # Gateway response cache for read-heavy GET routes ("service:path" -> TTL seconds)
+    response_cache_routes: Dict[str, float] = {
+        "inference:models": 30,
+        "inference:models/base": 30,
+        "chat:chats": 5,
+        "chat:folders": 10,
+        "chat:tags": 10,
+        "retrieval:knowledge/list": 15,
+        "retrieval:files/list": 15,
+    }
+    response_cache_max_bytes: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    response_cache_max_entry_bytes: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRY_BYTES", str(1024 * 1024)))
+    
+    # Routes where identical concurrent GETs share one upstream call ("service:path")
+    coalesce_routes: List[str] = [
+        "inference:models",
+        "inference:models/base",
+        "chat:chats",
+        "retrieval:knowledge/list",
+        "retrieval:files/list",
+    ]
+    
+    # Hedged requests for idempotent reads ("service:path" -> latency percentile
+    # after which a second replica is tried)
+    hedge_routes: Dict[str, float] = {
+        "retrieval:vector/search": 0.95,
+        "retrieval:knowledge/query": 0.95,
+    }
+    hedge_min_delay: float = float(os.getenv("HEDGE_MIN_DELAY", "0.05"))
+    hedge_max_delay: float = float(os.getenv("HEDGE_MAX_DELAY", "2"))
+    hedge_min_samples: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    hedge_budget_ratio: float = float(os.getenv("HEDGE_BUDGET_RATIO", "0.1"))
+    hedge_budget_window: float = float(os.getenv("HEDGE_BUDGET_WINDOW", "10"))
+    
+    # Per-user token-bucket rate limits (requests per second and burst size);
+    # a rate of 0 disables that limit
+    rate_limit_enabled: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    rate_limit_user_rate: float = float(os.getenv("RATE_LIMIT_USER_RATE", "20"))
+    rate_limit_user_burst: float = float(os.getenv("RATE_LIMIT_USER_BURST", "60"))
+    rate_limit_groups: Dict[str, Dict[str, float]] = {
+        "generation": {"rate": 2, "burst": 10},
+        "embeddings": {"rate": 5, "burst": 20},
+    }
+    # Route group by "service" or "service:path prefix"; longest match wins
+    rate_limit_route_groups: Dict[str, str] = {
+        "inference": "generation",
+        "inference:models": "default",
+        # Joining a running generation does not start a new one
+        "inference:generations": "default",
+        "retrieval:vector/embedding": "embeddings",
+        "retrieval:vector/upsert": "embeddings",
+        "retrieval:files/upload": "embeddings",
+    }
+    # "memory" keeps buckets per worker, "sqlite" shares them between workers
+    rate_limit_store: str = os.getenv("RATE_LIMIT_STORE", "memory")
+    rate_limit_sqlite_path: str = os.getenv("RATE_LIMIT_SQLITE_PATH", "/tmp/gateway-rate-limits.db")
+    rate_limit_idle_expiry: float = float(os.getenv("RATE_LIMIT_IDLE_EXPIRY", "300"))
+    
+    # Concurrent requests per upstream service, with a short queue; 0 disables
+    # the limit, both here and in the per-service overrides
+    upstream_max_concurrency: int = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", "200"))
+    upstream_concurrency_overrides: Dict[str, int] = {}
+    admission_queue_timeout: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "0.5"))
+    admission_max_queue: int = int(os.getenv("ADMISSION_MAX_QUEUE", "100"))
+    
+    # Priority lanes sharing the gateway's upstream slots (0 disables). Each lane
+    # has its own concurrency cap and queue; freed slots go to lanes by weight.
+    priority_max_concurrency: int = int(os.getenv("PRIORITY_MAX_CONCURRENCY", "256"))
+    priority_lanes: Dict[str, Dict[str, float]] = {
+        "interactive": {"weight": 8, "max_concurrency": 256, "max_queue": 200, "queue_timeout": 1},
+        "streaming": {"weight": 4, "max_concurrency": 128, "max_queue": 100, "queue_timeout": 5},
+        "bulk": {"weight": 1, "max_concurrency": 32, "max_queue": 500, "queue_timeout": 30},
+    }
+    # Lane by "service" or "service:path prefix"; longest match wins
+    priority_route_lanes: Dict[str, str] = {
+        "inference:ollama/generate": "streaming",
+        "inference:ollama/chat": "streaming",
+        "inference:ollama/completions": "streaming",
+        "inference:openai/chat/completions": "streaming",
+        "inference:openai/completions": "streaming",
+        "inference:generations": "streaming",
+        "retrieval:files/upload": "bulk",
+        "retrieval:vector/upsert": "bulk",
+    }
+    priority_default_lane: str = os.getenv("PRIORITY_DEFAULT_LANE", "interactive")
+    # Lanes that get their own upstream connection pools
+    priority_dedicated_pools: List[str] = ["bulk"]
+    
+    # Route label of the gateway metrics by "service:path prefix"; longest match
+    # wins. Other paths are labelled "other" so clients cannot grow the label set.
+    metrics_routes: List[str] = [
+        "chat:chats",
+        "chat:messages",
+        "chat:folders",
+        "chat:tags",
+        "inference:models",
+        "inference:ollama",
+        "inference:ollama/generate",
+        "inference:ollama/chat",
+        "inference:ollama/chat/completions",
+        "inference:ollama/completions",
+        "inference:openai",
+        "inference:openai/chat/completions",
+        "inference:openai/completions",
+        "inference:generations",
+        "retrieval:vector",
+        "retrieval:vector/search",
+        "retrieval:vector/upsert",
+        "retrieval:vector/embedding",
+        "retrieval:web",
+        "retrieval:files",
+        "retrieval:files/upload",
+        "retrieval:knowledge",
+        "retrieval:knowledge/query",
+    ]
+    
+    # Batch endpoint: sub-requests per batch and largest sub-response embedded
+    batch_max_requests: int = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+    batch_max_response_bytes: int = int(os.getenv("BATCH_MAX_RESPONSE_BYTES", str(4 * 1024 * 1024)))
+    
+    # Largest request body forwarded upstream, enforced while streaming
+    max_request_body_size: int = int(os.getenv("MAX_REQUEST_BODY_SIZE", str(512 * 1024 * 1024)))
+    
     # JWT settings
     jwt_secret_key: str = os.getenv("JWT_SECRET_KEY", "your-secret-key")
     jwt_algorithm: str = "HS256"
     jwt_expires_in: int = int(os.getenv("JWT_EXPIRES_IN", "30"))  # days
     
+    # Verified tokens are cached (by hash) until they expire
+    token_cache_size: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+    
+    # Shared secret for the identity header signed by the gateway
+    internal_identity_secret: str = os.getenv(
+        "INTERNAL_IDENTITY_SECRET", os.getenv("JWT_SECRET_KEY", "your-secret-key")
+    )
+    
     class Config:
         env_file = ".env"
+    
+    @field_validator("rate_limit_groups")
+    @classmethod
+    def check_rate_limit_groups(cls, groups: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+        for group, limit in groups.items():
+            if set(limit) != {"rate", "burst"}:
+                raise ValueError(f"Rate limit group {group} needs exactly a rate and a burst")
+            if limit["rate"] > 0 and limit["burst"] < 1:
+                raise ValueError(f"Rate limit group {group} needs a burst of at least 1")
+        return groups
+    
+    @property
+    def service_urls(self) -> Dict[str, List[str]]:
+        """
+        Replica base URLs of the upstream services, keyed by service name
+        """
+        urls = {
+            "inference": self.inference_service_url,
+            "agent": self.agent_service_url,
+            "retrieval": self.retrieval_service_url,
+            "chat": self.chat_service_url,
+        }
+        return {
+            service: [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+            for service, value in urls.items()
+        }
 
 
 settings = Settings()
@@ -1,20 +1,45 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import httpx
 import logging
 from typing import Dict, Any
 
 from app.core.config import settings
 from app.routes import router as api_router
+from app.services.balancer import load_balancer
+from app.services.cache import response_cache
+from app.services.clients import upstream_clients
+from app.services.coalesce import single_flight
+from app.services import metrics
+from app.services.hedging import hedger
+from app.services.priority import priority_scheduler
+from app.services.ratelimit import admission_control, rate_limiter
+from app.services.retry import retry_budget
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open pooled upstream clients once and reuse them for every request
+    await upstream_clients.start()
+    await load_balancer.start()
+    try:
+        yield
+    finally:
+        await load_balancer.close()
+        await upstream_clients.close()
+        rate_limiter.close()
+
+
 app = FastAPI(
     title=settings.app_name,
     description=settings.description,
     version=settings.version,
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -27,6 +52,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Add response compression middleware
+from common.middleware import setup_compression
+setup_compression(app)
+
 # Add error handling middleware
 @app.middleware("http")
 async def error_handling_middleware(request: Request, call_next):
@@ -47,6 +76,32 @@ app.include_router(api_router, prefix=settings.api_prefix)
 async def health_check():
     return {"status": "healthy"}
 
+# Aggregated readiness of the upstream services, refreshed by the background
+# health checker so probes are answered without calling any upstream
+@app.get("/ready")
+async def readiness_check():
+    readiness = load_balancer.readiness()
+    return JSONResponse(status_code=200 if readiness["status"] == "ready" else 503, content=readiness)
+
+# Upstream replica, breaker, retry, cache, coalescing, hedging, admission and priority state
+@app.get("/upstreams")
+async def upstreams():
+    return {
+        "services": load_balancer.status(),
+        "retry_budget": retry_budget.to_dict(),
+        "response_cache": response_cache.stats(),
+        "coalescing": single_flight.stats(),
+        "hedging": hedger.stats(),
+        "rate_limiting": rate_limiter.stats(),
+        "admission": admission_control.status(),
+        "priority": priority_scheduler.stats(),
+    }
+
+# Prometheus metrics for the gateway and every upstream
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,13 @@
+from .batch import (
+    BatchSubRequest,
+    BatchRequest,
+    BatchSubResponse,
+    BatchResponse,
+)
+
+__all__ = [
+    "BatchSubRequest",
+    "BatchRequest",
+    "BatchSubResponse",
+    "BatchResponse",
+]
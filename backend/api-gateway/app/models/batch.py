@@ -0,0 +1,32 @@
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
+
+
+class BatchSubRequest(BaseModel):
+    """A request to run as part of a batch"""
+    id: Optional[str] = None
+    method: str = "GET"
+    # Gateway path with an optional query string, e.g. "/chat/chats?page=1"
+    path: str
+    headers: Dict[str, str] = {}
+    body: Optional[Any] = None
+
+
+class BatchRequest(BaseModel):
+    """Batch request"""
+    requests: List[BatchSubRequest] = Field(..., min_length=1)
+    # Send each result as an NDJSON line as soon as it completes
+    stream: bool = False
+
+
+class BatchSubResponse(BaseModel):
+    """Result of one request of a batch"""
+    id: str
+    status: int
+    headers: Dict[str, str] = {}
+    body: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    """Batch response, in request order"""
+    responses: List[BatchSubResponse]
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.routes import inference, agent, retrieval, chat
+from app.routes import inference, agent, retrieval, chat, batch
 
 router = APIRouter()
 
@@ -7,3 +7,4 @@ router.include_router(inference.router, prefix="/inference", tags=["inference"])
 router.include_router(agent.router, prefix="/agent", tags=["agent"])
 router.include_router(retrieval.router, prefix="/retrieval", tags=["retrieval"])
 router.include_router(chat.router, prefix="/chat", tags=["chat"])
+router.include_router(batch.router, prefix="/batch", tags=["batch"])
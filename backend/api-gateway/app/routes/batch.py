@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException, Request
+
+from app.core.config import settings
+from app.models.batch import BatchRequest, BatchResponse
+from app.services.batch import run_batch, stream_batch
+from common.utils.streaming import CancellableStreamingResponse
+
+router = APIRouter()
+
+@router.post("", response_model=BatchResponse)
+async def batch(request: Request, batch_request: BatchRequest):
+    """
+    Run several gateway requests concurrently and return all their results.
+
+    Each sub-request goes through the regular proxy path with the caller's
+    credentials, so caching, rate limits and priority lanes apply per entry.
+    """
+    if len(batch_request.requests) > settings.batch_max_requests:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch may contain at most {settings.batch_max_requests} requests",
+        )
+
+    if batch_request.stream:
+        return CancellableStreamingResponse(
+            stream_batch(request, batch_request.requests),
+            media_type="application/x-ndjson",
+        )
+
+    return BatchResponse(responses=await run_batch(request, batch_request.requests))
@@ -3,17 +3,17 @@ import httpx
 from typing import Any, Dict
 
 from app.core.config import settings
-from app.services.proxy import proxy_request
+from app.services.proxy import PROXIED_METHODS, proxy_request
 
 router = APIRouter()
 
-@router.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
+@router.api_route("/{path:path}", methods=PROXIED_METHODS)
 async def inference_proxy(request: Request, path: str):
     """
     Proxy requests to the inference service
     """
     return await proxy_request(
         request=request,
-        service_url=settings.inference_service_url,
+        service="inference",
         path=path
     )
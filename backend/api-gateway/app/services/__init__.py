@@ -1,3 +1,4 @@
 from .proxy import proxy_request
+from .clients import upstream_clients
 
-__all__ = ["proxy_request"]
+__all__ = ["proxy_request", "upstream_clients"]
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class ASGIResponseStream(httpx.AsyncByteStream):
+    """
+    Response body produced by an in-process ASGI app, read chunk by chunk.
+
+    Waiting for a chunk is bounded by the request's read timeout, and an app
+    that fails mid-response ends the body with RemoteProtocolError, as a
+    connection dropped by a server would.
+    """
+
+    def __init__(
+        self,
+        request: httpx.Request,
+        queue: asyncio.Queue,
+        task: asyncio.Task,
+        closed: asyncio.Event,
+        app_error: List[BaseException],
+        read_timeout: Optional[float],
+    ):
+        self._request = request
+        self._queue = queue
+        self._task = task
+        self._closed = closed
+        self._app_error = app_error
+        self._read_timeout = read_timeout
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(self._queue.get(), self._read_timeout)
+            except asyncio.TimeoutError:
+                await self.aclose()
+                raise httpx.ReadTimeout("Timed out reading from in-process app", request=self._request)
+            if chunk is None:
+                break
+            yield chunk
+        if self._app_error:
+            raise httpx.RemoteProtocolError(
+                f"In-process app failed mid-response: {self._app_error[0]}", request=self._request
+            ) from self._app_error[0]
+
+    async def aclose(self) -> None:
+        # Signal a disconnect to the app and stop it if it is still producing
+        self._closed.set()
+        if not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+class StreamingASGITransport(httpx.AsyncBaseTransport):
+    """
+    Dispatch requests straight to an ASGI app in the same process.
+
+    Unlike httpx.ASGITransport this does not buffer the response: the status
+    and headers are returned as soon as the app starts responding and the body
+    is streamed as the app sends it, so token streams keep their latency.
+    """
+
+    def __init__(self, app: Any, max_buffered_chunks: int = 64):
+        self.app = app
+        self.max_buffered_chunks = max_buffered_chunks
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "headers": [(key.lower(), value) for key, value in request.headers.raw],
+            "scheme": request.url.scheme,
+            "path": unquote(request.url.path),
+            "raw_path": request.url.raw_path.split(b"?")[0],
+            "query_string": request.url.query,
+            "server": (request.url.host, request.url.port),
+            "client": ("127.0.0.1", 0),
+            "root_path": "",
+        }
+
+        request_body = request.stream.__aiter__()
+        request_complete = False
+        closed = asyncio.Event()
+        started = asyncio.Event()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_buffered_chunks)
+        response_start: Dict[str, Any] = {}
+        app_error: List[BaseException] = []
+        request_error: List[BaseException] = []
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal request_complete
+            if request_complete:
+                # Nothing more to read; report a disconnect once the caller closes
+                await closed.wait()
+                return {"type": "http.disconnect"}
+            try:
+                chunk = await request_body.__anext__()
+            except StopAsyncIteration:
+                request_complete = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            except Exception as e:
+                # Failed producing the request body, e.g. it grew past the
+                # size limit; the caller gets the error, as from a socket send
+                request_error.append(e)
+                raise
+            return {"type": "http.request", "body": chunk, "more_body": True}
+
+        body_complete = False
+
+        async def send(message: Dict[str, Any]) -> None:
+            nonlocal body_complete
+            if message["type"] == "http.response.start":
+                response_start["status"] = message["status"]
+                response_start["headers"] = message.get("headers", [])
+                started.set()
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                if body:
+                    await queue.put(body)
+                if not message.get("more_body", False):
+                    body_complete = True
+                    await queue.put(None)
+
+        async def run_app() -> None:
+            try:
+                await self.app(scope, receive, send)
+            except Exception as e:
+                logger.error(f"In-process app failed: {e}")
+                # Once the body is complete the response is intact
+                if not body_complete:
+                    app_error.append(e)
+            finally:
+                started.set()
+            # Terminate a body the app did not finish, e.g. because it failed
+            if not body_complete:
+                await queue.put(None)
+
+        # The read timeout bounds each wait on the app, as it would each read
+        # from a socket; the proxy sets it from the request deadline
+        read_timeout = request.extensions.get("timeout", {}).get("read")
+
+        task = asyncio.create_task(run_app())
+        try:
+            await asyncio.wait_for(started.wait(), read_timeout)
+        except asyncio.TimeoutError:
+            closed.set()
+            task.cancel()
+            raise httpx.ReadTimeout("Timed out waiting for in-process app to respond", request=request)
+
+        if request_error:
+            # Whatever the app answered was to a request that was never sent whole
+            closed.set()
+            task.cancel()
+            raise request_error[0]
+
+        if "status" not in response_start:
+            if app_error:
+                raise app_error[0]
+            raise RuntimeError("ASGI app returned without starting a response")
+
+        headers: List[Tuple[bytes, bytes]] = response_start["headers"]
+        return httpx.Response(
+            status_code=response_start["status"],
+            headers=headers,
+            stream=ASGIResponseStream(request, queue, task, closed, app_error, read_timeout),
+            request=request,
+        )
@@ -0,0 +1,321 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.services.breaker import CircuitBreaker
+from app.services.clients import upstream_clients
+
+logger = logging.getLogger(__name__)
+
+
+class NoReplicaAvailable(Exception):
+    """
+    Raised when a service has no replica that can take a request
+    """
+    pass
+
+
+class Replica:
+    """
+    A single upstream instance of a service and its load and health state
+    """
+
+    def __init__(self, service: str, url: str):
+        self.service = service
+        self.url = url
+        self.outstanding = 0
+        self.ewma_latency: Optional[float] = None
+        self.healthy = True
+        # Readiness as reported by the replica's readiness endpoint; unknown,
+        # so not ready, until the first probe
+        self.ready = False
+        self.components: Dict[str, Any] = {}
+        self.consecutive_failures = 0
+        self.consecutive_successes = 0
+        self.last_checked: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.cancelled = 0
+        self.breaker = CircuitBreaker(f"{service} replica {url}")
+
+    def score(self, strategy: str) -> float:
+        """
+        Lower is better
+        """
+        if strategy == "ewma":
+            # Peak-EWMA style: expected latency scaled by the queue in front of us
+            latency = self.ewma_latency if self.ewma_latency is not None else 0.0
+            return latency * (self.outstanding + 1)
+        return float(self.outstanding)
+
+    def record_latency(self, seconds: float) -> None:
+        """
+        Fold a time-to-headers sample into the latency average
+        """
+        if self.ewma_latency is None:
+            self.ewma_latency = seconds
+        else:
+            decay = settings.ewma_decay
+            self.ewma_latency = decay * seconds + (1 - decay) * self.ewma_latency
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.consecutive_successes += 1
+        self.last_error = None
+        if not self.healthy and self.consecutive_successes >= settings.health_check_success_threshold:
+            self.healthy = True
+            logger.info(f"Re-admitted {self.service} replica {self.url}")
+
+    def record_failure(self, error: str) -> None:
+        self.consecutive_successes = 0
+        self.consecutive_failures += 1
+        self.last_error = error
+        if self.healthy and self.consecutive_failures >= settings.health_check_failure_threshold:
+            self.healthy = False
+            logger.warning(f"Ejected {self.service} replica {self.url}: {error}")
+
+    def record_readiness(self, ready: bool, components: Dict[str, Any]) -> None:
+        if ready != self.ready:
+            if ready:
+                logger.info(f"{self.service} replica {self.url} is ready")
+            else:
+                logger.warning(f"{self.service} replica {self.url} is not ready, routing around it")
+        self.ready = ready
+        self.components = components
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "ready": self.ready,
+            "components": self.components,
+            "outstanding": self.outstanding,
+            "ewma_latency": self.ewma_latency,
+            "consecutive_failures": self.consecutive_failures,
+            "last_checked": self.last_checked,
+            "last_error": self.last_error,
+            "cancelled": self.cancelled,
+            "circuit": self.breaker.to_dict(),
+        }
+
+
+class ServicePool:
+    """
+    The replicas of one service and the policy for choosing between them
+    """
+
+    def __init__(self, service: str, urls: List[str]):
+        self.service = service
+        self.replicas = [Replica(service, url) for url in urls]
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether any replica can take traffic
+        """
+        return any(r.healthy and r.ready and r.breaker.available() for r in self.replicas)
+
+    def pick(self, exclude: Optional[List[Replica]] = None) -> Replica:
+        """
+        Choose the replica with the lowest load score.
+
+        Replicas with an open circuit are skipped; if none remain the request
+        fails fast. Replicas in ``exclude`` (already tried) are avoided when
+        another one is available. Replicas ejected by health checks, then
+        replicas reporting they are not ready, are avoided the same way; if
+        every replica is out, fall back to all of them rather than failing
+        outright, so a health-check blip cannot take a service down.
+        """
+        if not self.replicas:
+            raise NoReplicaAvailable(f"No replicas configured for {self.service}")
+
+        candidates = [r for r in self.replicas if r.breaker.available()]
+        if not candidates:
+            raise NoReplicaAvailable(f"Circuit open for all replicas of {self.service}")
+
+        untried = [r for r in candidates if not exclude or r not in exclude]
+        if untried:
+            candidates = untried
+
+        healthy = [r for r in candidates if r.healthy]
+        if healthy:
+            candidates = healthy
+
+        ready = [r for r in candidates if r.ready]
+        if ready:
+            candidates = ready
+
+        strategy = settings.load_balancing_strategy
+        best = min(r.score(strategy) for r in candidates)
+        return random.choice([r for r in candidates if r.score(strategy) == best])
+
+
+class LoadBalancer:
+    """
+    Replica selection and background health probing for all upstream services
+    """
+
+    def __init__(self):
+        self._pools: Dict[str, ServicePool] = {}
+        self._health_task: Optional[asyncio.Task] = None
+        self._readiness: Dict[str, Any] = {"status": "starting", "services": {}}
+
+    def pool(self, service: str) -> ServicePool:
+        """
+        Get the replica pool for a service, building it on first use
+        """
+        pool = self._pools.get(service)
+        if pool is None:
+            pool = ServicePool(service, upstream_clients.replica_urls(service))
+            self._pools[service] = pool
+        return pool
+
+    def pick(self, service: str, exclude: Optional[List[Replica]] = None) -> Replica:
+        return self.pool(service).pick(exclude)
+
+    def acquire(self, replica: Replica) -> float:
+        """
+        Mark a request as outstanding on a replica; returns its start time
+        """
+        replica.outstanding += 1
+        return time.monotonic()
+
+    def release(self, replica: Replica) -> None:
+        replica.outstanding = max(0, replica.outstanding - 1)
+
+    async def start(self) -> None:
+        """
+        Build the replica pools and start the background health checker
+        """
+        self._pools = {}
+        for service in settings.service_urls:
+            pool = self.pool(service)
+            if not self.checking:
+                # Nothing will probe the replicas, so take them as they come
+                for replica in pool.replicas:
+                    replica.ready = True
+        self._update_readiness()
+        if self.checking:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    @property
+    def checking(self) -> bool:
+        """
+        Whether replicas are probed by the background health checker
+        """
+        return settings.health_check_interval > 0
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+    async def _probe(self, replica: Replica) -> None:
+        """
+        Check a replica's readiness endpoint and update its state.
+
+        A 503 means the replica is up but not ready to take traffic yet, for
+        example while it loads a model; it counts as healthy but is routed
+        around. Replicas without a readiness endpoint are assumed ready.
+        """
+        client = upstream_clients.get(replica.service)
+        url = httpx.URL(replica.url).join(settings.health_check_path)
+        try:
+            response = await client.get(url, timeout=settings.health_check_timeout)
+            if response.status_code in (200, 503):
+                replica.record_success()
+                replica.record_readiness(response.status_code == 200, self._components(response))
+            elif response.status_code == 404:
+                replica.record_success()
+                replica.record_readiness(True, {})
+            else:
+                replica.record_failure(f"Health check returned {response.status_code}")
+        except httpx.HTTPError as e:
+            replica.record_failure(f"Health check failed: {e}")
+        finally:
+            replica.last_checked = time.time()
+
+    @staticmethod
+    def _components(response: httpx.Response) -> Dict[str, Any]:
+        try:
+            components = response.json().get("components", {})
+        except (ValueError, AttributeError):
+            return {}
+        return components if isinstance(components, dict) else {}
+
+    async def _health_loop(self) -> None:
+        while True:
+            try:
+                probes = [
+                    self._probe(replica)
+                    for service, pool in self._pools.items()
+                    if not upstream_clients.is_local(service)
+                    for replica in pool.replicas
+                ]
+                await asyncio.gather(*probes)
+                self._update_readiness()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Error running health checks: {e}")
+            await asyncio.sleep(settings.health_check_interval)
+
+    def _update_readiness(self) -> None:
+        """
+        Rebuild the aggregated readiness view after a round of probes
+        """
+        services = {}
+        for service, pool in self._pools.items():
+            local = upstream_clients.is_local(service)
+            services[service] = {
+                "ready": local or pool.ready,
+                # Until every replica has been probed once its state is unknown
+                "probed": local or not self.checking or all(r.last_checked is not None for r in pool.replicas),
+                "required": service in settings.readiness_required_services,
+                "replicas": [
+                    {
+                        "url": replica.url,
+                        "healthy": replica.healthy,
+                        "ready": replica.ready,
+                        "components": replica.components,
+                        "last_checked": replica.last_checked,
+                    }
+                    for replica in pool.replicas
+                ] if not local else [],
+            }
+        required = [state for state in services.values() if state["required"]]
+        if not all(state["probed"] for state in required):
+            status = "starting"
+        elif all(state["ready"] for state in required):
+            status = "ready"
+        else:
+            status = "not_ready"
+        self._readiness = {"status": status, "services": services}
+
+    def readiness(self) -> Dict[str, Any]:
+        """
+        Aggregated readiness of the upstream services, as of the last probes;
+        "starting" until every required service has been probed
+        """
+        return self._readiness
+
+    def status(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Current replica state, keyed by service
+        """
+        return {
+            service: [replica.to_dict() for replica in pool.replicas]
+            for service, pool in self._pools.items()
+        }
+
+
+# Shared balancer, started and stopped by the application lifespan
+load_balancer = LoadBalancer()
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.models.batch import BatchSubRequest, BatchSubResponse
+from app.services.proxy import HOP_BY_HOP_HEADERS, PROXIED_METHODS, proxy_request
+
+logger = logging.getLogger(__name__)
+
+# Outer request headers that describe the batch itself, not its sub-requests
+BATCH_ONLY_HEADERS = HOP_BY_HOP_HEADERS | {
+    "content-length",
+    "content-type",
+    "accept-encoding",
+    "if-none-match",
+    "if-modified-since",
+}
+
+
+class BatchResponseTooLarge(Exception):
+    """
+    Raised when a sub-response exceeds batch_max_response_bytes
+    """
+    pass
+
+
+def resolve_path(path: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Split a sub-request path into service, service path and query string.
+
+    Paths are relative to the API prefix ("/chat/chats"), which may also be
+    included. Returns None for paths that do not name a proxied service.
+    """
+    parts = urlsplit(path)
+    route = parts.path.strip("/")
+    prefix = settings.api_prefix.strip("/")
+    if prefix and (route == prefix or route.startswith(f"{prefix}/")):
+        route = route[len(prefix):].lstrip("/")
+    service, _, service_path = route.partition("/")
+    if service not in settings.service_urls:
+        return None
+    return service, service_path, parts.query
+
+
+def sub_request(request: Request, sub: BatchSubRequest, service: str, path: str, query: str) -> Request:
+    """
+    Build a request for one batch entry that inherits the caller's credentials
+    """
+    headers: Dict[str, str] = {
+        key: value
+        for key, value in request.headers.items()
+        if key.lower() not in BATCH_ONLY_HEADERS
+    }
+    headers.update({key.lower(): value for key, value in sub.headers.items()})
+
+    body = b""
+    if sub.body is not None:
+        body = json.dumps(sub.body).encode()
+        headers["content-type"] = "application/json"
+    headers["content-length"] = str(len(body))
+    # Bodies are embedded in the batch response, so ask for them uncompressed
+    headers["accept-encoding"] = "identity"
+
+    full_path = f"{settings.api_prefix}/{service}/{path}"
+    scope = {
+        **request.scope,
+        "method": sub.method.upper(),
+        "path": full_path,
+        "raw_path": full_path.encode(),
+        "query_string": query.encode(),
+        "headers": [(key.encode("latin-1"), value.encode("latin-1")) for key, value in headers.items()],
+        "state": {},
+    }
+
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Nothing else arrives on a sub-request; the batch itself watches for
+        # the client disconnecting and cancels its sub-requests
+        return await asyncio.get_running_loop().create_future()
+
+    return Request(scope, receive)
+
+
+async def read_response(response: Response) -> bytes:
+    """
+    Read the body of a proxied response, streamed or not
+    """
+    try:
+        if not hasattr(response, "body_iterator"):
+            return bytes(response.body)
+        chunks: List[bytes] = []
+        size = 0
+        async for chunk in response.body_iterator:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            size += len(chunk)
+            if size > settings.batch_max_response_bytes:
+                raise BatchResponseTooLarge(
+                    f"Response exceeds {settings.batch_max_response_bytes} bytes"
+                )
+            chunks.append(chunk)
+        return b"".join(chunks)
+    finally:
+        if hasattr(response, "body_iterator"):
+            await response.body_iterator.aclose()
+        if response.background is not None:
+            await response.background()
+
+
+def decode_body(body: bytes, content_type: str) -> Optional[object]:
+    """
+    Embed a response body in the batch result: JSON as-is, anything else as text
+    """
+    if not body:
+        return None
+    if "json" in content_type:
+        try:
+            return json.loads(body)
+        except ValueError:
+            pass
+    return body.decode("utf-8", errors="replace")
+
+
+async def run_sub_request(request: Request, index: int, sub: BatchSubRequest) -> BatchSubResponse:
+    """
+    Run one batch entry through the regular proxy path
+    """
+    sub_id = sub.id if sub.id is not None else str(index)
+
+    if sub.method.upper() not in PROXIED_METHODS:
+        return BatchSubResponse(
+            id=sub_id,
+            status=405,
+            headers={"allow": ", ".join(PROXIED_METHODS)},
+            body={"detail": "Method Not Allowed"},
+        )
+
+    resolved = resolve_path(sub.path)
+    if resolved is None:
+        return BatchSubResponse(id=sub_id, status=404, body={"detail": f"Unknown path {sub.path}"})
+    service, path, query = resolved
+
+    try:
+        response = await proxy_request(sub_request(request, sub, service, path, query), service, path)
+        body = await read_response(response)
+    except BatchResponseTooLarge as e:
+        return BatchSubResponse(id=sub_id, status=502, body={"detail": str(e)})
+    except Exception as e:
+        logger.error(f"Error running batched {sub.method} request to {sub.path}: {e}")
+        return BatchSubResponse(id=sub_id, status=500, body={"detail": "Internal server error"})
+
+    headers = {
+        key: value
+        for key, value in response.headers.items()
+        if key.lower() not in ("content-length", "content-encoding", "transfer-encoding")
+    }
+    return BatchSubResponse(
+        id=sub_id,
+        status=response.status_code,
+        headers=headers,
+        body=decode_body(body, response.headers.get("content-type", "")),
+    )
+
+
+async def run_batch(request: Request, subs: List[BatchSubRequest]) -> List[BatchSubResponse]:
+    """
+    Run all entries of a batch concurrently, returning results in request order
+    """
+    return list(await asyncio.gather(
+        *(run_sub_request(request, index, sub) for index, sub in enumerate(subs))
+    ))
+
+
+async def stream_batch(request: Request, subs: List[BatchSubRequest]) -> AsyncIterator[bytes]:
+    """
+    Run all entries of a batch concurrently, yielding each result as an
+    NDJSON line as soon as it completes
+    """
+    tasks = [
+        asyncio.ensure_future(run_sub_request(request, index, sub))
+        for index, sub in enumerate(subs)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            yield (result.model_dump_json() + "\n").encode()
+    finally:
+        # The client went away; stop whatever is still running
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,85 @@
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker.
+
+    Closed: requests flow and consecutive failures are counted. Open: requests
+    fail fast until the reset timeout has passed. Half-open: a limited number
+    of trial requests decide whether to close again or re-open.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_at: Optional[float] = None
+        self.trials_in_flight = 0
+        self.last_failure: Optional[str] = None
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.trials_in_flight = 0
+        self.trips += 1
+        logger.warning(f"Circuit opened for {self.name}: {self.last_failure}")
+
+    def available(self) -> bool:
+        """
+        Check whether a request may be sent through this breaker
+        """
+        if self.state == OPEN and time.monotonic() - self.opened_at >= settings.circuit_reset_timeout:
+            self.state = HALF_OPEN
+            self.trials_in_flight = 0
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN:
+            return self.trials_in_flight < settings.circuit_half_open_max_calls
+        return False
+
+    def on_request(self) -> None:
+        if self.state == HALF_OPEN:
+            self.trials_in_flight += 1
+
+    def record_success(self) -> None:
+        if self.state == HALF_OPEN:
+            logger.info(f"Circuit closed for {self.name}")
+        self.state = CLOSED
+        self.failures = 0
+        self.trials_in_flight = 0
+
+    def record_failure(self, error: str) -> None:
+        self.last_failure = error
+        if self.state == HALF_OPEN:
+            self._open()
+        elif self.state == CLOSED:
+            self.failures += 1
+            if self.failures >= settings.circuit_failure_threshold:
+                self._open()
+
+    def record_ignored(self) -> None:
+        """
+        Release a trial slot for a request that says nothing about upstream health
+        """
+        if self.state == HALF_OPEN:
+            self.trials_in_flight = max(0, self.trials_in_flight - 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "last_failure": self.last_failure,
+        }
@@ -0,0 +1,171 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from fastapi import Response
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def resource_of(path: str) -> str:
+    """
+    The resource a path belongs to, used to group entries for invalidation
+    """
+    return path.strip("/").split("/", 1)[0]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag (weak comparison)
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return any((tag[2:] if tag.startswith("W/") else tag) == bare for tag in candidates)
+
+
+class CacheEntry:
+    """
+    A buffered upstream response
+    """
+
+    def __init__(self, status_code: int, headers: Dict[str, str], body: bytes, ttl: float):
+        self.status_code = status_code
+        self.headers = {
+            key: value for key, value in headers.items() if key.lower() != "content-length"
+        }
+        self.body = body
+        self.etag = headers.get("etag") or f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.expires_at = time.monotonic() + ttl
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    def to_response(self, if_none_match: Optional[str] = None) -> Response:
+        """
+        Render the entry, answering 304 when the client already has it
+        """
+        headers = {
+            **self.headers,
+            "etag": self.etag,
+            # Let browsers keep a copy but always revalidate with the gateway
+            "cache-control": "private, no-cache",
+        }
+        if etag_matches(if_none_match, self.etag):
+            headers.pop("content-type", None)
+            headers.pop("content-encoding", None)
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, status_code=self.status_code, headers=headers)
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of GET responses for whitelisted routes.
+
+    Entries are keyed per user. A write to a service resource invalidates
+    every cached entry of that resource.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._resources: Dict[Tuple[str, str], Set[str]] = {}
+        self._key_resources: Dict[str, Tuple[str, str]] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def ttl_for(self, service: str, method: str, path: str) -> Optional[float]:
+        """
+        TTL for a cacheable route, or None if the route is not cached
+        """
+        if method != "GET":
+            return None
+        return settings.response_cache_routes.get(f"{service}:{path.strip('/')}")
+
+    def key(self, service: str, path: str, query: str, scope: str, accept_encoding: str) -> str:
+        return "|".join([scope, service, path.strip("/"), query, accept_encoding])
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if not entry.fresh:
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, service: str, path: str, entry: CacheEntry) -> None:
+        if entry.size > self.max_entry_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        resource = (service, resource_of(path))
+        self._entries[key] = entry
+        self._resources.setdefault(resource, set()).add(key)
+        self._key_resources[key] = resource
+        self._bytes += entry.size
+
+        while self._bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, service: str, path: str) -> None:
+        """
+        Drop every entry of the resource a write went to
+        """
+        keys = self._resources.pop((service, resource_of(path)), set())
+        for key in keys:
+            self._remove(key)
+        if keys:
+            self.invalidations += len(keys)
+            logger.debug(f"Invalidated {len(keys)} cached responses for {service}/{resource_of(path)}")
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        resource = self._key_resources.pop(key, None)
+        if resource is not None and resource in self._resources:
+            self._resources[resource].discard(key)
+            if not self._resources[resource]:
+                del self._resources[resource]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# Shared gateway response cache
+response_cache = ResponseCache(
+    settings.response_cache_max_bytes,
+    settings.response_cache_max_entry_bytes,
+)
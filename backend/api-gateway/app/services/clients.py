@@ -0,0 +1,215 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.services.asgi import StreamingASGITransport
+
+logger = logging.getLogger(__name__)
+
+# Service URL prefix for replicas reached over a Unix domain socket
+UNIX_SCHEME = "unix:"
+
+
+def unix_socket_path(url: str) -> Optional[str]:
+    """
+    Socket path of a "unix:/path/to/service.sock" service URL, or None
+    """
+    if not url.startswith(UNIX_SCHEME):
+        return None
+    path = url[len(UNIX_SCHEME):]
+    # Also accept the "unix:///path" form
+    return path[2:] if path.startswith("//") else path
+
+
+class UpstreamClients:
+    """
+    Registry of long-lived HTTP clients, one per upstream service.
+
+    Each client keeps its own keep-alive connection pool, so proxied requests
+    reuse established connections instead of paying TCP/TLS setup every time.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._local_apps: Dict[str, Tuple[Any, str]] = {}
+
+    def register_local_app(self, service: str, app: Any, base_path: str = "") -> None:
+        """
+        Serve a service from an ASGI app running in this process.
+
+        Requests for the service are dispatched to the app directly instead of
+        going over HTTP. Used by the single-process (monolith) entry point.
+        """
+        self._local_apps[service] = (app, base_path.rstrip("/"))
+        self._clients.pop(service, None)
+
+    def _pool_config(self, service: str) -> Dict[str, Any]:
+        """
+        Resolve the pool configuration for a service, applying any overrides
+        """
+        config = {
+            "max_connections": settings.upstream_max_connections,
+            "max_keepalive_connections": settings.upstream_max_keepalive_connections,
+            "keepalive_expiry": settings.upstream_keepalive_expiry,
+            "http2": settings.upstream_http2,
+        }
+        config.update(settings.upstream_pool_overrides.get(service, {}))
+        return config
+
+    def _create_client(self, service: str) -> httpx.AsyncClient:
+        """
+        Create a pooled client for a service
+        """
+        if service in self._local_apps:
+            app, base_path = self._local_apps[service]
+            logger.info(f"Dispatching {service} requests in-process")
+            return httpx.AsyncClient(
+                transport=StreamingASGITransport(app),
+                timeout=settings.upstream_timeout,
+            )
+
+        config = self._pool_config(service)
+        sockets = self.unix_sockets(service)
+
+        http2 = config["http2"]
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning(
+                    f"HTTP/2 requested for {service} but the 'h2' package is not installed, "
+                    "falling back to HTTP/1.1"
+                )
+                http2 = False
+
+        limits = httpx.Limits(
+            max_connections=config["max_connections"],
+            max_keepalive_connections=config["max_keepalive_connections"],
+            keepalive_expiry=config["keepalive_expiry"],
+        )
+
+        logger.info(
+            f"Creating upstream client for {service} "
+            f"(max_connections={limits.max_connections}, http2={http2}, unix_sockets={len(sockets)})"
+        )
+        # Replicas on a Unix socket get a transport bound to it, mounted on
+        # the placeholder origin their requests are sent to
+        mounts = {
+            origin: httpx.AsyncHTTPTransport(uds=path, limits=limits, http2=http2)
+            for origin, path in sockets.items()
+        }
+        # Replicas of a service share one client; httpx pools per origin
+        return httpx.AsyncClient(
+            limits=limits,
+            http2=http2,
+            mounts=mounts or None,
+            timeout=httpx.Timeout(
+                settings.upstream_timeout,
+                connect=settings.upstream_connect_timeout,
+            ),
+        )
+
+    def replica_urls(self, service: str) -> List[str]:
+        """
+        Base URLs of the replicas serving a service
+        """
+        if service in self._local_apps:
+            _, base_path = self._local_apps[service]
+            return [f"http://{service}{base_path}"]
+        return [
+            self._socket_origin(service, index) if unix_socket_path(url) else url
+            for index, url in enumerate(settings.service_urls[service])
+        ]
+
+    @staticmethod
+    def _socket_origin(service: str, index: int) -> str:
+        # Placeholder origin for a socket replica; only used to route to its transport
+        return f"http://{service}-{index}.sock"
+
+    def unix_sockets(self, service: str) -> Dict[str, str]:
+        """
+        Socket paths of the replicas of a service listening on Unix sockets,
+        keyed by the origin their requests are sent to
+        """
+        sockets = {}
+        for index, url in enumerate(settings.service_urls.get(service, [])):
+            path = unix_socket_path(url)
+            if path:
+                sockets[self._socket_origin(service, index)] = path
+        return sockets
+
+    def is_local(self, service: str) -> bool:
+        """
+        Check whether a service is dispatched in-process
+        """
+        return service in self._local_apps
+
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Connection counts of each remote client's pool, keyed by service (and
+        lane for dedicated pools).
+
+        httpx does not expose its pool, so this reads httpcore's connection
+        pools (including those of Unix socket transports) and skips clients
+        where that is not possible.
+        """
+        stats = {}
+        for key, client in self._clients.items():
+            service = key.split(":", 1)[0]
+            if service in self._local_apps:
+                continue
+            transports = [getattr(client, "_transport", None)]
+            transports.extend((getattr(client, "_mounts", None) or {}).values())
+            pools = [getattr(transport, "_pool", None) for transport in transports]
+            pool_connections = [getattr(pool, "connections", None) for pool in pools if pool is not None]
+            if not pool_connections or any(c is None for c in pool_connections):
+                continue
+            connections = [connection for conns in pool_connections for connection in conns]
+            idle = sum(1 for connection in connections if connection.is_idle())
+            stats[key] = {
+                "active": len(connections) - idle,
+                "idle": idle,
+                "max_connections": self._pool_config(service)["max_connections"] or 0,
+            }
+        return stats
+
+    async def start(self) -> None:
+        """
+        Create the clients for all configured services
+        """
+        for service in settings.service_urls:
+            self.get(service)
+
+    def get(self, service: str, lane: Optional[str] = None) -> httpx.AsyncClient:
+        """
+        Get the client for a service, creating it on first use.
+
+        Lanes listed in priority_dedicated_pools get a pool of their own, so
+        long-running bulk transfers do not hold the connections interactive
+        requests reuse.
+        """
+        key = service
+        if lane in settings.priority_dedicated_pools and service not in self._local_apps:
+            key = f"{service}:{lane}"
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = self._create_client(service)
+            self._clients[key] = client
+        return client
+
+    async def close(self) -> None:
+        """
+        Close all clients and release their connections
+        """
+        clients, self._clients = self._clients, {}
+        for service, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing upstream client for {service}: {e}")
+
+
+# Shared registry, opened and closed by the application lifespan
+upstream_clients = UpstreamClients()
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from fastapi import Response
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedResponse:
+    """
+    A fully read upstream response that can be handed to several clients
+    """
+
+    def __init__(self, status_code: int, headers: Dict[str, str], body: bytes):
+        self.status_code = status_code
+        self.headers = {
+            key: value for key, value in headers.items() if key.lower() != "content-length"
+        }
+        self.body = body
+
+    def to_response(self) -> Response:
+        return Response(content=self.body, status_code=self.status_code, headers=self.headers)
+
+
+class SingleFlight:
+    """
+    Collapse identical concurrent requests into one upstream call.
+
+    The first request for a key starts the call in its own task; requests
+    arriving while it is in flight wait for the same result. The shared task
+    is not tied to any one client, so the first caller disconnecting does not
+    fail the others.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.collapsed = 0
+        self.collapsed_by_route: Dict[str, int] = {}
+
+    def enabled_for(self, service: str, method: str, path: str) -> bool:
+        """
+        Check whether a route has opted in to coalescing
+        """
+        if method not in ("GET", "HEAD"):
+            return False
+        return f"{service}:{path.strip('/')}" in settings.coalesce_routes
+
+    def key(self, method: str, service: str, path: str, query: str, scope: str, accept_encoding: str) -> str:
+        return "|".join([method, scope, service, path.strip("/"), query, accept_encoding])
+
+    async def do(self, key: str, route: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn once for all concurrent callers with the same key
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.collapsed += 1
+            self.collapsed_by_route[route] = self.collapsed_by_route.get(route, 0) + 1
+            logger.debug(f"Collapsed request for {route} into in-flight call")
+        else:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self.leaders += 1
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Every waiter may have gone away; don't leave the error unretrieved
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "collapsed": self.collapsed,
+            "collapsed_by_route": dict(self.collapsed_by_route),
+        }
+
+
+# Shared by all proxied requests
+single_flight = SingleFlight()
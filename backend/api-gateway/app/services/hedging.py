@@ -0,0 +1,107 @@
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from app.core.config import settings
+from app.services.window import WindowCounter
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """
+    Recent response times of one route, for picking a hedge delay
+    """
+
+    def __init__(self, size: int = 1000, refresh_every: int = 50):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._refresh_every = refresh_every
+        self._since_refresh = 0
+        self._sorted: list = []
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._since_refresh += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self._samples) < settings.hedge_min_samples:
+            return None
+        # Sorting on every request would cost more than the hedge saves
+        if self._since_refresh >= self._refresh_every or not self._sorted:
+            self._sorted = sorted(self._samples)
+            self._since_refresh = 0
+        index = min(len(self._sorted) - 1, int(q * len(self._sorted)))
+        return self._sorted[index]
+
+
+class Hedger:
+    """
+    Decide when to send a backup request for slow idempotent reads.
+
+    A hedge is sent when the first request has not answered within the
+    route's configured latency percentile. Hedges are capped at a fraction
+    of recent requests so they cannot double the load during an incident.
+    """
+
+    def __init__(self):
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._requests = WindowCounter()
+        self._hedges = WindowCounter()
+        self.hedged: Dict[str, int] = {}
+        self.wins: Dict[str, int] = {}
+        self.denied = 0
+
+    def enabled_for(self, service: str, path: str) -> bool:
+        return self.route(service, path) in settings.hedge_routes
+
+    def route(self, service: str, path: str) -> str:
+        return f"{service}:{path.strip('/')}"
+
+    def record_request(self, route: str) -> None:
+        self._requests.add(time.monotonic(), settings.hedge_budget_window)
+
+    def record_latency(self, route: str, seconds: float) -> None:
+        self._latency.setdefault(route, LatencyTracker()).record(seconds)
+
+    def delay(self, route: str) -> float:
+        """
+        How long to wait for the first response before hedging
+        """
+        tracker = self._latency.get(route)
+        observed = tracker.percentile(settings.hedge_routes[route]) if tracker else None
+        if observed is None:
+            return settings.hedge_max_delay
+        return min(settings.hedge_max_delay, max(settings.hedge_min_delay, observed))
+
+    def try_acquire(self, route: str) -> bool:
+        """
+        Take a hedge from the budget if one is available
+        """
+        now, window = time.monotonic(), settings.hedge_budget_window
+        if self._hedges.count(now, window) >= settings.hedge_budget_ratio * self._requests.count(now, window):
+            self.denied += 1
+            return False
+        self._hedges.add(now, window)
+        self.hedged[route] = self.hedged.get(route, 0) + 1
+        return True
+
+    def record_win(self, route: str) -> None:
+        self.wins[route] = self.wins.get(route, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "routes": {
+                route: {
+                    "delay": self.delay(route),
+                    "hedged": self.hedged.get(route, 0),
+                    "hedge_wins": self.wins.get(route, 0),
+                }
+                for route in settings.hedge_routes
+            },
+            "budget_denied": self.denied,
+        }
+
+
+# Shared by all proxied requests
+hedger = Hedger()
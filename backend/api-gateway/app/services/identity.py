@@ -0,0 +1,92 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import jwt
+
+from app.core.config import settings
+from common.auth.identity import IDENTITY_HEADER, sign_identity
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidToken(Exception):
+    """
+    Raised when a bearer token fails verification
+    """
+    pass
+
+
+class TokenVerifier:
+    """
+    Verify bearer tokens once and remember the result until they expire.
+
+    Entries are keyed by a hash of the token so raw tokens are not kept in
+    memory, and the cache is a bounded LRU.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, Tuple[Dict[str, Any], Optional[float]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Return the claims of a valid token, raising InvalidToken otherwise
+        """
+        key = hashlib.sha256(token.encode()).hexdigest()
+        now = time.time()
+
+        entry = self._cache.get(key)
+        if entry is not None:
+            claims, exp = entry
+            if exp is None or exp > now:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return claims
+            del self._cache[key]
+
+        self.misses += 1
+        try:
+            claims = jwt.decode(
+                token,
+                settings.jwt_secret_key,
+                algorithms=[settings.jwt_algorithm],
+            )
+        except jwt.PyJWTError as e:
+            raise InvalidToken(str(e))
+
+        if claims.get("sub") is None:
+            raise InvalidToken("Token has no subject")
+
+        exp = claims.get("exp")
+        self._cache[key] = (claims, float(exp) if isinstance(exp, (int, float)) else None)
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return claims
+
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    """
+    Extract the token from an Authorization header
+    """
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token.strip()
+
+
+def identity_header(claims: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Signed identity header to forward with a request
+    """
+    return {IDENTITY_HEADER: sign_identity(claims, settings.internal_identity_secret)}
+
+
+# Shared verifier for all proxied requests
+token_verifier = TokenVerifier(settings.token_cache_size)
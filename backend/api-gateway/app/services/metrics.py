@@ -0,0 +1,417 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.services.balancer import load_balancer
+from app.services.cache import response_cache
+from app.services.clients import upstream_clients
+from app.services.coalesce import single_flight
+from app.services.hedging import hedger
+from app.services.priority import priority_scheduler
+from app.services.ratelimit import admission_control, rate_limiter
+from app.services.route_table import match_route
+
+# Latency buckets in seconds, from cache hits up to long generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# Label of requests to paths outside settings.metrics_routes
+OTHER_ROUTE = "other"
+
+
+def route_label(service: str, path: str) -> str:
+    """
+    Route label for a request: the configured route it falls under, so the
+    label set is fixed by configuration rather than by client paths
+    """
+    routes = {route: route.split(":", 1)[1] for route in settings.metrics_routes}
+    return match_route(routes, service, path, OTHER_ROUTE)
+
+
+def status_class(status_code: int) -> str:
+    return f"{status_code // 100}xx"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric(ABC):
+    """
+    A metric family with a fixed set of label names
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def clear(self) -> None:
+        self._children.clear()
+
+    @abstractmethod
+    def _new_child(self):
+        """
+        The value behind one combination of label values
+        """
+
+    @abstractmethod
+    def samples(self) -> Iterable[str]:
+        """
+        Sample lines in the Prometheus text format
+        """
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return lines
+
+
+class _CounterValue:
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self.value += amount
+
+
+class _GaugeValue(_CounterValue):
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def _new_child(self) -> _CounterValue:
+        return _CounterValue()
+
+    def samples(self) -> Iterable[str]:
+        for values, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def _new_child(self) -> _GaugeValue:
+        return _GaugeValue()
+
+
+class _Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self) -> _Histogram:
+        return _Histogram(self.buckets)
+
+    def samples(self) -> Iterable[str]:
+        for values, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, child.counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, ("le", _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values, ("le", "+Inf"))
+            yield f"{self.name}_bucket{labels} {child.count}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {child.count}"
+
+
+class Registry:
+    """
+    The metrics exposed on /metrics, rendered in the Prometheus text format
+    """
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Requests as seen by clients of the gateway, including cache hits and rejections
+requests_total = registry.counter(
+    "gateway_requests_total",
+    "Requests answered by the gateway",
+    ["service", "route", "method", "status_class"],
+)
+request_duration = registry.histogram(
+    "gateway_request_duration_seconds",
+    "Time until the gateway started its response",
+    ["service", "route"],
+)
+request_bytes = registry.counter(
+    "gateway_request_bytes_total",
+    "Request body bytes received from clients",
+    ["service", "route"],
+)
+
+# Calls to upstream services
+upstream_requests_total = registry.counter(
+    "gateway_upstream_requests_total",
+    "Upstream responses by status class; errors without a response use the gateway's status",
+    ["service", "route", "method", "status_class"],
+)
+upstream_ttfb = registry.histogram(
+    "gateway_upstream_ttfb_seconds",
+    "Time from sending a request upstream to receiving the response headers",
+    ["service", "route"],
+)
+upstream_duration = registry.histogram(
+    "gateway_upstream_duration_seconds",
+    "Time from sending a request upstream until its body was fully relayed",
+    ["service", "route"],
+)
+upstream_in_flight = registry.gauge(
+    "gateway_upstream_in_flight_requests",
+    "Requests currently being served by an upstream",
+    ["service"],
+)
+upstream_response_bytes = registry.counter(
+    "gateway_upstream_response_bytes_total",
+    "Response body bytes relayed from upstreams",
+    ["service", "route"],
+)
+upstream_retries = registry.counter(
+    "gateway_upstream_retries_total",
+    "Requests retried on another replica",
+    ["service"],
+)
+upstream_cancelled = registry.counter(
+    "gateway_upstream_cancelled_total",
+    "Upstream requests dropped because the client disconnected",
+    ["service"],
+)
+
+# Upstream connection pools, refreshed on every scrape
+pool_connections = registry.gauge(
+    "gateway_upstream_pool_connections",
+    "Connections in an upstream client pool by state",
+    ["service", "state"],
+)
+pool_max_connections = registry.gauge(
+    "gateway_upstream_pool_max_connections",
+    "Connection limit of an upstream client pool",
+    ["service"],
+)
+pool_utilization = registry.gauge(
+    "gateway_upstream_pool_utilization",
+    "Share of an upstream pool's connection limit in use",
+    ["service"],
+)
+
+# Gateway components, refreshed on every scrape
+response_cache_events = registry.counter(
+    "gateway_response_cache_events_total",
+    "Response cache hits, misses, evictions and invalidations",
+    ["event"],
+)
+coalesced_requests = registry.counter(
+    "gateway_coalesced_requests_total",
+    "Requests served by another in-flight request to the same route",
+    ["route"],
+)
+rate_limited_requests = registry.counter(
+    "gateway_rate_limited_requests_total",
+    "Requests rejected by per-user rate limits",
+    ["group"],
+)
+admission_queued = registry.gauge(
+    "gateway_admission_queued_requests",
+    "Requests waiting for an upstream concurrency slot",
+    ["service"],
+)
+admission_rejected = registry.counter(
+    "gateway_admission_rejected_total",
+    "Requests shed because an upstream concurrency limit stayed full",
+    ["service"],
+)
+priority_queue_time = registry.histogram(
+    "gateway_priority_queue_seconds",
+    "Time requests waited for a slot in their priority lane",
+    ["lane"],
+)
+priority_active = registry.gauge(
+    "gateway_priority_active_requests",
+    "Requests holding a slot in a priority lane",
+    ["lane"],
+)
+priority_queued = registry.gauge(
+    "gateway_priority_queued_requests",
+    "Requests waiting for a slot in a priority lane",
+    ["lane"],
+)
+priority_rejected = registry.counter(
+    "gateway_priority_rejected_total",
+    "Requests shed because their priority lane stayed full",
+    ["lane"],
+)
+hedged_requests = registry.counter(
+    "gateway_hedged_requests_total",
+    "Backup requests sent because the first one was slow",
+    ["route"],
+)
+hedge_wins = registry.counter(
+    "gateway_hedge_wins_total",
+    "Hedged requests where the backup answered first",
+    ["route"],
+)
+replica_healthy = registry.gauge(
+    "gateway_replica_healthy",
+    "Whether a replica is in rotation (1) or ejected by health checks (0)",
+    ["service", "replica"],
+)
+replica_ready = registry.gauge(
+    "gateway_replica_ready",
+    "Whether a replica reports it is ready to take traffic (1) or not (0)",
+    ["service", "replica"],
+)
+replica_circuit_open = registry.gauge(
+    "gateway_replica_circuit_open",
+    "Whether a replica's circuit breaker is open (1) or not (0)",
+    ["service", "replica"],
+)
+
+
+def _advance(counter: _CounterValue, total: float) -> None:
+    """
+    Bring a counter up to a running total kept by another component
+    """
+    if total > counter.value:
+        counter.inc(total - counter.value)
+
+
+def collect_state() -> None:
+    """
+    Copy the state of pools, caches and limiters into their metrics
+    """
+    for service, stats in upstream_clients.pool_stats().items():
+        for state in ("active", "idle"):
+            pool_connections.labels(service, state).set(stats[state])
+        pool_max_connections.labels(service).set(stats["max_connections"])
+        if stats["max_connections"]:
+            pool_utilization.labels(service).set(stats["active"] / stats["max_connections"])
+
+    cache_stats = response_cache.stats()
+    for event in ("hits", "misses", "evictions", "invalidations"):
+        _advance(response_cache_events.labels(event), cache_stats[event])
+
+    for route, count in single_flight.stats()["collapsed_by_route"].items():
+        _advance(coalesced_requests.labels(route), count)
+
+    for lane, stats in priority_scheduler.stats()["lanes"].items():
+        priority_active.labels(lane).set(stats["active"])
+        priority_queued.labels(lane).set(stats["queued"])
+        _advance(priority_rejected.labels(lane), stats["rejected"])
+
+    for route, stats in hedger.stats()["routes"].items():
+        _advance(hedged_requests.labels(route), stats["hedged"])
+        _advance(hedge_wins.labels(route), stats["hedge_wins"])
+
+    for group, count in rate_limiter.stats()["rejected_by_group"].items():
+        _advance(rate_limited_requests.labels(group), count)
+
+    for service, stats in admission_control.status().items():
+        admission_queued.labels(service).set(stats["queued"])
+        _advance(admission_rejected.labels(service), stats["rejected"])
+
+    for service, replicas in load_balancer.status().items():
+        for replica in replicas:
+            replica_healthy.labels(service, replica["url"]).set(1 if replica["healthy"] else 0)
+            replica_ready.labels(service, replica["url"]).set(1 if replica["ready"] else 0)
+            replica_circuit_open.labels(service, replica["url"]).set(
+                1 if replica["circuit"]["state"] == "open" else 0
+            )
+
+
+def render() -> str:
+    collect_state()
+    return registry.render()
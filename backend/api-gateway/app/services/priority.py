@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.ratelimit import RateLimited
+from app.services.route_table import match_route
+
+logger = logging.getLogger(__name__)
+
+
+class Lane:
+    """
+    A priority class with its own concurrency cap, queue and scheduling weight
+    """
+
+    def __init__(self, scheduler: "PriorityScheduler", name: str, config: Dict[str, float]):
+        self.scheduler = scheduler
+        self.name = name
+        self.weight = max(float(config.get("weight", 1)), 0.01)
+        self.limit = int(config.get("max_concurrency", scheduler.capacity))
+        self.max_queue = int(config.get("max_queue", settings.admission_max_queue))
+        self.queue_timeout = float(config.get("queue_timeout", settings.admission_queue_timeout))
+        self.active = 0
+        self._waiters: Deque[Tuple[asyncio.Future, float]] = deque()
+        self.current_weight = 0.0
+        self.admitted = 0
+        self.queued_total = 0
+        self.rejected = 0
+        self.queue_time_total = 0.0
+
+    @property
+    def runnable(self) -> bool:
+        """
+        Whether the lane has a waiter it is allowed to start
+        """
+        return bool(self._waiters) and self.active < self.limit
+
+    def release(self) -> None:
+        self.scheduler.release(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "weight": self.weight,
+            "limit": self.limit,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "queued_total": self.queued_total,
+            "rejected": self.rejected,
+            "avg_queue_time": self.queue_time_total / self.admitted if self.admitted else 0.0,
+        }
+
+
+class PriorityScheduler:
+    """
+    Share the gateway's upstream slots between priority lanes.
+
+    Every lane is capped by its own concurrency limit, so bulk ingestion can
+    never hold more than its share of slots. When all slots are taken,
+    requests queue per lane and a freed slot goes to the next lane picked by
+    smooth weighted round robin, so interactive calls overtake queued bulk
+    work without starving it.
+    """
+
+    def __init__(self, capacity: int, lanes: Dict[str, Dict[str, float]]):
+        self.capacity = capacity
+        self.active = 0
+        self.lanes = {name: Lane(self, name, config) for name, config in lanes.items()}
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def classify(self, service: str, path: str) -> str:
+        """
+        Lane of a request, from the route table
+        """
+        lane = match_route(settings.priority_route_lanes, service, path, settings.priority_default_lane)
+        return lane if lane in self.lanes else settings.priority_default_lane
+
+    def lane(self, name: str) -> Lane:
+        lane = self.lanes.get(name)
+        if lane is None:
+            lane = Lane(self, name, {})
+            self.lanes[name] = lane
+        return lane
+
+    async def acquire(self, name: str) -> Optional[Lane]:
+        """
+        Take a slot in a lane, queueing for one; returns the lane to release.
+
+        Raises RateLimited if the lane's queue is full or no slot frees up
+        within its queue timeout.
+        """
+        if not self.enabled:
+            return None
+        lane = self.lane(name)
+
+        if lane.active < lane.limit and self.active < self.capacity and not lane._waiters:
+            self._start(lane, 0.0)
+            return lane
+
+        if len(lane._waiters) >= lane.max_queue:
+            lane.rejected += 1
+            raise RateLimited(f"Too many queued {lane.name} requests", lane.queue_timeout)
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (waiter, time.monotonic())
+        lane._waiters.append(entry)
+        lane.queued_total += 1
+        try:
+            await asyncio.wait_for(waiter, lane.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self.release(lane)
+            else:
+                try:
+                    lane._waiters.remove(entry)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            lane.rejected += 1
+            raise RateLimited(f"Too many queued {lane.name} requests", lane.queue_timeout)
+        return lane
+
+    def release(self, lane: Lane) -> None:
+        lane.active = max(0, lane.active - 1)
+        self.active = max(0, self.active - 1)
+        self._dispatch()
+
+    def _start(self, lane: Lane, queued_for: float) -> None:
+        lane.active += 1
+        lane.admitted += 1
+        lane.queue_time_total += queued_for
+        self.active += 1
+
+    def _dispatch(self) -> None:
+        """
+        Hand free slots to queued requests, choosing lanes by weight
+        """
+        while self.active < self.capacity:
+            lane = self._next_lane()
+            if lane is None:
+                return
+            waiter, enqueued = lane._waiters.popleft()
+            if waiter.done():
+                continue
+            self._start(lane, time.monotonic() - enqueued)
+            waiter.set_result(None)
+
+    def _next_lane(self) -> Optional[Lane]:
+        # Smooth weighted round robin over the lanes that can start a request
+        runnable = [lane for lane in self.lanes.values() if lane.runnable]
+        if not runnable:
+            return None
+        total = sum(lane.weight for lane in runnable)
+        for lane in runnable:
+            lane.current_weight += lane.weight
+        chosen = max(runnable, key=lambda lane: lane.current_weight)
+        chosen.current_weight -= total
+        return chosen
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "lanes": {name: lane.to_dict() for name, lane in self.lanes.items()},
+        }
+
+
+# Shared scheduler for all proxied requests
+priority_scheduler = PriorityScheduler(settings.priority_max_concurrency, settings.priority_lanes)
@@ -1,56 +1,708 @@
 from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+import asyncio
 import httpx
 import logging
-from typing import Any, Dict
-from starlette.responses import StreamingResponse
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple, Union
+from starlette.background import BackgroundTask
+
+
+from app.core.config import settings
+from app.services.balancer import NoReplicaAvailable, Replica, load_balancer
+from app.services.cache import CacheEntry, response_cache
+from app.services.clients import upstream_clients
+from app.services.coalesce import BufferedResponse, single_flight
+from app.services import metrics
+from app.services.hedging import hedger
+from app.services.identity import InvalidToken, bearer_token, identity_header, token_verifier
+from app.services.priority import Lane, priority_scheduler
+from app.services.ratelimit import ConcurrencyLimiter, RateLimited, admission_control, rate_limiter
+from app.services.retry import retry_budget
+from app.services.route_table import match_route
+from common.auth.identity import IDENTITY_HEADER
+from common.utils.deadline import DEADLINE_HEADER, Deadline
+from common.utils.streaming import CancellableStreamingResponse
 
 logger = logging.getLogger(__name__)
 
-async def proxy_request(request: Request, service_url: str, path: str) -> Response:
+# Methods the service routes accept and proxy; batch entries are held to the same
+PROXIED_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE"]
+
+# Methods that do not change state upstream
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Methods that can be replayed safely against another replica
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# Upstream statuses that indicate an unhealthy replica rather than a bad request
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+
+# Headers that only apply to a single connection and must not be forwarded
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+}
+
+RequestBody = Union[None, bytes, AsyncIterator[bytes]]
+
+
+def filter_headers(headers) -> Dict[str, str]:
+    """
+    Drop hop-by-hop headers so they do not leak onto pooled connections
+    """
+    return {
+        key: value
+        for key, value in headers.items()
+        if key.lower() not in HOP_BY_HOP_HEADERS
+    }
+
+
+class RequestBodyTooLarge(Exception):
+    """
+    Raised when a streamed request body exceeds the configured limit
+    """
+    pass
+
+
+class ProxyError(Exception):
+    """
+    Raised when a request could not be forwarded to any replica
+    """
+
+    def __init__(self, status_code: int, detail: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.headers = headers
+
+    def to_response(self) -> Response:
+        return Response(content=self.detail, status_code=self.status_code, headers=self.headers)
+
+
+def has_body(request: Request) -> bool:
+    """
+    Check whether the incoming request carries a body
+    """
+    if "transfer-encoding" in request.headers:
+        return True
+    return request.headers.get("content-length", "0") != "0"
+
+
+async def stream_body(request: Request, max_size: int, counter: Any = None) -> AsyncIterator[bytes]:
+    """
+    Forward the incoming request body chunk by chunk, enforcing max_size
+    """
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if counter is not None:
+            counter.inc(len(chunk))
+        if received > max_size:
+            raise RequestBodyTooLarge(f"Request body exceeds {max_size} bytes")
+        yield chunk
+
+
+def auth_scope(request: Request) -> str:
+    """
+    The identity a request is made on behalf of, for per-user gateway state
+    """
+    user = getattr(request.state, "user", None)
+    if user is not None:
+        return f"user:{user.get('sub')}"
+    return "anonymous"
+
+
+def rate_limit_scope(request: Request) -> str:
+    """
+    Who a request counts against: the user, or the client address if anonymous
+    """
+    scope = auth_scope(request)
+    if scope == "anonymous" and request.client is not None:
+        return f"ip:{request.client.host}"
+    return scope
+
+
+def request_deadline(request: Request, service: str, path: str) -> Deadline:
+    """
+    Deadline for a proxied request from its route class timeout
+    """
+    timeout = match_route(settings.route_timeouts, service, path, settings.upstream_timeout)
+    deadline = Deadline.from_timeout(timeout)
+    client_deadline = Deadline.from_header(request.headers.get(DEADLINE_HEADER))
+    if client_deadline.expires_at is not None and client_deadline.expires_at < deadline.expires_at:
+        return client_deadline
+    return deadline
+
+
+def rate_limited_response(e: RateLimited) -> Response:
+    return JSONResponse(
+        status_code=429,
+        content={"detail": e.detail},
+        headers={"Retry-After": e.retry_after_header},
+    )
+
+
+class UpstreamResponse:
+    """
+    An upstream response whose body has not been read yet.
+
+    Holds the replica's outstanding-request slot, the upstream concurrency
+    slot and the priority lane slot until the body has been consumed or the
+    response is closed.
+    """
+
+    def __init__(
+        self,
+        response: httpx.Response,
+        replica: Replica,
+        limiter: Optional[ConcurrencyLimiter] = None,
+        deadline: Optional[Deadline] = None,
+        route: str = "",
+        started: Optional[float] = None,
+        lane: Optional[Lane] = None,
+    ):
+        self.response = response
+        self.replica = replica
+        self.limiter = limiter
+        self.deadline = deadline or Deadline()
+        self.route = route
+        self.started = started if started is not None else time.monotonic()
+        self.lane = lane
+        self.bytes_relayed = 0
+        self._closed = False
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return filter_headers(self.response.headers)
+
+    async def close(self) -> None:
+        # Called from the relay and the background task; release only once
+        if self._closed:
+            return
+        self._closed = True
+        load_balancer.release(self.replica)
+        if self.limiter is not None:
+            self.limiter.release()
+        if self.lane is not None:
+            self.lane.release()
+        await self.response.aclose()
+
+        service = self.replica.service
+        metrics.upstream_in_flight.labels(service).dec()
+        metrics.upstream_requests_total.labels(
+            service, self.route, self.response.request.method, metrics.status_class(self.status_code)
+        ).inc()
+        metrics.upstream_duration.labels(service, self.route).observe(time.monotonic() - self.started)
+        metrics.upstream_response_bytes.labels(service, self.route).inc(self.bytes_relayed)
+
+    async def relay(self) -> AsyncIterator[bytes]:
+        """
+        Relay upstream bytes to the client as they arrive.
+
+        The raw (still encoded) bytes are passed through untouched so SSE and
+        NDJSON token streams are not buffered. The upstream stream is closed
+        when the client goes away, which cancels this generator, when the
+        request's deadline passes, or on completion.
+        """
+        try:
+            async for chunk in self.response.aiter_raw():
+                self.bytes_relayed += len(chunk)
+                yield chunk
+                if self.deadline.expired:
+                    logger.warning(f"Deadline exceeded relaying {self.response.request.url}, closing stream")
+                    break
+        except httpx.RequestError as e:
+            logger.error(f"Upstream stream from {self.response.request.url} interrupted: {e}")
+        finally:
+            await self.close()
+
+    async def cancel(self) -> None:
+        """
+        Drop the upstream request because the client went away
+        """
+        self.replica.cancelled += 1
+        metrics.upstream_cancelled.labels(self.replica.service).inc()
+        logger.info(f"Client disconnected, cancelling upstream request to {self.response.request.url}")
+        await self.close()
+
+    async def read(self) -> bytes:
+        """
+        Read the whole raw body and close the response
+        """
+        return b"".join([chunk async for chunk in self.relay()])
+
+    def to_response(self) -> CancellableStreamingResponse:
+        # Closing the upstream as soon as the client disconnects releases the
+        # connection and lets the service stop generating
+        return CancellableStreamingResponse(
+            self.relay(),
+            status_code=self.status_code,
+            headers=self.headers,
+            background=BackgroundTask(self.close),
+            on_disconnect=self.cancel,
+        )
+
+
+async def send_upstream(
+    service: str,
+    method: str,
+    path: str,
+    params: Any,
+    headers: Dict[str, str],
+    body: RequestBody,
+    retryable: bool,
+    deadline: Deadline,
+) -> UpstreamResponse:
+    """
+    Send a request to a replica of a service and wait for the response headers.
+
+    Requests first take a slot in their priority lane, then one from the
+    upstream's concurrency limit. Replicas are chosen by the load balancer and idempotent requests are
+    retried on another replica within the retry budget while the deadline
+    allows. Raises ProxyError if no usable response could be obtained.
+    """
+    lane_name = priority_scheduler.classify(service, path)
+    queued = time.monotonic()
+    try:
+        lane = await priority_scheduler.acquire(lane_name)
+    except RateLimited as e:
+        logger.warning(f"Shed {lane_name} {method} request to {service}/{path}: {e.detail}")
+        raise ProxyError(429, e.detail, headers={"Retry-After": e.retry_after_header})
+    metrics.priority_queue_time.labels(lane_name).observe(time.monotonic() - queued)
+
+    try:
+        limiter = await admission_control.acquire(service)
+    except BaseException as e:
+        if lane is not None:
+            lane.release()
+        if not isinstance(e, RateLimited):
+            raise
+        logger.warning(f"Shed {method} request to {service}/{path}: {e.detail}")
+        raise ProxyError(429, e.detail, headers={"Retry-After": e.retry_after_header})
+
+    route = metrics.route_label(service, path)
+    metrics.upstream_in_flight.labels(service).inc()
+    started = time.monotonic()
+    try:
+        response, replica = await send_to_replica(
+            service, method, path, params, headers, body, retryable, deadline, lane_name
+        )
+    except BaseException as e:
+        if limiter is not None:
+            limiter.release()
+        if lane is not None:
+            lane.release()
+        metrics.upstream_in_flight.labels(service).dec()
+        if isinstance(e, ProxyError):
+            metrics.upstream_requests_total.labels(
+                service, route, method, metrics.status_class(e.status_code)
+            ).inc()
+        raise
+    metrics.upstream_ttfb.labels(service, route).observe(time.monotonic() - started)
+    return UpstreamResponse(response, replica, limiter, deadline, route, started, lane)
+
+
+async def send_to_replica(
+    service: str,
+    method: str,
+    path: str,
+    params: Any,
+    headers: Dict[str, str],
+    body: RequestBody,
+    retryable: bool,
+    deadline: Deadline,
+    lane: Optional[str] = None,
+) -> Tuple[httpx.Response, Replica]:
+    """
+    Run the replica selection and retry loop for one request
+    """
+    client = upstream_clients.get(service, lane)
+    tried = []
+
+    while True:
+        try:
+            replica = load_balancer.pick(service, exclude=tried)
+        except NoReplicaAvailable as e:
+            logger.error(str(e))
+            raise ProxyError(503, f"Error connecting to service: {str(e)}")
+        tried.append(replica)
+
+        # Each attempt gets whatever time is left, and tells the service so
+        remaining = deadline.remaining()
+        if remaining is not None and remaining <= 0:
+            raise ProxyError(504, f"Deadline exceeded calling {service}")
+
+        upstream_request = client.build_request(
+            method=method,
+            url=f"{replica.url}/{path}",
+            params=params,
+            headers={**headers, DEADLINE_HEADER: deadline.header_value()} if remaining is not None else headers,
+            content=body,
+            timeout=httpx.Timeout(
+                remaining,
+                connect=min(settings.upstream_connect_timeout, remaining),
+            ) if remaining is not None else httpx.USE_CLIENT_DEFAULT,
+        )
+
+        logger.info(f"Proxying {method} request to {upstream_request.url}")
+
+        can_retry = retryable and len(tried) < settings.retry_max_attempts
+
+        replica.breaker.on_request()
+        started = load_balancer.acquire(replica)
+        try:
+            # Only wait for the upstream headers; the body is relayed as it arrives
+            response = await client.send(upstream_request, stream=True)
+        except asyncio.CancelledError:
+            # The caller gave up (disconnect or a hedge that lost the race)
+            load_balancer.release(replica)
+            replica.breaker.record_ignored()
+            raise
+        except RequestBodyTooLarge as e:
+            load_balancer.release(replica)
+            replica.breaker.record_ignored()
+            logger.warning(f"Rejected {method} request to {upstream_request.url}: {e}")
+            raise ProxyError(413, "Request body too large")
+        except httpx.RequestError as e:
+            load_balancer.release(replica)
+            replica.record_failure(str(e))
+            replica.breaker.record_failure(str(e))
+            logger.error(f"Error proxying request to {upstream_request.url}: {e}")
+            if can_retry and retry_budget.try_acquire():
+                metrics.upstream_retries.labels(service).inc()
+                continue
+            raise ProxyError(
+                504 if isinstance(e, httpx.TimeoutException) else 503,
+                f"Error connecting to service: {str(e)}",
+            )
+
+        replica.record_latency(time.monotonic() - started)
+
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            replica.breaker.record_failure(f"Upstream returned {response.status_code}")
+            if can_retry and retry_budget.try_acquire():
+                metrics.upstream_retries.labels(service).inc()
+                load_balancer.release(replica)
+                await response.aclose()
+                logger.warning(
+                    f"Retrying {method} request after {response.status_code} from {upstream_request.url}"
+                )
+                continue
+        else:
+            replica.record_success()
+            replica.breaker.record_success()
+
+        return response, replica
+
+
+async def discard(task: "asyncio.Future[UpstreamResponse]") -> None:
+    """
+    Cancel a losing upstream request, closing its response if it already has one
+    """
+    if not task.done():
+        task.cancel()
+    try:
+        upstream = await task
+    except (asyncio.CancelledError, ProxyError):
+        return
+    await upstream.close()
+
+
+async def hedged_send(
+    service: str,
+    method: str,
+    path: str,
+    params: Any,
+    headers: Dict[str, str],
+    body: Optional[bytes],
+    deadline: Deadline,
+) -> UpstreamResponse:
+    """
+    Send an idempotent read, racing a second request if the first is slow.
+
+    The hedge goes out once the first request has taken longer than the
+    route's latency percentile and the hedge budget allows it. The first
+    response wins and the other request is cancelled. The load balancer
+    steers the hedge to another replica since the first one is busy with
+    the original request.
+    """
+    route = hedger.route(service, path)
+    hedger.record_request(route)
+    started = time.monotonic()
+
+    primary = asyncio.ensure_future(
+        send_upstream(service, method, path, params, headers, body, True, deadline)
+    )
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=hedger.delay(route))
+        if done or len(load_balancer.pool(service).replicas) < 2 or not hedger.try_acquire(route):
+            upstream = await primary
+            hedger.record_latency(route, time.monotonic() - started)
+            return upstream
+    except BaseException:
+        await discard(primary)
+        raise
+
+    logger.info(f"Hedging {method} request to {service}/{path}")
+    hedge = asyncio.ensure_future(
+        send_upstream(service, method, path, params, headers, body, True, deadline)
+    )
+    pending = {primary, hedge}
+    try:
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winners = [task for task in done if task.exception() is None]
+            # Fall back to whichever request is still running if one failed
+            if winners or not pending:
+                break
+
+        winner = winners[0] if winners else next(iter(done))
+        upstream = winner.result()
+        hedger.record_latency(route, time.monotonic() - started)
+        if winner is hedge:
+            hedger.record_win(route)
+        for task in winners[1:]:
+            await task.result().close()
+        return upstream
+    finally:
+        for task in pending:
+            await discard(task)
+
+
+def is_cacheable(status_code: int, headers: Dict[str, str]) -> bool:
+    """
+    Check whether an upstream response may be stored in the response cache
+    """
+    if status_code != 200:
+        return False
+    headers = {key.lower(): value for key, value in headers.items()}
+    if "no-store" in headers.get("cache-control", "").lower():
+        return False
+    content_length = headers.get("content-length")
+    if content_length and content_length.isdigit():
+        return int(content_length) <= settings.response_cache_max_entry_bytes
+    return True
+
+
+async def read_upstream(
+    service: str,
+    method: str,
+    path: str,
+    params: Any,
+    headers: Dict[str, str],
+    deadline: Deadline,
+) -> BufferedResponse:
+    """
+    Send a bodiless request upstream and read the whole response
+    """
+    upstream = await send_upstream(service, method, path, params, headers, None, True, deadline)
+    return BufferedResponse(upstream.status_code, upstream.headers, await upstream.read())
+
+
+async def coalesced_request(
+    request: Request,
+    service: str,
+    path: str,
+    headers: Dict[str, str],
+    deadline: Deadline,
+) -> BufferedResponse:
+    """
+    Share one upstream call between identical in-flight requests
+    """
+    key = single_flight.key(
+        request.method,
+        service,
+        path,
+        str(request.query_params),
+        auth_scope(request),
+        request.headers.get("accept-encoding", ""),
+    )
+    return await single_flight.do(
+        key,
+        f"{service}:{path.strip('/')}",
+        lambda: read_upstream(service, request.method, path, request.query_params, headers, deadline),
+    )
+
+
+async def cached_request(
+    request: Request,
+    service: str,
+    path: str,
+    headers: Dict[str, str],
+    ttl: float,
+    deadline: Deadline,
+) -> Response:
+    """
+    Serve a whitelisted GET from the response cache, filling it on a miss
+    """
+    key = response_cache.key(
+        service,
+        path,
+        str(request.query_params),
+        auth_scope(request),
+        request.headers.get("accept-encoding", ""),
+    )
+    if_none_match = request.headers.get("if-none-match")
+
+    entry = response_cache.get(key)
+    if entry is not None:
+        return entry.to_response(if_none_match)
+
+    # Always fetch the full body upstream so the entry can be filled
+    headers = {
+        key: value
+        for key, value in headers.items()
+        if key.lower() not in ("if-none-match", "if-modified-since")
+    }
+
+    # A miss right after expiry is where herds form, so share the refill
+    if single_flight.enabled_for(service, "GET", path):
+        buffered = await coalesced_request(request, service, path, headers, deadline)
+        if not is_cacheable(buffered.status_code, buffered.headers):
+            return buffered.to_response()
+        entry = CacheEntry(buffered.status_code, buffered.headers, buffered.body, ttl)
+    else:
+        upstream = await send_upstream(
+            service, "GET", path, request.query_params, headers, None, True, deadline
+        )
+        if not is_cacheable(upstream.status_code, upstream.response.headers):
+            return upstream.to_response()
+        entry = CacheEntry(upstream.status_code, upstream.headers, await upstream.read(), ttl)
+
+    response_cache.put(key, service, path, entry)
+    return entry.to_response(if_none_match)
+
+
+async def proxy_request(request: Request, service: str, path: str) -> Response:
+    """
+    Proxy a request to a microservice, recording gateway metrics
+    """
+    started = time.monotonic()
+    response = await forward_request(request, service, path)
+
+    route = metrics.route_label(service, path)
+    metrics.requests_total.labels(
+        service, route, request.method, metrics.status_class(response.status_code)
+    ).inc()
+    metrics.request_duration.labels(service, route).observe(time.monotonic() - started)
+    return response
+
+
+async def forward_request(request: Request, service: str, path: str) -> Response:
     """
     Proxy a request to a microservice
     """
     # Get request details
     method = request.method
-    url = f"{service_url}/{path}"
-    headers = dict(request.headers)
-    
+    headers = filter_headers(request.headers)
+
     # Remove host header to avoid conflicts
     headers.pop("host", None)
-    
-    # Get request body if applicable
-    body = await request.body()
-    
-    logger.info(f"Proxying {method} request to {url}")
-    
-    async with httpx.AsyncClient() as client:
+
+    # Never trust an identity header supplied by the client
+    headers.pop(IDENTITY_HEADER.lower(), None)
+
+    # The route class sets the time budget; a client may only shorten it
+    deadline = request_deadline(request, service, path)
+    headers.pop(DEADLINE_HEADER.lower(), None)
+
+    # Verify the bearer token once here; services trust the signed identity
+    token = bearer_token(request.headers.get("authorization"))
+    if token is not None:
         try:
-            # Make the request to the target service
-            response = await client.request(
-                method=method,
-                url=url,
-                headers=headers,
-                content=body,
-                timeout=60.0,  # Increased timeout for long-running operations
+            claims = token_verifier.verify(token)
+        except InvalidToken as e:
+            logger.info(f"Rejected {method} request to {service}/{path}: {e}")
+            return JSONResponse(
+                status_code=401,
+                content={"detail": "Could not validate credentials"},
+                headers={"WWW-Authenticate": "Bearer"},
             )
-            
-            # Check if response is streaming
-            if "text/event-stream" in response.headers.get("content-type", ""):
-                return StreamingResponse(
-                    response.aiter_bytes(),
-                    status_code=response.status_code,
-                    headers=dict(response.headers),
-                )
-            
-            # Return the response
-            return Response(
-                content=response.content,
-                status_code=response.status_code,
-                headers=dict(response.headers),
+        request.state.user = claims
+        headers.update(identity_header(claims))
+
+    # Reject oversized bodies up front when the client declares the size
+    content_length = request.headers.get("content-length")
+    declared_size = int(content_length) if content_length and content_length.isdigit() else None
+    if declared_size is not None and declared_size > settings.max_request_body_size:
+        return Response(
+            content="Request body too large",
+            status_code=413,
+        )
+
+    # Shed load from users over their request rate before doing any work
+    try:
+        await rate_limiter.check(rate_limit_scope(request), service, path)
+    except RateLimited as e:
+        logger.info(f"Rate limited {method} request to {service}/{path}: {e.detail}")
+        return rate_limited_response(e)
+
+    retry_budget.record_request()
+
+    # Whitelisted read-heavy routes are answered from the response cache
+    cache_ttl = response_cache.ttl_for(service, method, path)
+    if cache_ttl is not None:
+        try:
+            return await cached_request(request, service, path, headers, cache_ttl, deadline)
+        except ProxyError as e:
+            return e.to_response()
+
+    # Identical concurrent reads of opted-in routes share one upstream call
+    if single_flight.enabled_for(service, method, path) and not has_body(request):
+        try:
+            buffered = await coalesced_request(request, service, path, headers, deadline)
+        except ProxyError as e:
+            return e.to_response()
+        return buffered.to_response()
+
+    # Idempotent requests, and reads declared hedgeable, can be retried; small bodies are kept so they can be
+    # replayed, anything else is streamed upstream without buffering
+    hedged = hedger.enabled_for(service, path)
+    retryable = method in IDEMPOTENT_METHODS or hedged
+    if not has_body(request):
+        body = None
+    elif retryable and declared_size is not None and declared_size <= settings.retry_max_body_size:
+        body = await request.body()
+        metrics.request_bytes.labels(service, metrics.route_label(service, path)).inc(len(body))
+    else:
+        body = stream_body(
+            request,
+            settings.max_request_body_size,
+            metrics.request_bytes.labels(service, metrics.route_label(service, path)),
+        )
+        retryable = False
+
+    # Writes invalidate cached reads of the same resource, both before and
+    # after so a read racing the write cannot leave a stale entry behind
+    is_write = method not in SAFE_METHODS and not hedged
+    if is_write:
+        response_cache.invalidate(service, path)
+
+    try:
+        if hedged and retryable:
+            upstream = await hedged_send(
+                service, method, path, request.query_params, headers, body, deadline
             )
-        except httpx.RequestError as e:
-            logger.error(f"Error proxying request to {url}: {e}")
-            return Response(
-                content=f"Error connecting to service: {str(e)}",
-                status_code=503,
+        else:
+            upstream = await send_upstream(
+                service, method, path, request.query_params, headers, body, retryable, deadline
             )
+    except ProxyError as e:
+        return e.to_response()
+    finally:
+        if is_write:
+            response_cache.invalidate(service, path)
+
+    # Return the response
+    return upstream.to_response()
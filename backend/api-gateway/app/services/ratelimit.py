@@ -0,0 +1,298 @@
+import asyncio
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.route_table import match_route
+
+logger = logging.getLogger(__name__)
+
+# A bucket to take from: (key, tokens per second, burst)
+Limit = Tuple[str, float, float]
+
+
+def _refill(tokens: float, updated: float, rate: float, burst: float, now: float) -> float:
+    return min(burst, tokens + max(0.0, now - updated) * rate)
+
+
+def _wait(tokens: float, rate: float) -> float:
+    """
+    Seconds until a bucket holding tokens has one to give
+    """
+    return 0.0 if tokens >= 1 else (1 - tokens) / rate
+
+
+class RateLimited(Exception):
+    """
+    Raised when a request is rejected by rate limiting or admission control
+    """
+
+    def __init__(self, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class MemoryBucketStore:
+    """
+    Token buckets held in this process, least recently used first
+    """
+
+    def __init__(self, max_buckets: int = 100000):
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, limits: List[Limit], now: float) -> float:
+        """
+        Take one token from every bucket, or from none of them; returns 0 if
+        allowed, otherwise seconds until all of them have a token
+        """
+        refilled = []
+        for key, rate, burst in limits:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            refilled.append(_refill(tokens, updated, rate, burst, now))
+        wait = max(_wait(tokens, rate) for tokens, (_, rate, _) in zip(refilled, limits))
+        for tokens, (key, _, _) in zip(refilled, limits):
+            self._buckets[key] = (tokens - 1 if wait == 0 else tokens, now)
+            self._buckets.move_to_end(key)
+        self._expire(now)
+        return wait
+
+    def _expire(self, now: float) -> None:
+        # Buckets are in order of last use, so idle ones (full again, carrying
+        # no state) are at the front; each is dropped once, keeping this O(1)
+        # per request on average
+        while self._buckets:
+            key, (_, updated) = next(iter(self._buckets.items()))
+            if now - updated <= settings.rate_limit_idle_expiry and len(self._buckets) <= self.max_buckets:
+                break
+            del self._buckets[key]
+
+    def close(self) -> None:
+        self._buckets.clear()
+
+
+class SQLiteBucketStore:
+    """
+    Token buckets in a SQLite file, shared by all gateway workers on a host
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=1.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._pruned = 0.0
+
+    def take(self, limits: List[Limit], now: float) -> float:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                refilled = []
+                for key, rate, burst in limits:
+                    row = self._conn.execute(
+                        "SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)
+                    ).fetchone()
+                    tokens, updated = row if row else (burst, now)
+                    refilled.append(_refill(tokens, updated, rate, burst, now))
+                wait = max(_wait(tokens, rate) for tokens, (_, rate, _) in zip(refilled, limits))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                    [(key, tokens - 1 if wait == 0 else tokens, now) for tokens, (key, _, _) in zip(refilled, limits)],
+                )
+                # Idle buckets are full again and carry no state; a scan per
+                # expiry period keeps the table to the recently active users
+                if now - self._pruned >= settings.rate_limit_idle_expiry:
+                    self._conn.execute(
+                        "DELETE FROM rate_limit_buckets WHERE updated < ?", (now - settings.rate_limit_idle_expiry,)
+                    )
+                    self._pruned = now
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class RateLimiter:
+    """
+    Token-bucket limits per user and per user and route group
+    """
+
+    def __init__(self):
+        self._store = None
+        self.rejected = 0
+        self.rejected_by_group: Dict[str, int] = {}
+
+    @property
+    def store(self):
+        if self._store is None:
+            if settings.rate_limit_store == "sqlite":
+                self._store = SQLiteBucketStore(settings.rate_limit_sqlite_path)
+            else:
+                self._store = MemoryBucketStore()
+        return self._store
+
+    def route_group(self, service: str, path: str) -> str:
+        return match_route(settings.rate_limit_route_groups, service, path, "default")
+
+    async def check(self, scope: str, service: str, path: str) -> None:
+        """
+        Take a token from each of the user's buckets, raising RateLimited if
+        any is empty; a rejected request takes nothing from the others
+        """
+        if not settings.rate_limit_enabled:
+            return
+
+        group = self.route_group(service, path)
+        limits = [(scope, settings.rate_limit_user_rate, settings.rate_limit_user_burst)]
+        group_limit = settings.rate_limit_groups.get(group)
+        if group_limit:
+            limits.append((f"{scope}|{group}", group_limit["rate"], group_limit["burst"]))
+        # A bucket that never refills is not a limit anyone configures on
+        # purpose; a rate of 0 turns it off, as a concurrency limit of 0 does
+        limits = [limit for limit in limits if limit[1] > 0]
+        if not limits:
+            return
+
+        now = time.time()
+        if isinstance(self.store, SQLiteBucketStore):
+            wait = await asyncio.to_thread(self.store.take, limits, now)
+        else:
+            wait = self.store.take(limits, now)
+        if wait > 0:
+            self.rejected += 1
+            self.rejected_by_group[group] = self.rejected_by_group.get(group, 0) + 1
+            raise RateLimited(f"Rate limit exceeded for {group} requests", wait)
+
+    def close(self) -> None:
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "store": settings.rate_limit_store,
+            "rejected": self.rejected,
+            "rejected_by_group": dict(self.rejected_by_group),
+        }
+
+
+class ConcurrencyLimiter:
+    """
+    Cap on concurrent requests to one upstream with a short FIFO queue
+    """
+
+    def __init__(self, service: str, limit: int):
+        self.service = service
+        self.limit = limit
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.queued_total = 0
+        self.rejected = 0
+
+    async def acquire(self) -> None:
+        """
+        Take a slot, waiting briefly for one; raises RateLimited if none frees up
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+
+        if len(self._waiters) >= settings.admission_max_queue:
+            self.rejected += 1
+            raise RateLimited(f"Too many concurrent requests to {self.service}", settings.admission_queue_timeout)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued_total += 1
+        try:
+            await asyncio.wait_for(waiter, settings.admission_queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected += 1
+            raise RateLimited(f"Too many concurrent requests to {self.service}", settings.admission_queue_timeout)
+
+    def release(self) -> None:
+        # Hand the slot straight to the next waiter so it cannot be jumped
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active = max(0, self.active - 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "queued_total": self.queued_total,
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionControl:
+    """
+    Per-upstream concurrency limiters
+    """
+
+    def __init__(self):
+        self._limiters: Dict[str, ConcurrencyLimiter] = {}
+
+    @staticmethod
+    def limit(service: str) -> int:
+        """
+        Concurrency limit of a service; 0 or less means unlimited
+        """
+        return settings.upstream_concurrency_overrides.get(service, settings.upstream_max_concurrency)
+
+    def limiter(self, service: str) -> ConcurrencyLimiter:
+        limiter = self._limiters.get(service)
+        if limiter is None:
+            limiter = ConcurrencyLimiter(service, self.limit(service))
+            self._limiters[service] = limiter
+        return limiter
+
+    async def acquire(self, service: str) -> Optional[ConcurrencyLimiter]:
+        """
+        Take a slot for a request to a service; returns the limiter to release
+        """
+        if self.limit(service) <= 0:
+            return None
+        limiter = self.limiter(service)
+        await limiter.acquire()
+        return limiter
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {service: limiter.to_dict() for service, limiter in self._limiters.items()}
+
+
+# Shared limiters, used by every proxied request
+rate_limiter = RateLimiter()
+admission_control = AdmissionControl()
@@ -0,0 +1,52 @@
+import time
+from typing import Any, Dict
+
+from app.core.config import settings
+from app.services.window import WindowCounter
+
+
+class RetryBudget:
+    """
+    Global cap on retries so they cannot amplify an outage.
+
+    Over a sliding window, retries may not exceed a fixed ratio of the
+    requests seen plus a small per-second reserve for low-traffic periods.
+    """
+
+    def __init__(self):
+        self._requests = WindowCounter()
+        self._retries = WindowCounter()
+        self.retries_total = 0
+        self.retries_denied = 0
+
+    def record_request(self) -> None:
+        self._requests.add(time.monotonic(), settings.retry_budget_window)
+
+    def try_acquire(self) -> bool:
+        """
+        Take a retry from the budget if one is available
+        """
+        now, window = time.monotonic(), settings.retry_budget_window
+        allowed = (
+            settings.retry_budget_ratio * self._requests.count(now, window)
+            + settings.retry_budget_min_per_second * window
+        )
+        if self._retries.count(now, window) >= allowed:
+            self.retries_denied += 1
+            return False
+        self._retries.add(now, window)
+        self.retries_total += 1
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        now, window = time.monotonic(), settings.retry_budget_window
+        return {
+            "window_requests": self._requests.count(now, window),
+            "window_retries": self._retries.count(now, window),
+            "retries_total": self.retries_total,
+            "retries_denied": self.retries_denied,
+        }
+
+
+# Shared across all upstreams
+retry_budget = RetryBudget()
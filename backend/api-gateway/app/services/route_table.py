@@ -0,0 +1,24 @@
+from typing import Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def match_route(table: Dict[str, T], service: str, path: str, default: Optional[T] = None) -> Optional[T]:
+    """
+    Look up a route in a table keyed by "service" or "service:path prefix".
+
+    Prefixes match whole path segments ("chat:chats" covers "chats/1" but
+    not "chats-export"). The longest matching key wins, so a path prefix
+    overrides its service.
+    """
+    route = f"{service}:{path.strip('/')}"
+    best = None
+    for key in table:
+        if ":" not in key:
+            matches = service == key
+        else:
+            prefix = key.rstrip("/")
+            matches = route == prefix or route.startswith(prefix if prefix.endswith(":") else f"{prefix}/")
+        if matches and (best is None or len(key) > len(best)):
+            best = key
+    return table[best] if best is not None else default
@@ -0,0 +1,35 @@
+import math
+from collections import deque
+from typing import Deque, List
+
+
+class WindowCounter:
+    """
+    Events over a sliding window, counted per second.
+
+    Memory is bounded by the window length rather than by the event rate;
+    the window is accurate to within a second.
+    """
+
+    def __init__(self):
+        # [second, events in that second], oldest first
+        self._seconds: Deque[List[int]] = deque()
+        self._total = 0
+
+    def _expire(self, now: float, window: float) -> None:
+        cutoff = now - window
+        while self._seconds and self._seconds[0][0] + 1 <= cutoff:
+            self._total -= self._seconds.popleft()[1]
+
+    def add(self, now: float, window: float) -> None:
+        second = math.floor(now)
+        if self._seconds and self._seconds[-1][0] == second:
+            self._seconds[-1][1] += 1
+        else:
+            self._seconds.append([second, 1])
+        self._total += 1
+        self._expire(now, window)
+
+    def count(self, now: float, window: float) -> int:
+        self._expire(now, window)
+        return self._total
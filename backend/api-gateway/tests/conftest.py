@@ -0,0 +1,36 @@
+import contextlib
+import os
+import sys
+
+import httpx
+import jwt
+import pytest
+
+# The gateway's app package and the shared common package, as the
+# Dockerfile's PYTHONPATH provides them
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [SERVICE_DIR, os.path.dirname(SERVICE_DIR)]
+
+
+@pytest.fixture
+def gateway():
+    """
+    Open the gateway for async tests: runs its lifespan and returns a client
+    that streams responses through it, unlike TestClient, which buffers them
+    """
+    from app.core.config import settings
+    from app.main import app
+    from app.services.asgi import StreamingASGITransport
+
+    @contextlib.asynccontextmanager
+    async def open_gateway(sub: str = "user-1"):
+        token = jwt.encode({"sub": sub}, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(
+                transport=StreamingASGITransport(app),
+                base_url=f"http://gateway{settings.api_prefix}",
+                headers={"Authorization": f"Bearer {token}"},
+            ) as client:
+                yield client
+
+    return open_gateway
@@ -0,0 +1,101 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.asgi import StreamingASGITransport
+
+
+async def streaming_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    for chunk in (b"one ", b"two ", b"three"):
+        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def failing_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"partial", "more_body": True})
+    raise RuntimeError("boom")
+
+
+async def stalled_app(scope, receive, send):
+    await asyncio.sleep(10)
+
+
+async def stalled_body_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"first", "more_body": True})
+    await asyncio.sleep(10)
+
+
+def fetch(app, timeout=5.0):
+    async def main():
+        transport = StreamingASGITransport(app)
+        async with httpx.AsyncClient(transport=transport, timeout=timeout) as client:
+            async with client.stream("GET", "http://service/path") as response:
+                chunks = []
+                try:
+                    async for chunk in response.aiter_raw():
+                        chunks.append(chunk)
+                finally:
+                    received = b"".join(chunks)
+                return response.status_code, received
+
+    return asyncio.run(main())
+
+
+def test_streams_the_body():
+    assert fetch(streaming_app) == (200, b"one two three")
+
+
+def test_app_failure_mid_response_is_not_a_truncated_success():
+    with pytest.raises(httpx.RemoteProtocolError):
+        fetch(failing_app)
+
+
+def test_read_timeout_bounds_the_wait_for_headers():
+    with pytest.raises(httpx.ReadTimeout):
+        fetch(stalled_app, timeout=0.1)
+
+
+def test_read_timeout_bounds_the_wait_for_body_chunks():
+    with pytest.raises(httpx.ReadTimeout):
+        fetch(stalled_body_app, timeout=0.1)
+
+
+def test_finished_body_ends_exactly_once():
+    async def main():
+        transport = StreamingASGITransport(streaming_app)
+        response = await transport.handle_async_request(httpx.Request("GET", "http://service/path"))
+        body = b"".join([chunk async for chunk in response.stream])
+        await asyncio.sleep(0)
+        return body, response.stream._queue.qsize()
+
+    assert asyncio.run(main()) == (b"one two three", 0)
+
+
+def test_request_body_errors_reach_the_caller():
+    class BodyTooLarge(Exception):
+        pass
+
+    async def body():
+        yield b"ok"
+        raise BodyTooLarge()
+
+    async def reading_app(scope, receive, send):
+        try:
+            while (await receive()).get("more_body"):
+                pass
+        except BodyTooLarge:
+            pass
+        # An app answering the broken request must not be taken for a reply
+        await send({"type": "http.response.start", "status": 500, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def main():
+        transport = StreamingASGITransport(reading_app)
+        await transport.handle_async_request(httpx.Request("POST", "http://service/path", content=body()))
+
+    with pytest.raises(BodyTooLarge):
+        asyncio.run(main())
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.balancer import LoadBalancer, NoReplicaAvailable, Replica, ServicePool
+
+
+@pytest.fixture
+def unreachable_chat(monkeypatch):
+    # Nothing listens on the discard port, so probes fail straight away
+    monkeypatch.setattr(settings, "chat_service_url", "http://127.0.0.1:9")
+    monkeypatch.setattr(settings, "readiness_required_services", ["chat"])
+    monkeypatch.setattr(settings, "health_check_timeout", 0.5)
+
+
+def test_replicas_are_not_ready_until_probed():
+    replica = Replica("chat", "http://chat:8004")
+    assert not replica.ready
+    assert not ServicePool("chat", ["http://chat:8004"]).ready
+
+
+def test_pick_falls_back_to_unprobed_replicas():
+    pool = ServicePool("chat", ["http://a", "http://b"])
+    assert pool.pick().url in ("http://a", "http://b")
+
+
+def test_readiness_is_starting_until_the_first_probe(unreachable_chat, monkeypatch):
+    monkeypatch.setattr(settings, "health_check_interval", 3600)
+
+    async def main():
+        balancer = LoadBalancer()
+        assert balancer.readiness()["status"] == "starting"
+        await balancer.start()
+        try:
+            assert balancer.readiness()["status"] == "starting"
+            for replica in balancer.pool("chat").replicas:
+                await balancer._probe(replica)
+            balancer._update_readiness()
+            return balancer.readiness()
+        finally:
+            await balancer.close()
+
+    readiness = asyncio.run(main())
+    assert readiness["status"] == "not_ready"
+    assert readiness["services"]["chat"]["probed"]
+    assert not readiness["services"]["chat"]["ready"]
+
+
+def test_replicas_are_assumed_ready_without_health_checks(unreachable_chat, monkeypatch):
+    monkeypatch.setattr(settings, "health_check_interval", 0)
+
+    async def main():
+        balancer = LoadBalancer()
+        await balancer.start()
+        await balancer.close()
+        return balancer.readiness()
+
+    assert asyncio.run(main())["status"] == "ready"
+
+
+def ready_pool(*urls):
+    pool = ServicePool("chat", list(urls))
+    for replica in pool.replicas:
+        replica.ready = True
+    return pool
+
+
+def test_pick_least_outstanding(monkeypatch):
+    monkeypatch.setattr(settings, "load_balancing_strategy", "least_outstanding")
+    pool = ready_pool("http://a", "http://b")
+    pool.replicas[0].outstanding = 2
+    assert pool.pick().url == "http://b"
+    # Already tried replicas are avoided while another is available
+    assert pool.pick(exclude=[pool.replicas[1]]).url == "http://a"
+
+
+def test_pick_ewma_weighs_latency_by_queue(monkeypatch):
+    monkeypatch.setattr(settings, "load_balancing_strategy", "ewma")
+    monkeypatch.setattr(settings, "ewma_decay", 0.5)
+    pool = ready_pool("http://a", "http://b")
+    a, b = pool.replicas
+    a.record_latency(0.1)
+    b.record_latency(0.5)
+    b.record_latency(0.1)
+    assert b.ewma_latency == pytest.approx(0.3)
+    assert pool.pick() is a
+    a.outstanding = 3
+    assert pool.pick() is b
+
+
+def test_ejected_replicas_are_avoided_and_readmitted(monkeypatch):
+    monkeypatch.setattr(settings, "health_check_failure_threshold", 2)
+    monkeypatch.setattr(settings, "health_check_success_threshold", 2)
+    pool = ready_pool("http://a", "http://b")
+    a, b = pool.replicas
+    a.record_failure("down")
+    assert a.healthy
+    a.record_failure("down")
+    assert not a.healthy
+    assert all(pool.pick() is b for _ in range(10))
+    # With every replica ejected, traffic still goes somewhere
+    b.record_failure("down")
+    b.record_failure("down")
+    assert pool.pick() in (a, b)
+    a.record_success()
+    a.record_success()
+    assert a.healthy and pool.pick() is a
+
+
+def test_open_circuits_fail_fast(monkeypatch):
+    monkeypatch.setattr(settings, "circuit_failure_threshold", 1)
+    pool = ready_pool("http://a")
+    pool.replicas[0].breaker.record_failure("boom")
+    with pytest.raises(NoReplicaAvailable):
+        pool.pick()
+    with pytest.raises(NoReplicaAvailable):
+        ServicePool("chat", []).pick()
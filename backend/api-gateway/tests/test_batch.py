@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import jwt
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services.batch import resolve_path
+from app.services.clients import upstream_clients
+
+agent_service = FastAPI()
+
+
+@agent_service.get("/api/v1/slow")
+async def slow():
+    await asyncio.sleep(0.05)
+    return {"done": "slow"}
+
+
+@agent_service.get("/api/v1/fast")
+async def fast():
+    return {"done": "fast"}
+
+
+@agent_service.post("/api/v1/echo")
+async def echo(request: Request):
+    return {"user": request.headers.get("x-internal-identity") is not None, "body": await request.json()}
+
+
+@agent_service.get("/api/v1/big")
+async def big():
+    return {"data": "x" * 1000}
+
+
+@pytest.fixture(scope="module")
+def client():
+    upstream_clients.register_local_app("agent", agent_service, base_path="/api/v1")
+    token = jwt.encode({"sub": "user-1"}, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+    with TestClient(app, headers={"Authorization": f"Bearer {token}"}) as client:
+        yield client
+
+
+@pytest.mark.parametrize(
+    "path, resolved",
+    [
+        ("/chat/chats?page=2", ("chat", "chats", "page=2")),
+        (f"{settings.api_prefix}/chat/chats", ("chat", "chats", "")),
+        ("inference/models", ("inference", "models", "")),
+        ("/nowhere/x", None),
+    ],
+)
+def test_resolve_path(path, resolved):
+    assert resolve_path(path) == resolved
+
+
+def test_batch_returns_results_in_request_order(client):
+    response = client.post(
+        f"{settings.api_prefix}/batch",
+        json={
+            "requests": [
+                {"id": "a", "path": "/agent/slow"},
+                {"path": "/agent/fast"},
+                {"method": "POST", "path": "/agent/echo", "body": {"x": 1}},
+                {"path": "/nowhere"},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    results = response.json()["responses"]
+    assert [(r["id"], r["status"]) for r in results] == [("a", 200), ("1", 200), ("2", 200), ("3", 404)]
+    assert results[0]["body"] == {"done": "slow"}
+    # Sub-requests carry the caller's verified identity
+    assert results[2]["body"] == {"user": True, "body": {"x": 1}}
+
+
+def test_streamed_batch_yields_results_as_they_finish(client):
+    response = client.post(
+        f"{settings.api_prefix}/batch",
+        json={"stream": True, "requests": [{"path": "/agent/slow"}, {"path": "/agent/fast"}]},
+    )
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["body"]["done"] for r in results] == ["fast", "slow"]
+
+
+def test_batch_limits(client, monkeypatch):
+    monkeypatch.setattr(settings, "batch_max_requests", 1)
+    monkeypatch.setattr(settings, "batch_max_response_bytes", 100)
+    too_many = client.post(
+        f"{settings.api_prefix}/batch", json={"requests": [{"path": "/agent/fast"}] * 2}
+    )
+    assert too_many.status_code == 413
+    too_big = client.post(f"{settings.api_prefix}/batch", json={"requests": [{"path": "/agent/big"}]})
+    assert too_big.json()["responses"][0]["status"] == 502
+
+
+@pytest.mark.parametrize("method", ["TRACE", "CONNECT", "OPTIONS", "HEAD"])
+def test_batch_rejects_methods_the_routes_do_not_proxy(client, method):
+    response = client.post(
+        f"{settings.api_prefix}/batch", json={"requests": [{"method": method, "path": "/agent/fast"}]}
+    )
+    result = response.json()["responses"][0]
+    assert result["status"] == 405
+    assert result["headers"]["allow"] == "GET, POST, PUT, PATCH, DELETE"
+    # The same request made directly is rejected by the route
+    assert client.request(method, f"{settings.api_prefix}/agent/fast").status_code == 405
@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import cache as cache_module
+from app.services.cache import CacheEntry, ResponseCache, etag_matches, resource_of
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def entry(body=b"{}", ttl=10, **headers):
+    return CacheEntry(200, {"content-type": "application/json", **headers}, body, ttl)
+
+
+def test_resource_of():
+    assert resource_of("/chats/123/messages") == "chats"
+    assert resource_of("models") == "models"
+
+
+@pytest.mark.parametrize(
+    "if_none_match, matches",
+    [
+        ('"a"', True),
+        ('W/"a"', True),
+        ('"b", "a"', True),
+        ("*", True),
+        ('"b"', False),
+        ("", False),
+        (None, False),
+    ],
+)
+def test_etag_matches_weakly(if_none_match, matches):
+    assert etag_matches(if_none_match, '"a"') is matches
+    assert etag_matches(if_none_match, 'W/"a"') is matches
+
+
+def test_entry_etag_defaults_to_body_hash():
+    assert entry(b"x").etag == entry(b"x").etag != entry(b"y").etag
+    assert entry(etag='"v1"').etag == '"v1"'
+
+
+def test_entry_answers_304_when_client_has_it():
+    cached = entry(b'{"a": 1}')
+    assert cached.to_response(cached.etag).status_code == 304
+    response = cached.to_response('"stale"')
+    assert response.status_code == 200
+    assert response.body == b'{"a": 1}'
+    assert response.headers["etag"] == cached.etag
+
+
+def test_entries_expire(clock):
+    cache = ResponseCache(max_bytes=1000, max_entry_bytes=100)
+    cache.put("k", "chat", "chats", entry(ttl=5))
+    assert cache.get("k") is not None
+    clock.now += 5
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_evicts_least_recently_used_by_size(clock):
+    cache = ResponseCache(max_bytes=10, max_entry_bytes=10)
+    cache.put("a", "chat", "chats", entry(b"aaaa"))
+    cache.put("b", "chat", "folders", entry(b"bbbb"))
+    cache.get("a")
+    cache.put("c", "chat", "tags", entry(b"cccc"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["bytes"] == 8
+
+
+def test_skips_oversized_entries(clock):
+    cache = ResponseCache(max_bytes=100, max_entry_bytes=3)
+    cache.put("a", "chat", "chats", entry(b"aaaa"))
+    assert cache.get("a") is None
+
+
+def test_write_invalidates_the_resource(clock):
+    cache = ResponseCache(max_bytes=1000, max_entry_bytes=100)
+    cache.put("list", "chat", "chats", entry())
+    cache.put("one", "chat", "chats/1", entry())
+    cache.put("folders", "chat", "folders", entry())
+    cache.put("models", "inference", "chats", entry())
+    cache.invalidate("chat", "chats/1")
+    assert cache.get("list") is None and cache.get("one") is None
+    assert cache.get("folders") is not None and cache.get("models") is not None
+    assert cache.stats()["invalidations"] == 2
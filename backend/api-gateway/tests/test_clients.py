@@ -0,0 +1,78 @@
+import asyncio
+
+from app.core.config import settings
+from app.services.clients import UpstreamClients, unix_socket_path
+
+
+def test_clients_are_reused_until_closed():
+    async def main():
+        clients = UpstreamClients()
+        await clients.start()
+        first = clients.get("chat")
+        same = clients.get("chat")
+        await clients.close()
+        return first, same, clients.get("chat")
+
+    first, same, reopened = asyncio.run(main())
+    assert first is same
+    assert first.is_closed
+    assert reopened is not first
+
+
+def test_dedicated_lanes_get_their_own_pool(monkeypatch):
+    monkeypatch.setattr(settings, "priority_dedicated_pools", ["bulk"])
+    clients = UpstreamClients()
+    assert clients.get("retrieval", "bulk") is not clients.get("retrieval")
+    assert clients.get("retrieval", "interactive") is clients.get("retrieval")
+
+
+def test_pool_overrides(monkeypatch):
+    monkeypatch.setattr(settings, "upstream_max_connections", 100)
+    monkeypatch.setattr(settings, "upstream_pool_overrides", {"inference": {"max_connections": 7}})
+    clients = UpstreamClients()
+    assert clients._pool_config("inference")["max_connections"] == 7
+    assert clients._pool_config("chat")["max_connections"] == 100
+
+
+def test_local_apps_share_one_in_process_client():
+    clients = UpstreamClients()
+    clients.register_local_app("chat", object(), base_path="/api/v1/")
+    assert clients.is_local("chat")
+    assert clients.replica_urls("chat") == ["http://chat/api/v1"]
+    assert clients.get("chat", "bulk") is clients.get("chat")
+
+
+def test_unix_socket_path():
+    assert unix_socket_path("unix:/run/chat.sock") == "/run/chat.sock"
+    assert unix_socket_path("unix:///run/chat.sock") == "/run/chat.sock"
+    assert unix_socket_path("http://chat:8004") is None
+
+
+def test_requests_reach_replicas_on_unix_sockets(monkeypatch, tmp_path):
+    path = str(tmp_path / "chat.sock")
+    monkeypatch.setattr(settings, "chat_service_url", f"unix:{path}, http://chat-2:8004")
+
+    async def handle(reader, writer):
+        request_line = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        body = request_line.split(b" ")[1]
+        writer.write(b"HTTP/1.1 200 OK\r\ncontent-length: %d\r\n\r\n%s" % (len(body), body))
+        await writer.drain()
+        writer.close()
+
+    async def main():
+        server = await asyncio.start_unix_server(handle, path)
+        clients = UpstreamClients()
+        try:
+            urls = clients.replica_urls("chat")
+            response = await clients.get("chat").get(f"{urls[0]}/chats")
+            return urls, response.text
+        finally:
+            await clients.close()
+            server.close()
+            await server.wait_closed()
+
+    urls, text = asyncio.run(main())
+    assert urls == ["http://chat-0.sock", "http://chat-2:8004"]
+    assert text == "/chats"
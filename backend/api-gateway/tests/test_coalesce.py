@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.coalesce import SingleFlight
+
+
+def test_enabled_only_for_listed_reads(monkeypatch):
+    monkeypatch.setattr(settings, "coalesce_routes", ["inference:models"])
+    flight = SingleFlight()
+    assert flight.enabled_for("inference", "GET", "/models/")
+    assert flight.enabled_for("inference", "HEAD", "models")
+    assert not flight.enabled_for("inference", "POST", "models")
+    assert not flight.enabled_for("chat", "GET", "chats")
+
+
+def test_concurrent_callers_share_one_call():
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("k", "inference:models", fetch) for _ in range(5)))
+        return flight, results
+
+    flight, results = asyncio.run(main())
+    assert results == [1] * 5
+    assert flight.stats() == {
+        "in_flight": 0,
+        "leaders": 1,
+        "collapsed": 4,
+        "collapsed_by_route": {"inference:models": 4},
+    }
+
+
+def test_errors_reach_every_caller_and_are_not_kept():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("k", "r", fail) for _ in range(3)), return_exceptions=True)
+        return flight, results
+
+    flight, results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_leader_cancel_does_not_fail_followers():
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def main():
+        flight = SingleFlight()
+        leader = asyncio.create_task(flight.do("k", "r", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", "r", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "ok"
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request
+
+from app.core.config import settings
+from app.services.clients import upstream_clients
+from common.utils.deadline import DEADLINE_HEADER
+
+agent_service = FastAPI()
+
+
+@agent_service.get("/api/v1/budget")
+async def budget(request: Request):
+    return {"timeout": request.headers.get(DEADLINE_HEADER)}
+
+
+@agent_service.get("/api/v1/slow")
+async def slow():
+    await asyncio.sleep(1)
+    return {}
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    upstream_clients.register_local_app("agent", agent_service, base_path="/api/v1")
+    monkeypatch.setattr(settings, "route_timeouts", {"agent": 10, "agent:slow": 0.05})
+
+
+def get(gateway, path, **kwargs):
+    async def main():
+        async with gateway() as client:
+            return await client.get(path, **kwargs)
+
+    return asyncio.run(main())
+
+
+def test_route_timeout_is_forwarded_as_a_deadline(agent, gateway):
+    timeout = float(get(gateway, "/agent/budget").json()["timeout"])
+    assert 9000 < timeout <= 10000
+
+
+def test_client_may_only_shorten_the_deadline(agent, gateway):
+    shorter = get(gateway, "/agent/budget", headers={DEADLINE_HEADER: "2000"}).json()["timeout"]
+    longer = get(gateway, "/agent/budget", headers={DEADLINE_HEADER: "60000"}).json()["timeout"]
+    assert float(shorter) <= 2000
+    assert float(longer) <= 10000
+
+
+def test_expired_deadline_is_a_gateway_timeout(agent, gateway):
+    assert get(gateway, "/agent/slow").status_code == 504
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from app.services.clients import upstream_clients
+
+agent_service = FastAPI()
+agent_service.state.stopped = None
+
+
+@agent_service.get("/api/v1/tokens")
+async def tokens():
+    async def generate():
+        try:
+            while True:
+                yield b"data: token\n\n"
+                await asyncio.sleep(0.01)
+        finally:
+            agent_service.state.stopped.set()
+
+    return StreamingResponse(generate(), media_type="text/event-stream")
+
+
+@pytest.fixture
+def agent():
+    upstream_clients.register_local_app("agent", agent_service, base_path="/api/v1")
+
+
+def test_client_disconnect_stops_the_upstream(agent, gateway):
+    async def main():
+        agent_service.state.stopped = asyncio.Event()
+        async with gateway() as client:
+            async with client.stream("GET", "/agent/tokens") as response:
+                await response.aiter_bytes().__anext__()
+            # Leaving the block closes the response, as a client going away would
+            await asyncio.wait_for(agent_service.state.stopped.wait(), 2)
+
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services import hedging as hedging_module
+from app.services.hedging import Hedger, LatencyTracker
+
+ROUTE = "retrieval:vector/search"
+
+
+@pytest.fixture(autouse=True)
+def hedge_settings(monkeypatch):
+    monkeypatch.setattr(settings, "hedge_routes", {ROUTE: 0.9})
+    monkeypatch.setattr(settings, "hedge_min_samples", 10)
+    monkeypatch.setattr(settings, "hedge_min_delay", 0.01)
+    monkeypatch.setattr(settings, "hedge_max_delay", 1.0)
+    monkeypatch.setattr(settings, "hedge_budget_ratio", 0.1)
+    monkeypatch.setattr(settings, "hedge_budget_window", 10)
+
+
+def test_percentile_needs_enough_samples():
+    tracker = LatencyTracker()
+    for i in range(9):
+        tracker.record(i / 100)
+    assert tracker.percentile(0.9) is None
+    tracker.record(0.09)
+    assert tracker.percentile(0.9) == pytest.approx(0.09)
+    assert tracker.percentile(0.5) == pytest.approx(0.05)
+
+
+def test_percentile_refreshes_periodically():
+    tracker = LatencyTracker(refresh_every=5)
+    for _ in range(10):
+        tracker.record(0.1)
+    assert tracker.percentile(0.5) == pytest.approx(0.1)
+    for _ in range(4):
+        tracker.record(0.5)
+    assert tracker.percentile(0.99) == pytest.approx(0.1)
+    tracker.record(0.5)
+    assert tracker.percentile(0.99) == pytest.approx(0.5)
+
+
+def test_route_selection():
+    hedger = Hedger()
+    assert hedger.enabled_for("retrieval", "/vector/search/")
+    assert not hedger.enabled_for("retrieval", "files")
+
+
+def test_delay_is_clamped_percentile():
+    hedger = Hedger()
+    assert hedger.delay(ROUTE) == 1.0
+    for _ in range(10):
+        hedger.record_latency(ROUTE, 0.001)
+    assert hedger.delay(ROUTE) == 0.01
+    for _ in range(100):
+        hedger.record_latency(ROUTE, 5.0)
+    assert hedger.delay(ROUTE) == 1.0
+
+
+def test_budget_caps_hedges(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(hedging_module, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    hedger = Hedger()
+    assert not hedger.try_acquire(ROUTE)
+    for _ in range(20):
+        hedger.record_request(ROUTE)
+    assert [hedger.try_acquire(ROUTE) for _ in range(3)] == [True, True, False]
+    clock.now += 11
+    for _ in range(10):
+        hedger.record_request(ROUTE)
+    assert hedger.try_acquire(ROUTE)
+    assert hedger.stats()["routes"][ROUTE]["hedged"] == 3
+    assert hedger.stats()["budget_denied"] == 2
+
+
+def test_budget_memory_is_bounded_without_hedges(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(hedging_module, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    hedger = Hedger()
+    for _ in range(1000):
+        hedger.record_request(ROUTE)
+        clock.now += 0.1
+    assert len(hedger._requests._seconds) <= settings.hedge_budget_window + 1
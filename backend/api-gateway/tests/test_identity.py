@@ -0,0 +1,68 @@
+import time
+
+import jwt
+import pytest
+
+from app.core.config import settings
+from app.services.identity import InvalidToken, TokenVerifier, bearer_token, identity_header
+from common.auth.identity import IDENTITY_HEADER, verify_identity
+
+
+def token(**claims):
+    return jwt.encode(claims, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+
+
+def test_verifies_once_per_token():
+    verifier = TokenVerifier(max_entries=10)
+    value = token(sub="user-1", exp=int(time.time()) + 60)
+    assert verifier.verify(value)["sub"] == "user-1"
+    assert verifier.verify(value)["sub"] == "user-1"
+    assert (verifier.hits, verifier.misses) == (1, 1)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        token(role="admin"),
+        token(sub="user-1", exp=int(time.time()) - 60),
+        jwt.encode({"sub": "user-1"}, "not-the-secret", algorithm="HS256"),
+        "not-a-jwt",
+    ],
+)
+def test_rejects_invalid_tokens(value):
+    with pytest.raises(InvalidToken):
+        TokenVerifier(max_entries=10).verify(value)
+
+
+def test_cached_token_expires(monkeypatch):
+    verifier = TokenVerifier(max_entries=10)
+    value = token(sub="user-1", exp=int(time.time()) + 60)
+    verifier.verify(value)
+    later = time.time() + 120
+    monkeypatch.setattr(time, "time", lambda: later)
+    # Past its exp the cached entry is dropped and the token decoded again
+    verifier.verify(value)
+    assert (verifier.hits, verifier.misses) == (0, 2)
+
+
+def test_cache_is_bounded():
+    verifier = TokenVerifier(max_entries=2)
+    values = [token(sub=f"user-{i}") for i in range(3)]
+    for value in values:
+        verifier.verify(value)
+    verifier.verify(values[0])
+    assert verifier.misses == 4
+
+
+def test_bearer_token():
+    assert bearer_token("Bearer abc") == "abc"
+    assert bearer_token("bearer abc ") == "abc"
+    assert bearer_token("Basic abc") is None
+    assert bearer_token("Bearer") is None
+    assert bearer_token(None) is None
+
+
+def test_identity_header_is_verifiable():
+    header = identity_header({"sub": "user-1"})
+    claims = verify_identity(header[IDENTITY_HEADER], settings.internal_identity_secret)
+    assert claims["sub"] == "user-1"
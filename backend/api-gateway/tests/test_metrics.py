@@ -0,0 +1,68 @@
+import pytest
+
+from app.services import metrics
+from app.services.metrics import Counter, Gauge, Histogram, Metric, Registry, route_label
+
+
+def test_route_label_uses_the_configured_routes():
+    assert route_label("chat", "chats/0b6f1c3e-1d2a-4c1e-9a57-3f0e5a1d2b44/messages") == "chats"
+    assert route_label("inference", "ollama/chat/completions") == "ollama/chat/completions"
+    assert route_label("inference", "ollama/chat") == "ollama/chat"
+    assert route_label("retrieval", "/vector/search/") == "vector/search"
+
+
+def test_route_label_of_unknown_paths_is_bounded():
+    labels = {route_label("chat", f"random-{i}/path") for i in range(100)}
+    assert labels == {metrics.OTHER_ROUTE}
+    assert route_label("agent", "anything") == metrics.OTHER_ROUTE
+
+
+def test_metric_is_abstract():
+    with pytest.raises(TypeError):
+        Metric("m", "doc")
+
+
+def test_counters_only_go_up():
+    counter = Counter("requests_total", "Requests", ["route"])
+    child = counter.labels("chats")
+    child.inc()
+    child.inc(2)
+    assert not hasattr(child, "set")
+    with pytest.raises(ValueError):
+        child.inc(-1)
+    assert counter.render()[-1] == 'requests_total{route="chats"} 3'
+
+
+def test_advance_follows_a_running_total():
+    child = Counter("events_total", "Events", ["event"]).labels("hits")
+    metrics._advance(child, 5)
+    metrics._advance(child, 5)
+    metrics._advance(child, 7)
+    assert child.value == 7
+
+
+def test_gauges_can_be_set():
+    gauge = Gauge("in_flight", "In flight", ["service"])
+    gauge.labels("chat").set(4)
+    gauge.labels("chat").dec()
+    assert gauge.render() == [
+        "# HELP in_flight In flight",
+        "# TYPE in_flight gauge",
+        'in_flight{service="chat"} 3',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    histogram = registry.register(Histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1.0)))
+    for value in (0.05, 0.5, 5):
+        histogram.labels("chats").observe(value)
+    rendered = registry.render()
+    assert 'latency_seconds_bucket{route="chats",le="0.1"} 1' in rendered
+    assert 'latency_seconds_bucket{route="chats",le="1"} 2' in rendered
+    assert 'latency_seconds_bucket{route="chats",le="+Inf"} 3' in rendered
+    assert 'latency_seconds_count{route="chats"} 3' in rendered
+
+
+def test_render_collects_component_state():
+    assert "gateway_response_cache_events_total" in metrics.render()
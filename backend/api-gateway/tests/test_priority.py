@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.priority import PriorityScheduler
+from app.services.ratelimit import RateLimited
+
+LANES = {
+    "interactive": {"weight": 3},
+    "bulk": {"weight": 1, "max_concurrency": 1, "max_queue": 10, "queue_timeout": 5},
+}
+
+
+def test_classify(monkeypatch):
+    monkeypatch.setattr(settings, "priority_route_lanes", {"retrieval:files/upload": "bulk", "chat:x": "missing"})
+    monkeypatch.setattr(settings, "priority_default_lane", "interactive")
+    scheduler = PriorityScheduler(4, LANES)
+    assert scheduler.classify("retrieval", "files/upload") == "bulk"
+    assert scheduler.classify("chat", "chats") == "interactive"
+    # A route pointing at an unknown lane falls back to the default
+    assert scheduler.classify("chat", "x") == "interactive"
+
+
+def test_disabled_without_capacity():
+    assert asyncio.run(PriorityScheduler(0, LANES).acquire("bulk")) is None
+
+
+def test_lane_cap_holds_back_bulk_only():
+    async def main():
+        scheduler = PriorityScheduler(4, LANES)
+        bulk = await scheduler.acquire("bulk")
+        queued = asyncio.create_task(scheduler.acquire("bulk"))
+        await asyncio.sleep(0)
+        interactive = [await scheduler.acquire("interactive") for _ in range(3)]
+        assert not queued.done()
+        bulk.release()
+        assert (await queued).name == "bulk"
+        for lane in interactive:
+            lane.release()
+        return scheduler.stats()
+
+    stats = asyncio.run(main())
+    assert stats["active"] == 1
+    assert stats["lanes"]["bulk"]["queued_total"] == 1
+
+
+def test_freed_slots_go_to_lanes_by_weight():
+    order = []
+
+    async def queue(scheduler, name):
+        lane = await scheduler.acquire(name)
+        order.append(name)
+        return lane
+
+    async def next_done(tasks):
+        while True:
+            for task in tasks:
+                if task.done():
+                    tasks.remove(task)
+                    return task.result()
+            await asyncio.sleep(0)
+
+    async def main():
+        lanes = {"interactive": {"weight": 3}, "bulk": {"weight": 1}}
+        scheduler = PriorityScheduler(1, lanes)
+        held = await scheduler.acquire("bulk")
+        tasks = [asyncio.create_task(queue(scheduler, "bulk")) for _ in range(4)]
+        tasks += [asyncio.create_task(queue(scheduler, "interactive")) for _ in range(4)]
+        await asyncio.sleep(0)
+        for _ in range(8):
+            held.release()
+            held = await asyncio.wait_for(next_done(tasks), 1)
+        held.release()
+
+    asyncio.run(main())
+    assert order[:4].count("interactive") == 3
+    assert sorted(order) == ["bulk"] * 4 + ["interactive"] * 4
+
+
+def test_full_queue_rejects():
+    lanes = {"bulk": {"max_concurrency": 1, "max_queue": 0, "queue_timeout": 1}}
+
+    async def main():
+        scheduler = PriorityScheduler(4, lanes)
+        await scheduler.acquire("bulk")
+        with pytest.raises(RateLimited):
+            await scheduler.acquire("bulk")
+        return scheduler.stats()["lanes"]["bulk"]["rejected"]
+
+    assert asyncio.run(main()) == 1
+
+
+def test_queue_timeout_rejects():
+    lanes = {"bulk": {"max_concurrency": 1, "max_queue": 5, "queue_timeout": 0.01}}
+
+    async def main():
+        scheduler = PriorityScheduler(4, lanes)
+        await scheduler.acquire("bulk")
+        with pytest.raises(RateLimited):
+            await scheduler.acquire("bulk")
+        return scheduler.lanes["bulk"].to_dict()
+
+    stats = asyncio.run(main())
+    assert stats["queued"] == 0
+    assert stats["rejected"] == 1
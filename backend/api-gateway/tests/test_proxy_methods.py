@@ -0,0 +1,48 @@
+from typing import Optional
+
+import jwt
+import pytest
+from fastapi import FastAPI, Header, Response
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services.clients import upstream_clients
+
+chat_service = FastAPI()
+
+
+@chat_service.get("/ready")
+async def ready():
+    return {"status": "ready"}
+
+
+@chat_service.patch("/api/v1/chats/{chat_id}")
+async def patch_chat(chat_id: str, response: Response, if_match: Optional[str] = Header(None)):
+    if if_match != '"3"':
+        response.status_code = 412
+        response.headers["ETag"] = '"4"'
+        return {"detail": "Chat has changed"}
+    response.headers["ETag"] = '"4"'
+    return {"id": chat_id, "version": 4}
+
+
+@pytest.fixture(scope="module")
+def client():
+    upstream_clients.register_local_app("chat", chat_service, base_path="/api/v1")
+    token = jwt.encode({"sub": "user-1"}, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+    with TestClient(app, headers={"Authorization": f"Bearer {token}"}) as client:
+        yield client
+
+
+def test_patch_reaches_the_service_with_if_match(client):
+    response = client.patch("/api/v1/chat/chats/c1", json=[], headers={"If-Match": '"3"'})
+    assert response.status_code == 200
+    assert response.json() == {"id": "c1", "version": 4}
+    assert response.headers["etag"] == '"4"'
+
+
+def test_patch_precondition_failure_is_relayed(client):
+    response = client.patch("/api/v1/chat/chats/c1", json=[], headers={"If-Match": '"2"'})
+    assert response.status_code == 412
+    assert response.headers["etag"] == '"4"'
@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings, settings
+from app.services.ratelimit import (
+    AdmissionControl,
+    ConcurrencyLimiter,
+    MemoryBucketStore,
+    RateLimited,
+    RateLimiter,
+    SQLiteBucketStore,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        store = SQLiteBucketStore(str(tmp_path / "buckets.db"))
+    else:
+        store = MemoryBucketStore()
+    yield store
+    store.close()
+
+
+def test_bucket_allows_burst_then_waits(store):
+    limits = [("user", 1.0, 2.0)]
+    assert store.take(limits, 100.0) == 0
+    assert store.take(limits, 100.0) == 0
+    assert store.take(limits, 100.0) == pytest.approx(1.0)
+    assert store.take(limits, 101.0) == 0
+
+
+def test_rejection_takes_from_no_bucket(store):
+    user, group = ("user", 1.0, 5.0), ("user|upload", 1.0, 1.0)
+    assert store.take([user, group], 100.0) == 0
+    # The group bucket is empty, so the user bucket must keep its tokens
+    for _ in range(3):
+        assert store.take([user, group], 100.0) > 0
+    for _ in range(4):
+        assert store.take([user], 100.0) == 0
+    assert store.take([user], 100.0) > 0
+
+
+def test_memory_store_drops_idle_buckets(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_idle_expiry", 10)
+    store = MemoryBucketStore()
+    store.take([("a", 1.0, 1.0)], 100.0)
+    store.take([("b", 1.0, 1.0)], 105.0)
+    store.take([("c", 1.0, 1.0)], 112.0)
+    assert list(store._buckets) == ["b", "c"]
+
+
+def test_memory_store_is_bounded():
+    store = MemoryBucketStore(max_buckets=2)
+    for i, key in enumerate("abc"):
+        store.take([(key, 1.0, 1.0)], 100.0 + i)
+    assert list(store._buckets) == ["b", "c"]
+
+
+def test_group_rejection_is_counted(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_store", "memory")
+    monkeypatch.setattr(settings, "rate_limit_route_groups", {"retrieval:files/upload": "upload"})
+    monkeypatch.setattr(settings, "rate_limit_groups", {"upload": {"rate": 0.001, "burst": 1}})
+
+    async def main():
+        limiter = RateLimiter()
+        await limiter.check("user-1", "retrieval", "files/upload")
+        with pytest.raises(RateLimited) as e:
+            await limiter.check("user-1", "retrieval", "files/upload")
+        assert "upload" in e.value.detail
+        # Other routes still have the user's tokens
+        await limiter.check("user-1", "chat", "chats")
+        return limiter.stats()
+
+    assert asyncio.run(main())["rejected_by_group"] == {"upload": 1}
+
+
+def test_sqlite_store_prunes_idle_buckets(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "rate_limit_idle_expiry", 10)
+    store = SQLiteBucketStore(str(tmp_path / "buckets.db"))
+    store.take([("a", 1.0, 1.0)], 100.0)
+    store.take([("b", 1.0, 1.0)], 105.0)
+    store.take([("c", 1.0, 1.0)], 112.0)
+    keys = [row[0] for row in store._conn.execute("SELECT key FROM rate_limit_buckets ORDER BY key")]
+    store.close()
+    assert keys == ["b", "c"]
+
+
+def test_zero_rate_disables_the_limit(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_store", "memory")
+    monkeypatch.setattr(settings, "rate_limit_user_rate", 0)
+    monkeypatch.setattr(settings, "rate_limit_route_groups", {"retrieval": "upload"})
+    monkeypatch.setattr(settings, "rate_limit_groups", {"upload": {"rate": 0, "burst": 0}})
+
+    async def main():
+        limiter = RateLimiter()
+        for _ in range(5):
+            await limiter.check("user-1", "retrieval", "files/upload")
+        return limiter.stats()
+
+    assert asyncio.run(main())["rejected"] == 0
+
+
+@pytest.mark.parametrize("group", [{"rate": 1}, {"rate": 1, "burst": 0.5}, {"rate": 1, "burst": 1, "size": 2}])
+def test_malformed_rate_limit_groups_are_rejected(group):
+    with pytest.raises(ValidationError):
+        Settings(rate_limit_groups={"upload": group})
+
+
+def test_zero_limit_disables_admission_control(monkeypatch):
+    monkeypatch.setattr(settings, "upstream_max_concurrency", 1)
+    monkeypatch.setattr(settings, "upstream_concurrency_overrides", {"inference": 0})
+
+    async def main():
+        admission = AdmissionControl()
+        held = [await admission.acquire("inference") for _ in range(5)]
+        return held, await admission.acquire("chat")
+
+    held, chat = asyncio.run(main())
+    assert held == [None] * 5
+    assert isinstance(chat, ConcurrencyLimiter)
+
+
+def test_override_applies_when_default_is_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "upstream_max_concurrency", 0)
+    monkeypatch.setattr(settings, "upstream_concurrency_overrides", {"inference": 2})
+
+    async def main():
+        admission = AdmissionControl()
+        return await admission.acquire("chat"), await admission.acquire("inference")
+
+    chat, inference = asyncio.run(main())
+    assert chat is None
+    assert inference.limit == 2
+
+
+def test_concurrency_limiter_queues_then_rejects(monkeypatch):
+    monkeypatch.setattr(settings, "admission_max_queue", 1)
+    monkeypatch.setattr(settings, "admission_queue_timeout", 0.5)
+
+    async def main():
+        limiter = ConcurrencyLimiter("chat", 1)
+        await limiter.acquire()
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(RateLimited):
+            await limiter.acquire()
+        limiter.release()
+        await queued
+        assert limiter.active == 1
+        limiter.release()
+        return limiter.to_dict()
+
+    stats = asyncio.run(main())
+    assert stats["active"] == 0
+    assert stats["queued_total"] == 1
+    assert stats["rejected"] == 1
@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services import breaker as breaker_module
+from app.services import retry as retry_module
+from app.services.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.services.retry import RetryBudget
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(breaker_module, "time", SimpleNamespace(monotonic=clock))
+    monkeypatch.setattr(retry_module, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+@pytest.fixture
+def breaker(monkeypatch, clock):
+    monkeypatch.setattr(settings, "circuit_failure_threshold", 3)
+    monkeypatch.setattr(settings, "circuit_reset_timeout", 30)
+    monkeypatch.setattr(settings, "circuit_half_open_max_calls", 1)
+    return CircuitBreaker("chat")
+
+
+def trip(breaker):
+    for _ in range(settings.circuit_failure_threshold):
+        breaker.record_failure("boom")
+
+
+def test_breaker_opens_after_consecutive_failures(breaker):
+    breaker.record_failure("boom")
+    breaker.record_failure("boom")
+    breaker.record_success()
+    breaker.record_failure("boom")
+    assert breaker.state == CLOSED
+    trip(breaker)
+    assert breaker.state == OPEN
+    assert not breaker.available()
+    assert breaker.to_dict()["trips"] == 1
+
+
+def test_breaker_half_opens_after_reset_timeout(breaker, clock):
+    trip(breaker)
+    clock.now += 30
+    assert breaker.available()
+    assert breaker.state == HALF_OPEN
+    breaker.on_request()
+    # Only one trial at a time
+    assert not breaker.available()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.available()
+
+
+def test_failed_trial_reopens(breaker, clock):
+    trip(breaker)
+    clock.now += 30
+    assert breaker.available()
+    breaker.on_request()
+    breaker.record_failure("still down")
+    assert breaker.state == OPEN
+    assert breaker.trips == 2
+    clock.now += 29
+    assert not breaker.available()
+
+
+def test_ignored_trial_frees_its_slot(breaker, clock):
+    trip(breaker)
+    clock.now += 30
+    breaker.available()
+    breaker.on_request()
+    breaker.record_ignored()
+    assert breaker.state == HALF_OPEN
+    assert breaker.available()
+
+
+@pytest.fixture
+def budget(monkeypatch, clock):
+    monkeypatch.setattr(settings, "retry_budget_ratio", 0.5)
+    monkeypatch.setattr(settings, "retry_budget_min_per_second", 0.1)
+    monkeypatch.setattr(settings, "retry_budget_window", 10)
+    return RetryBudget()
+
+
+def test_retry_budget_reserve_without_traffic(budget):
+    # 0.1 per second over 10 seconds
+    assert budget.try_acquire()
+    assert not budget.try_acquire()
+    assert budget.to_dict()["retries_denied"] == 1
+
+
+def test_retry_budget_scales_with_requests(budget):
+    for _ in range(4):
+        budget.record_request()
+    # Reserve of 1 plus half of 4 requests
+    assert [budget.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_retry_budget_window_slides(budget, clock):
+    for _ in range(4):
+        budget.record_request()
+    while budget.try_acquire():
+        pass
+    clock.now += 11
+    assert budget.to_dict()["window_requests"] == 0
+    assert budget.try_acquire()
+
+
+def test_retry_budget_memory_is_bounded_without_retries(budget, clock):
+    # Nothing but requests, and nobody reading the budget
+    for _ in range(1000):
+        budget.record_request()
+        clock.now += 0.1
+    assert len(budget._requests._seconds) <= settings.retry_budget_window + 1
+    assert budget.to_dict()["window_requests"] <= 110
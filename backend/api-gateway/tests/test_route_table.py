@@ -0,0 +1,35 @@
+import pytest
+
+from app.services.route_table import match_route
+
+TABLE = {
+    "chat": "service",
+    "chat:chats": "chats",
+    "chat:chats/archived": "archived",
+    "retrieval:files/": "files",
+}
+
+
+@pytest.mark.parametrize(
+    "service, path, expected",
+    [
+        ("chat", "chats", "chats"),
+        ("chat", "/chats/", "chats"),
+        ("chat", "chats/c1", "chats"),
+        ("chat", "chats/archived/c1", "archived"),
+        # Prefixes stop at segment boundaries
+        ("chat", "chats-export", "service"),
+        ("chat", "chatsX", "service"),
+        ("chat", "chats/archivedX", "chats"),
+        ("retrieval", "files/f1", "files"),
+        ("retrieval", "files", "files"),
+        ("retrieval", "filesystem", None),
+        ("inference", "chats", None),
+    ],
+)
+def test_match_route(service, path, expected):
+    assert match_route(TABLE, service, path) == expected
+
+
+def test_default_when_nothing_matches():
+    assert match_route({}, "chat", "chats", "default") == "default"
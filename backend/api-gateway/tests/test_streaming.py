@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from app.services.clients import upstream_clients
+
+agent_service = FastAPI()
+# Set by the test once the first event has reached the client
+first_event_received = asyncio.Event()
+
+
+@agent_service.get("/api/v1/events")
+async def events():
+    async def stream():
+        yield b"data: one\n\n"
+        # Only continues once the client has the first event, so a gateway
+        # that buffered the response would never deliver it
+        await first_event_received.wait()
+        yield b"data: two\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+@pytest.fixture
+def agent():
+    upstream_clients.register_local_app("agent", agent_service, base_path="/api/v1")
+
+
+def test_events_reach_the_client_as_they_are_sent(agent, gateway):
+    async def main():
+        first_event_received.clear()
+        async with gateway() as client:
+            async with client.stream("GET", "/agent/events") as response:
+                assert response.headers["content-type"].startswith("text/event-stream")
+                chunks = response.aiter_bytes()
+                first = await asyncio.wait_for(chunks.__anext__(), 2)
+                first_event_received.set()
+                rest = b"".join([chunk async for chunk in chunks])
+                return first + rest
+
+    assert asyncio.run(main()) == b"data: one\n\ndata: two\n\n"
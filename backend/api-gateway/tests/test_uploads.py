@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request
+
+from app.core.config import settings
+from app.services.clients import upstream_clients
+
+agent_service = FastAPI()
+
+
+@agent_service.post("/api/v1/upload")
+async def upload(request: Request):
+    chunks = [len(chunk) async for chunk in request.stream() if chunk]
+    return {"bytes": sum(chunks), "chunks": len(chunks)}
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    upstream_clients.register_local_app("agent", agent_service, base_path="/api/v1")
+    monkeypatch.setattr(settings, "max_request_body_size", 1000)
+
+
+def body(chunks, size):
+    async def stream():
+        for _ in range(chunks):
+            yield b"x" * size
+
+    return stream()
+
+
+def upload(gateway, **kwargs):
+    async def main():
+        async with gateway() as client:
+            return await client.post("/agent/upload", **kwargs)
+
+    return asyncio.run(main())
+
+
+def test_streamed_body_is_forwarded_in_chunks(agent, gateway):
+    response = upload(gateway, content=body(4, 100))
+    assert response.status_code == 200
+    assert response.json() == {"bytes": 400, "chunks": 4}
+
+
+def test_declared_oversized_body_is_rejected_up_front(agent, gateway):
+    assert upload(gateway, content=b"x" * 1001).status_code == 413
+
+
+def test_streamed_oversized_body_is_cut_off(agent, gateway):
+    assert upload(gateway, content=body(11, 100)).status_code == 413
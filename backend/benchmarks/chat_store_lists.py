@@ -0,0 +1,155 @@
+"""
+Benchmark listings of the in-memory chat store as the total amount of data grows.
+
+Fills a MemoryChatStore with one user of fixed size plus a growing number of
+other users' chats, messages, folders and tags, then times that user's
+listings through the store's secondary indexes and through a full scan of the
+store (filter and sort, as the service did before the indexes). Indexed
+latency should stay flat while the scan grows with the store.
+
+Usage:
+    python backend/benchmarks/chat_store_lists.py [--sizes 1000,10000,100000]
+                                                  [--messages-per-chat 4]
+                                                  [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BACKEND, "chat-service"), BACKEND]
+
+from app.db.memory import MemoryChatStore  # noqa: E402
+
+USER = "bench-user"
+USER_CHATS = 200
+USER_MESSAGES = 50
+# Folders and tags each
+USER_NAMED = 20
+OTHER_USERS = 1000
+
+
+def fill_user(store: MemoryChatStore, user_id: str, chats: int, messages_per_chat: int, start: datetime) -> str:
+    """
+    Add chats with messages for a user; returns the id of the newest chat
+    """
+    chat_id = ""
+    for i in range(chats):
+        at = start + timedelta(seconds=i)
+        chat_id = str(uuid.uuid4())
+        store.insert_chat({
+            "id": chat_id, "user_id": user_id, "title": f"chat {i}", "messages": [], "models": [],
+            "system": None, "tags": [f"tag {i % 5}"], "created_at": at, "updated_at": at,
+            "share_id": None, "archived": False, "pinned": False, "folder_id": None,
+        })
+        for j in range(messages_per_chat):
+            store.insert_message({
+                "id": str(uuid.uuid4()), "user_id": user_id, "chat_id": chat_id, "content": "hello",
+                "role": "user", "parent_id": None, "model": None, "metadata": {},
+                "created_at": at + timedelta(milliseconds=j), "updated_at": at,
+            })
+    return chat_id
+
+
+def fill_named(store: MemoryChatStore, user_id: str, count: int, start: datetime) -> None:
+    """
+    Add count folders and count tags for a user
+    """
+    for i in range(count):
+        store.insert_folder({
+            "id": str(uuid.uuid4()), "user_id": user_id, "name": f"folder {i}", "description": None,
+            "created_at": start, "updated_at": start,
+        })
+        store.insert_tag({
+            "id": str(uuid.uuid4()), "user_id": user_id, "name": f"tag {i}", "color": "#808080",
+            "created_at": start, "updated_at": start,
+        })
+
+
+def scan_chats(store: MemoryChatStore, user_id: str, limit: int) -> List[Dict]:
+    chats = [c for c in store.chats.values() if c["user_id"] == user_id and not c["archived"]]
+    chats.sort(key=lambda c: (c["updated_at"], c["id"]), reverse=True)
+    return chats[:limit]
+
+
+def scan_messages(store: MemoryChatStore, chat_id: str, user_id: str) -> List[Dict]:
+    messages = [m for m in store.messages.values() if m["chat_id"] == chat_id and m["user_id"] == user_id]
+    messages.sort(key=lambda m: m["created_at"])
+    return messages
+
+
+def scan_named(table: Dict[str, Dict], user_id: str) -> List[Dict]:
+    records = [r for r in table.values() if r["user_id"] == user_id]
+    records.sort(key=lambda r: r["name"])
+    return records
+
+
+def timed(fn: Callable[[], object], repeat: int) -> float:
+    """
+    Mean microseconds per call
+    """
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Total chats of other users")
+    parser.add_argument("--messages-per-chat", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    start = datetime(2024, 1, 1)
+    print(f"{'chats':>8}{'messages':>10}  {'listing':<10}{'indexed us':>12}{'scan us':>12}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        store = MemoryChatStore()
+        chat_id = fill_user(store, USER, USER_CHATS, 0, start)
+        for j in range(USER_MESSAGES):
+            store.insert_message({
+                "id": str(uuid.uuid4()), "user_id": USER, "chat_id": chat_id, "content": "hello",
+                "role": "user", "parent_id": None, "model": None, "metadata": {},
+                "created_at": start + timedelta(milliseconds=j), "updated_at": start,
+            })
+        fill_named(store, USER, USER_NAMED, start)
+        per_user = max(1, size // OTHER_USERS)
+        for user in range(OTHER_USERS):
+            if user * per_user >= size:
+                break
+            fill_user(store, f"user-{user}", per_user, args.messages_per_chat, start)
+            fill_named(store, f"user-{user}", max(1, per_user // 10), start)
+
+        # Pagination over 50 chats is what the sidebar asks for
+        listings = {
+            "chats": (
+                lambda: store.list_chats(USER, False, 50),
+                lambda: scan_chats(store, USER, 50),
+            ),
+            "messages": (
+                lambda: store.list_messages(chat_id, USER),
+                lambda: scan_messages(store, chat_id, USER),
+            ),
+            "folders": (
+                lambda: store.list_folders(USER),
+                lambda: scan_named(store.folders, USER),
+            ),
+            "tags": (
+                lambda: store.list_tags(USER),
+                lambda: scan_named(store.tags, USER),
+            ),
+        }
+        for name, (indexed, scan) in listings.items():
+            assert [r["id"] for r in indexed()] == [r["id"] for r in scan()], name
+            print(
+                f"{len(store.chats):>8}{len(store.messages):>10}  {name:<10}"
+                f"{timed(indexed, args.repeat):>12.1f}{timed(scan, max(1, args.repeat // 20)):>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
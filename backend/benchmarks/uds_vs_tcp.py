@@ -0,0 +1,147 @@
+"""
+Benchmark gateway-to-service calls over a Unix domain socket against TCP loopback.
+
+Starts a small service app twice with uvicorn, once on 127.0.0.1 and once on
+a Unix socket, and drives both with a pooled httpx client configured like the
+gateway's upstream clients. Reports throughput and latency percentiles for
+each transport.
+
+Usage:
+    python backend/benchmarks/uds_vs_tcp.py [--requests 20000] [--concurrency 64]
+                                            [--payload-bytes 2048]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+
+def make_app(payload_bytes: int):
+    from fastapi import FastAPI
+    from fastapi.responses import Response
+
+    app = FastAPI()
+    body = b'{"chats": "' + b"x" * max(0, payload_bytes - 13) + b'"}'
+
+    @app.get("/api/v1/chats/")
+    async def list_chats():
+        return Response(content=body, media_type="application/json")
+
+    return app
+
+
+def run_server(payload_bytes: int, port: int, uds: str) -> None:
+    import uvicorn
+
+    app = make_app(payload_bytes)
+    if uds:
+        uvicorn.run(app, uds=uds, log_level="warning", access_log=False)
+    else:
+        uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_up(client: httpx.AsyncClient, url: str) -> None:
+    for _ in range(100):
+        try:
+            await client.get(url)
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not come up")
+
+
+async def drive(client: httpx.AsyncClient, url: str, requests: int, concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await client.get(url)
+            await response.aread()
+            latencies.append(time.perf_counter() - started)
+
+    # Warm up the pool before measuring
+    await asyncio.gather(*(client.get(url) for _ in range(concurrency)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+    }
+
+
+async def bench(transport: str, args: argparse.Namespace) -> Dict[str, float]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    uds = ""
+    port = 0
+    if transport == "uds":
+        uds = os.path.join(tempfile.mkdtemp(), "service.sock")
+        base_url = "http://chat-0.sock"
+        client = httpx.AsyncClient(
+            limits=limits,
+            mounts={base_url: httpx.AsyncHTTPTransport(uds=uds, limits=limits)},
+        )
+    else:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        client = httpx.AsyncClient(limits=limits)
+
+    server = multiprocessing.Process(target=run_server, args=(args.payload_bytes, port, uds), daemon=True)
+    server.start()
+    try:
+        url = f"{base_url}/api/v1/chats/"
+        async with client:
+            await wait_until_up(client, url)
+            return await drive(client, url, args.requests, args.concurrency)
+    finally:
+        server.terminate()
+        server.join()
+        if uds and os.path.exists(uds):
+            os.unlink(uds)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--payload-bytes", type=int, default=2048)
+    args = parser.parse_args()
+
+    results = {}
+    for transport in ("tcp", "uds"):
+        results[transport] = await bench(transport, args)
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.payload_bytes} byte responses")
+    print(f"{'transport':<10}{'req/s':>10}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for transport, stats in results.items():
+        print(
+            f"{transport:<10}{stats['rps']:>10.0f}{stats['mean_ms']:>10.2f}"
+            f"{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+        )
+    print(f"uds/tcp throughput: {results['uds']['rps'] / results['tcp']['rps']:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
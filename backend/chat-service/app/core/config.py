@@ -15,6 +15,13 @@ class Settings(BaseSettings):
     # Database settings
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./webui.db")
     database_pool_size: int = int(os.getenv("DATABASE_POOL_SIZE", "0"))
+    # "sql" stores chats in the database above, shared by all workers; "memory"
+    # keeps them in this process only (development and tests)
+    chat_store: str = os.getenv("CHAT_STORE", "sql")
+    # Changes kept per chat for clients catching up with GET /chats/{id}/changes
+    chat_change_log_size: int = int(os.getenv("CHAT_CHANGE_LOG_SIZE", "1000"))
+    # Largest page GET /chats will return
+    chat_list_max_limit: int = int(os.getenv("CHAT_LIST_MAX_LIMIT", "100"))
     
     # Chat settings
     enable_chat_history: bool = True
@@ -27,6 +34,11 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     jwt_expires_in: int = int(os.getenv("JWT_EXPIRES_IN", "30"))  # days
     
+    # Shared secret for the identity header signed by the gateway
+    internal_identity_secret: str = os.getenv(
+        "INTERNAL_IDENTITY_SECRET", os.getenv("JWT_SECRET_KEY", "your-secret-key")
+    )
+    
     class Config:
         env_file = ".env"
 
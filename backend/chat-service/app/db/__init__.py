@@ -0,0 +1,59 @@
+import asyncio
+import logging
+from typing import Any, Callable, TypeVar
+
+from app.core.config import settings
+from app.core.readiness import readiness
+from app.db.memory import MemoryChatStore
+from app.db.sql import SQLChatStore
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_store = None
+
+
+def get_store():
+    """
+    The chat store selected by settings.chat_store, created on first use
+    """
+    global _store
+    if _store is None:
+        if settings.chat_store == "sql":
+            _store = SQLChatStore()
+        else:
+            _store = MemoryChatStore()
+    return _store
+
+
+async def run(method: Callable[..., T], *args: Any) -> T:
+    """
+    Call a store method, on a worker thread if the store blocks on I/O
+    """
+    if getattr(method.__self__, "blocking", False):
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
+
+
+async def open_store() -> None:
+    """
+    Create the store (and its tables) at startup rather than on the first request
+    """
+    await asyncio.to_thread(get_store)
+
+
+async def close_store() -> None:
+    global _store
+    if _store is not None:
+        await asyncio.to_thread(_store.close)
+        _store = None
+
+
+async def database_reachable() -> bool:
+    return await run(get_store().ping)
+
+
+readiness.component("database", database_reachable)
+
+__all__ = ["get_store", "run", "open_store", "close_store", "MemoryChatStore", "SQLChatStore"]
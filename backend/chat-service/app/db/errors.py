@@ -0,0 +1,8 @@
+class VersionConflict(Exception):
+    """
+    Raised when a write names a chat version that is no longer current
+    """
+
+    def __init__(self, version: int):
+        super().__init__(f"Chat has changed; the current version is {version}")
+        self.version = version
@@ -0,0 +1,342 @@
+from bisect import bisect_left, insort
+from collections import deque
+from datetime import datetime
+from typing import Any, Collection, Deque, Dict, Hashable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.db.errors import VersionConflict
+from app.db.patch import Operation, apply_patch, chat_document, replace_operations
+
+Record = Dict[str, Any]
+
+# Sort position of a record: (timestamp, id)
+Position = Tuple[datetime, str]
+
+
+class SortedIndex:
+    """
+    Record ids grouped by key, each group kept sorted by (timestamp, id) so a
+    page is found by bisection instead of a scan
+    """
+
+    def __init__(self):
+        self._groups: Dict[Hashable, List[Position]] = {}
+
+    def add(self, key: Hashable, position: Position) -> None:
+        insort(self._groups.setdefault(key, []), position)
+
+    def remove(self, key: Hashable, position: Position) -> None:
+        group = self._groups.get(key)
+        if not group:
+            return
+        index = bisect_left(group, position)
+        if index < len(group) and group[index] == position:
+            del group[index]
+        if not group:
+            del self._groups[key]
+
+    def oldest(self, key: Hashable) -> List[str]:
+        return [item_id for _, item_id in self._groups.get(key, [])]
+
+    def newest(self, key: Hashable, limit: int, after: Optional[Position] = None, offset: int = 0) -> List[str]:
+        """
+        Up to limit ids, newest first, strictly older than after
+        """
+        group = self._groups.get(key, [])
+        end = bisect_left(group, after) if after is not None else len(group)
+        end = max(0, end - offset)
+        start = max(0, end - limit)
+        return [item_id for _, item_id in reversed(group[start:end])]
+
+
+class MemoryChatStore:
+    """
+    Chats, messages, folders and tags held in this process, with secondary
+    indexes kept up to date on every write so listings cost the size of the
+    result rather than of the store
+    """
+
+    # Every operation is a dict lookup, so it runs on the event loop
+    blocking = False
+
+    def __init__(self):
+        self.chats: Dict[str, Record] = {}
+        self.messages: Dict[str, Record] = {}
+        self.folders: Dict[str, Record] = {}
+        self.tags: Dict[str, Record] = {}
+        # chat_id -> the latest changes, as JSON Patch operations per version
+        self.changes: Dict[str, Deque[Record]] = {}
+
+        # (user_id, archived) -> chats by updated_at, and the same per folder and per tag
+        self.chats_by_user = SortedIndex()
+        self.chats_by_folder = SortedIndex()
+        self.chats_by_tag = SortedIndex()
+        # chat_id -> messages by created_at
+        self.messages_by_chat = SortedIndex()
+        # user_id -> folder and tag ids
+        self.folders_by_user: Dict[str, Set[str]] = {}
+        self.tags_by_user: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def _owned(table: Dict[str, Record], record_id: str, user_id: str) -> Optional[Record]:
+        record = table.get(record_id)
+        if record is None or record["user_id"] != user_id:
+            return None
+        return record
+
+    def _get(self, table: Dict[str, Record], record_id: str, user_id: str) -> Optional[Record]:
+        record = self._owned(table, record_id, user_id)
+        return dict(record) if record is not None else None
+
+    def _update(self, table: Dict[str, Record], record_id: str, user_id: str, fields: Record) -> Optional[Record]:
+        record = self._owned(table, record_id, user_id)
+        if record is None:
+            return None
+        record.update(fields)
+        return dict(record)
+
+    def _delete(self, table: Dict[str, Record], record_id: str, user_id: str) -> bool:
+        if self._owned(table, record_id, user_id) is None:
+            return False
+        del table[record_id]
+        return True
+
+    # Chats
+
+    def _chat_entries(self, chat: Record) -> List[Tuple[SortedIndex, Hashable]]:
+        user_id, archived = chat["user_id"], chat["archived"]
+        entries = [(self.chats_by_user, (user_id, archived))]
+        if chat["folder_id"] is not None:
+            entries.append((self.chats_by_folder, (user_id, chat["folder_id"], archived)))
+        for tag in set(chat["tags"] or []):
+            entries.append((self.chats_by_tag, (user_id, tag, archived)))
+        return entries
+
+    def _index_chat(self, chat: Record) -> None:
+        for index, key in self._chat_entries(chat):
+            index.add(key, (chat["updated_at"], chat["id"]))
+
+    def _unindex_chat(self, chat: Record) -> None:
+        for index, key in self._chat_entries(chat):
+            index.remove(key, (chat["updated_at"], chat["id"]))
+
+    def insert_chat(self, record: Record) -> None:
+        # Its own list, since appends extend it in place
+        chat = {**record, "messages": list(record["messages"])}
+        self.chats[chat["id"]] = chat
+        self._index_chat(chat)
+
+    def get_chat(self, chat_id: str, user_id: str) -> Optional[Record]:
+        return self._get(self.chats, chat_id, user_id)
+
+    def _write_chat(
+        self,
+        chat_id: str,
+        user_id: str,
+        fields: Record,
+        expected_version: Optional[int],
+        operations: List[Operation],
+    ) -> Optional[Record]:
+        chat = self._owned(self.chats, chat_id, user_id)
+        if chat is None:
+            return None
+        if expected_version is not None and chat["version"] != expected_version:
+            raise VersionConflict(chat["version"])
+        self._unindex_chat(chat)
+        chat.update(fields)
+        chat["version"] += 1
+        self._index_chat(chat)
+        changes = self.changes.setdefault(chat_id, deque(maxlen=settings.chat_change_log_size))
+        changes.append({
+            "chat_id": chat_id,
+            "version": chat["version"],
+            "operations": operations,
+            "updated_at": chat["updated_at"],
+        })
+        return chat
+
+    def update_chat(
+        self,
+        chat_id: str,
+        user_id: str,
+        fields: Record,
+        expected_version: Optional[int] = None,
+    ) -> Optional[Record]:
+        if "messages" in fields:
+            fields = {**fields, "messages": list(fields["messages"])}
+        chat = self._write_chat(chat_id, user_id, fields, expected_version, replace_operations(fields))
+        return dict(chat) if chat is not None else None
+
+    def append_chat_messages(
+        self,
+        chat_id: str,
+        user_id: str,
+        messages: List[Record],
+        fields: Record,
+        expected_version: Optional[int] = None,
+    ) -> Optional[Record]:
+        operations = [{"op": "add", "path": "/messages/-", "value": message} for message in messages]
+        chat = self._write_chat(
+            chat_id, user_id, fields, expected_version, operations + replace_operations(fields)
+        )
+        if chat is None:
+            return None
+        chat["messages"].extend(messages)
+        return dict(chat)
+
+    def update_chat_message(
+        self,
+        chat_id: str,
+        user_id: str,
+        message_id: str,
+        message: Record,
+        fields: Record,
+        expected_version: Optional[int] = None,
+    ) -> Optional[Record]:
+        chat = self._owned(self.chats, chat_id, user_id)
+        if chat is None:
+            return None
+        position = next(
+            (i for i, existing in enumerate(chat["messages"]) if existing.get("id") == message_id), None
+        )
+        if position is None:
+            return None
+        operations = [{"op": "replace", "path": f"/messages/{position}", "value": message}]
+        chat = self._write_chat(
+            chat_id, user_id, fields, expected_version, operations + replace_operations(fields)
+        )
+        chat["messages"][position] = message
+        return dict(chat)
+
+    def patch_chat(
+        self,
+        chat_id: str,
+        user_id: str,
+        operations: List[Operation],
+        fields: Record,
+        expected_versions: Optional[Collection[int]] = None,
+    ) -> Optional[Record]:
+        chat = self._owned(self.chats, chat_id, user_id)
+        if chat is None:
+            return None
+        if expected_versions is not None and chat["version"] not in expected_versions:
+            raise VersionConflict(chat["version"])
+        document = apply_patch(chat_document(chat), operations)
+        changed = {key: value for key, value in document.items() if value != chat[key]}
+        chat = self._write_chat(
+            chat_id, user_id, {**changed, **fields}, None, operations + replace_operations(fields)
+        )
+        return dict(chat)
+
+    def list_chat_changes(self, chat_id: str, user_id: str, since: int) -> Optional[Tuple[int, List[Record]]]:
+        chat = self._owned(self.chats, chat_id, user_id)
+        if chat is None:
+            return None
+        changes = [dict(change) for change in self.changes.get(chat_id, ()) if change["version"] > since]
+        return chat["version"], changes
+
+    def delete_chat(self, chat_id: str, user_id: str) -> bool:
+        chat = self._owned(self.chats, chat_id, user_id)
+        if chat is None:
+            return False
+        self._unindex_chat(chat)
+        del self.chats[chat_id]
+        self.changes.pop(chat_id, None)
+        return True
+
+    def list_chats(
+        self,
+        user_id: str,
+        archived: bool,
+        limit: int,
+        after: Optional[Position] = None,
+        offset: int = 0,
+        folder_id: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> List[Record]:
+        if tag is not None:
+            index, key = self.chats_by_tag, (user_id, tag, archived)
+        elif folder_id is not None:
+            index, key = self.chats_by_folder, (user_id, folder_id, archived)
+        else:
+            index, key = self.chats_by_user, (user_id, archived)
+        return [dict(self.chats[chat_id]) for chat_id in index.newest(key, limit, after, offset)]
+
+    # Messages
+
+    def insert_message(self, record: Record) -> None:
+        self.messages[record["id"]] = {**record, "children_ids": []}
+        self.messages_by_chat.add(record["chat_id"], (record["created_at"], record["id"]))
+        parent = self.messages.get(record["parent_id"]) if record["parent_id"] else None
+        if parent is not None:
+            parent["children_ids"].append(record["id"])
+
+    def get_message(self, message_id: str, user_id: str) -> Optional[Record]:
+        return self._get(self.messages, message_id, user_id)
+
+    def delete_message(self, message_id: str, user_id: str) -> bool:
+        message = self._owned(self.messages, message_id, user_id)
+        if message is None:
+            return False
+        parent = self.messages.get(message["parent_id"]) if message["parent_id"] else None
+        if parent is not None and message_id in parent["children_ids"]:
+            parent["children_ids"].remove(message_id)
+        self.messages_by_chat.remove(message["chat_id"], (message["created_at"], message_id))
+        del self.messages[message_id]
+        return True
+
+    def list_messages(self, chat_id: str, user_id: str) -> List[Record]:
+        messages = (self.messages[message_id] for message_id in self.messages_by_chat.oldest(chat_id))
+        return [dict(message) for message in messages if message["user_id"] == user_id]
+
+    # Folders
+
+    def insert_folder(self, record: Record) -> None:
+        self.folders[record["id"]] = dict(record)
+        self.folders_by_user.setdefault(record["user_id"], set()).add(record["id"])
+
+    def get_folder(self, folder_id: str, user_id: str) -> Optional[Record]:
+        return self._get(self.folders, folder_id, user_id)
+
+    def update_folder(self, folder_id: str, user_id: str, fields: Record) -> Optional[Record]:
+        return self._update(self.folders, folder_id, user_id, fields)
+
+    def delete_folder(self, folder_id: str, user_id: str) -> bool:
+        if not self._delete(self.folders, folder_id, user_id):
+            return False
+        self.folders_by_user[user_id].discard(folder_id)
+        return True
+
+    def list_folders(self, user_id: str) -> List[Record]:
+        folders = [dict(self.folders[folder_id]) for folder_id in self.folders_by_user.get(user_id, ())]
+        folders.sort(key=lambda folder: folder["name"])
+        return folders
+
+    # Tags
+
+    def insert_tag(self, record: Record) -> None:
+        self.tags[record["id"]] = dict(record)
+        self.tags_by_user.setdefault(record["user_id"], set()).add(record["id"])
+
+    def get_tag(self, tag_id: str, user_id: str) -> Optional[Record]:
+        return self._get(self.tags, tag_id, user_id)
+
+    def update_tag(self, tag_id: str, user_id: str, fields: Record) -> Optional[Record]:
+        return self._update(self.tags, tag_id, user_id, fields)
+
+    def delete_tag(self, tag_id: str, user_id: str) -> bool:
+        if not self._delete(self.tags, tag_id, user_id):
+            return False
+        self.tags_by_user[user_id].discard(tag_id)
+        return True
+
+    def list_tags(self, user_id: str) -> List[Record]:
+        tags = [dict(self.tags[tag_id]) for tag_id in self.tags_by_user.get(user_id, ())]
+        tags.sort(key=lambda tag: tag["name"])
+        return tags
+
+    def ping(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        pass
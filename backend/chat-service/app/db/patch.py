@@ -0,0 +1,175 @@
+import copy
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+Operation = Dict[str, Any]
+
+# Fields of a chat that clients may change, with the JSON types they must keep
+PATCHABLE_FIELDS: Dict[str, Tuple[type, ...]] = {
+    "title": (str,),
+    "models": (list,),
+    "system": (str, type(None)),
+    "tags": (list, type(None)),
+    "messages": (list,),
+    "archived": (bool,),
+    "pinned": (bool,),
+    "folder_id": (str, type(None)),
+}
+
+
+class PatchError(ValueError):
+    """
+    Raised for a JSON Patch that is malformed or cannot be applied to the chat
+    """
+    pass
+
+
+class PatchTestFailed(PatchError):
+    """
+    Raised when a "test" operation does not match, i.e. the chat has changed
+    """
+    pass
+
+
+def chat_document(chat: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The part of a chat record that JSON Patch paths address
+    """
+    return {field: chat[field] for field in PATCHABLE_FIELDS}
+
+
+def _jsonable(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def replace_operations(fields: Dict[str, Any]) -> List[Operation]:
+    """
+    Change log entry for a plain field update. Only fields of the chat
+    document are logged, so a client can apply every entry as a JSON Patch;
+    metadata such as updated_at or share_id changes the version but no path.
+    """
+    return [
+        {"op": "replace", "path": f"/{key}", "value": _jsonable(value)}
+        for key, value in fields.items()
+        if key in PATCHABLE_FIELDS
+    ]
+
+
+def _parse_pointer(pointer: Any) -> List[str]:
+    # RFC 6901: "/a/b~1c" -> ["a", "b/c"]
+    if not isinstance(pointer, str) or not pointer.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer: {pointer!r}")
+    tokens = [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+    if tokens[0] not in PATCHABLE_FIELDS:
+        raise PatchError(f"Path {pointer} cannot be patched")
+    return tokens
+
+
+def _index(container: list, token: str, pointer: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise PatchError(f"Invalid array index in {pointer}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"Array index out of range in {pointer}")
+    return index
+
+
+def _parent(document: Dict[str, Any], tokens: List[str], pointer: str) -> Any:
+    target: Any = document
+    for token in tokens[:-1]:
+        if isinstance(target, dict) and token in target:
+            target = target[token]
+        elif isinstance(target, list):
+            target = target[_index(target, token, pointer)]
+        else:
+            raise PatchError(f"Path {pointer} does not exist")
+    return target
+
+
+def _get(document: Dict[str, Any], pointer: str) -> Any:
+    tokens = _parse_pointer(pointer)
+    parent = _parent(document, tokens, pointer)
+    token = tokens[-1]
+    if isinstance(parent, dict) and token in parent:
+        return parent[token]
+    if isinstance(parent, list):
+        return parent[_index(parent, token, pointer)]
+    raise PatchError(f"Path {pointer} does not exist")
+
+
+def _add(document: Dict[str, Any], pointer: str, value: Any) -> None:
+    tokens = _parse_pointer(pointer)
+    if len(tokens) == 1:
+        document[tokens[0]] = value
+        return
+    parent = _parent(document, tokens, pointer)
+    if isinstance(parent, dict):
+        parent[tokens[-1]] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, tokens[-1], pointer, allow_end=True), value)
+    else:
+        raise PatchError(f"Path {pointer} does not exist")
+
+
+def _remove(document: Dict[str, Any], pointer: str) -> Any:
+    tokens = _parse_pointer(pointer)
+    if len(tokens) == 1:
+        raise PatchError(f"Field {pointer} cannot be removed")
+    parent = _parent(document, tokens, pointer)
+    token = tokens[-1]
+    if isinstance(parent, dict) and token in parent:
+        return parent.pop(token)
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, token, pointer))
+    raise PatchError(f"Path {pointer} does not exist")
+
+
+def apply_patch(document: Dict[str, Any], operations: List[Operation]) -> Dict[str, Any]:
+    """
+    Apply an RFC 6902 JSON Patch to a chat document, returning a new document.
+    The patch applies atomically: on any error the original is untouched.
+    """
+    document = copy.deepcopy(document)
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise PatchError("Each operation must be an object")
+        op = operation.get("op")
+        path = operation.get("path")
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise PatchError(f"Operation {op} needs a value")
+
+        if op == "add":
+            _add(document, path, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            _remove(document, path)
+        elif op == "replace":
+            _get(document, path)
+            tokens = _parse_pointer(path)
+            if len(tokens) == 1:
+                document[tokens[0]] = copy.deepcopy(operation["value"])
+            else:
+                _remove(document, path)
+                _add(document, path, copy.deepcopy(operation["value"]))
+        elif op == "move":
+            source = operation.get("from")
+            if isinstance(source, str) and isinstance(path, str) and path.startswith(source + "/"):
+                raise PatchError(f"Cannot move {source} into itself")
+            _add(document, path, _remove(document, source))
+        elif op == "copy":
+            _add(document, path, copy.deepcopy(_get(document, operation.get("from"))))
+        elif op == "test":
+            if _get(document, path) != operation["value"]:
+                raise PatchTestFailed(f"Test failed at {path}")
+        else:
+            raise PatchError(f"Unknown operation {op!r}")
+
+    for field, types in PATCHABLE_FIELDS.items():
+        if not isinstance(document.get(field), types):
+            raise PatchError(f"Field {field} has the wrong type")
+    if not all(isinstance(message, dict) for message in document["messages"]):
+        raise PatchError("Messages must be objects")
+    if not all(isinstance(tag, str) for tag in document["tags"] or []):
+        raise PatchError("Tags must be strings")
+    return document
@@ -0,0 +1,459 @@
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Collection, Dict, List, Optional, Tuple, Type
+
+from sqlalchemy import and_, delete, inspect, or_, select, text, update
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.db.errors import VersionConflict
+from app.db.patch import Operation, apply_patch, chat_document, replace_operations
+from app.db.tables import Chat, ChatChange, ChatMessage, ChatTag, Folder, Message, Tag
+from common.db import Base, engine, get_db
+
+logger = logging.getLogger(__name__)
+
+Record = Dict[str, Any]
+
+
+def to_record(row: Base) -> Record:
+    """
+    A row as a dict keyed by column name, the shape the services work with
+    """
+    return {attr.columns[0].name: getattr(row, attr.key) for attr in inspect(row).mapper.column_attrs}
+
+
+def to_attributes(table: Type[Base], record: Record) -> Record:
+    """
+    Column values keyed by mapped attribute name ("metadata" is reserved on models)
+    """
+    return {
+        attr.key: record[attr.columns[0].name]
+        for attr in inspect(table).column_attrs
+        if attr.columns[0].name in record
+    }
+
+
+class SQLChatStore:
+    """
+    Chats, messages, folders and tags in the service database, shared by all
+    workers. Operations block on the database and are run on worker threads.
+    """
+
+    blocking = True
+
+    def __init__(self):
+        try:
+            Base.metadata.create_all(engine)
+        except OperationalError:
+            # Another worker created the tables between our check and create
+            Base.metadata.create_all(engine)
+        logger.info(f"Chat store using database {engine.url.render_as_string(hide_password=True)}")
+
+    @staticmethod
+    def _owned(db, table: Type[Base], record_id: str, user_id: str) -> Optional[Base]:
+        return db.scalars(
+            select(table).where(table.id == record_id, table.user_id == user_id)
+        ).first()
+
+    def _insert(self, table: Type[Base], record: Record) -> None:
+        with get_db() as db:
+            db.add(table(**to_attributes(table, record)))
+            db.commit()
+
+    def _get(self, table: Type[Base], record_id: str, user_id: str) -> Optional[Record]:
+        with get_db() as db:
+            row = self._owned(db, table, record_id, user_id)
+            return to_record(row) if row is not None else None
+
+    def _update(self, table: Type[Base], record_id: str, user_id: str, fields: Record) -> Optional[Record]:
+        with get_db() as db:
+            row = self._owned(db, table, record_id, user_id)
+            if row is None:
+                return None
+            for key, value in to_attributes(table, fields).items():
+                setattr(row, key, value)
+            db.commit()
+            return to_record(row)
+
+    def _delete(self, table: Type[Base], record_id: str, user_id: str) -> bool:
+        with get_db() as db:
+            row = self._owned(db, table, record_id, user_id)
+            if row is None:
+                return False
+            db.delete(row)
+            db.commit()
+            return True
+
+    @staticmethod
+    def _sync_tags(db, row: Chat) -> None:
+        # Rewritten with the chat so tag listings see its current updated_at
+        db.execute(delete(ChatTag).where(ChatTag.chat_id == row.id))
+        for tag in set(row.tags or []):
+            db.add(ChatTag(chat_id=row.id, tag=tag, user_id=row.user_id, updated_at=row.updated_at))
+
+    @staticmethod
+    def _add_messages(db, chat_id: str, start: int, messages: List[Record]) -> None:
+        for position, message in enumerate(messages, start):
+            db.add(ChatMessage(chat_id=chat_id, position=position, message_id=message.get("id"), data=message))
+
+    @staticmethod
+    def _chat_record(db, row: Chat) -> Record:
+        messages = db.scalars(
+            select(ChatMessage.data).where(ChatMessage.chat_id == row.id).order_by(ChatMessage.position)
+        ).all()
+        return {**to_record(row), "messages": list(messages)}
+
+    def _write_chat(
+        self,
+        db,
+        chat_id: str,
+        user_id: str,
+        values: Record,
+        expected_version: Optional[int],
+        operations: List[Operation],
+    ) -> Optional[Chat]:
+        """
+        Update a chat row and bump its version in one conditional UPDATE, so
+        two writers can never both succeed against the same version, and log
+        the change as JSON Patch operations. Returns the updated row, None if
+        the chat is not the user's, and raises VersionConflict if
+        expected_version is stale.
+        """
+        statement = update(Chat).where(Chat.id == chat_id, Chat.user_id == user_id)
+        if expected_version is not None:
+            statement = statement.where(Chat.version == expected_version)
+        result = db.execute(statement.values(version=Chat.version + 1, **values))
+        if result.rowcount == 0:
+            current = db.scalar(select(Chat.version).where(Chat.id == chat_id, Chat.user_id == user_id))
+            if current is None:
+                return None
+            raise VersionConflict(current)
+        row = db.scalars(
+            select(Chat).where(Chat.id == chat_id).execution_options(populate_existing=True)
+        ).one()
+        if "tags" in values or "updated_at" in values:
+            self._sync_tags(db, row)
+        db.add(ChatChange(chat_id=chat_id, version=row.version, operations=operations, updated_at=row.updated_at))
+        db.execute(delete(ChatChange).where(
+            ChatChange.chat_id == chat_id,
+            ChatChange.version <= row.version - settings.chat_change_log_size,
+        ))
+        return row
+
+    @staticmethod
+    def _keyset(statement, updated_at, item_id, after: Optional[Tuple[datetime, str]], limit: int):
+        """
+        Order a listing by (updated_at, id), newest first, starting after a cursor
+        """
+        if after is not None:
+            after_updated_at, after_id = after
+            statement = statement.where(or_(
+                updated_at < after_updated_at,
+                and_(updated_at == after_updated_at, item_id < after_id),
+            ))
+        return statement.order_by(updated_at.desc(), item_id.desc()).limit(limit)
+
+    # Chats
+
+    def insert_chat(self, record: Record) -> None:
+        messages = record.get("messages") or []
+        with get_db() as db:
+            row = Chat(**to_attributes(Chat, record), message_count=len(messages))
+            db.add(row)
+            self._add_messages(db, row.id, 0, messages)
+            self._sync_tags(db, row)
+            db.commit()
+
+    def get_chat(self, chat_id: str, user_id: str) -> Optional[Record]:
+        with get_db() as db:
+            row = self._owned(db, Chat, chat_id, user_id)
+            return self._chat_record(db, row) if row is not None else None
+
+    def update_chat(
+        self,
+        chat_id: str,
+        user_id: str,
+        fields: Record,
+        expected_version: Optional[int] = None,
+    ) -> Optional[Record]:
+        values = to_attributes(Chat, fields)
+        if "messages" in fields:
+            values["message_count"] = len(fields["messages"])
+        with get_db() as db:
+            row = self._write_chat(db, chat_id, user_id, values, expected_version, replace_operations(fields))
+            if row is None:
+                return None
+            if "messages" in fields:
+                db.execute(delete(ChatMessage).where(ChatMessage.chat_id == chat_id))
+                self._add_messages(db, chat_id, 0, fields["messages"])
+                db.flush()
+            record = self._chat_record(db, row)
+            db.commit()
+            return record
+
+    def append_chat_messages(
+        self,
+        chat_id: str,
+        user_id: str,
+        messages: List[Record],
+        fields: Record,
+        expected_version: Optional[int] = None,
+    ) -> Optional[Record]:
+        """
+        Add messages to the end of a chat without reading or rewriting the
+        earlier ones; returns the chat without its messages
+        """
+        values = {**to_attributes(Chat, fields), "message_count": Chat.message_count + len(messages)}
+        operations = [{"op": "add", "path": "/messages/-", "value": message} for message in messages]
+        with get_db() as db:
+            # The UPDATE locks the chat row, so concurrent appends get
+            # consecutive positions
+            row = self._write_chat(
+                db, chat_id, user_id, values, expected_version, operations + replace_operations(fields)
+            )
+            if row is None:
+                return None
+            self._add_messages(db, chat_id, row.message_count - len(messages), messages)
+            db.commit()
+            return to_record(row)
+
+    def update_chat_message(
+        self,
+        chat_id: str,
+        user_id: str,
+        message_id: str,
+        message: Record,
+        fields: Record,
+        expected_version: Optional[int] = None,
+    ) -> Optional[Record]:
+        """
+        Replace one message of a chat, found by its id; returns the chat
+        without its messages, or None if the chat or message does not exist
+        """
+        with get_db() as db:
+            if self._owned(db, Chat, chat_id, user_id) is None:
+                return None
+            position = db.scalar(
+                select(ChatMessage.position)
+                .where(ChatMessage.chat_id == chat_id, ChatMessage.message_id == message_id)
+            )
+            if position is None:
+                return None
+            operations = [{"op": "replace", "path": f"/messages/{position}", "value": message}]
+            row = self._write_chat(
+                db, chat_id, user_id, to_attributes(Chat, fields), expected_version,
+                operations + replace_operations(fields),
+            )
+            if row is None:
+                return None
+            db.execute(
+                update(ChatMessage)
+                .where(ChatMessage.chat_id == chat_id, ChatMessage.position == position)
+                .values(data=message, message_id=message.get("id"))
+            )
+            db.commit()
+            return to_record(row)
+
+    def patch_chat(
+        self,
+        chat_id: str,
+        user_id: str,
+        operations: List[Operation],
+        fields: Record,
+        expected_versions: Optional[Collection[int]] = None,
+    ) -> Optional[Record]:
+        """
+        Apply a JSON Patch to a chat, writing only the columns and message
+        rows it changes; returns the chat without its messages
+        """
+        with get_db() as db:
+            row = self._owned(db, Chat, chat_id, user_id)
+            if row is None:
+                return None
+            if expected_versions is not None and row.version not in expected_versions:
+                raise VersionConflict(row.version)
+            chat = self._chat_record(db, row)
+            document = apply_patch(chat_document(chat), operations)
+
+            changed = {
+                key: value
+                for key, value in document.items()
+                if key != "messages" and value != chat[key]
+            }
+            values = to_attributes(Chat, {**changed, **fields})
+            old_messages, new_messages = chat["messages"], document["messages"]
+            if len(new_messages) != len(old_messages):
+                values["message_count"] = len(new_messages)
+
+            # Conditional on the version read above, so a concurrent write
+            # between reading and writing is a conflict, not a lost update
+            row = self._write_chat(
+                db, chat_id, user_id, values, row.version, operations + replace_operations(fields)
+            )
+            if row is None:
+                return None
+            for position in range(max(len(old_messages), len(new_messages))):
+                if position >= len(new_messages):
+                    db.execute(delete(ChatMessage).where(
+                        ChatMessage.chat_id == chat_id, ChatMessage.position == position
+                    ))
+                elif position >= len(old_messages):
+                    self._add_messages(db, chat_id, position, [new_messages[position]])
+                elif new_messages[position] != old_messages[position]:
+                    db.execute(
+                        update(ChatMessage)
+                        .where(ChatMessage.chat_id == chat_id, ChatMessage.position == position)
+                        .values(data=new_messages[position], message_id=new_messages[position].get("id"))
+                    )
+            db.commit()
+            return to_record(row)
+
+    def list_chat_changes(self, chat_id: str, user_id: str, since: int) -> Optional[Tuple[int, List[Record]]]:
+        """
+        The current version of a chat and the logged changes after since
+        """
+        with get_db() as db:
+            version = db.scalar(select(Chat.version).where(Chat.id == chat_id, Chat.user_id == user_id))
+            if version is None:
+                return None
+            rows = db.scalars(
+                select(ChatChange)
+                .where(ChatChange.chat_id == chat_id, ChatChange.version > since)
+                .order_by(ChatChange.version)
+            ).all()
+            return version, [to_record(row) for row in rows]
+
+    def delete_chat(self, chat_id: str, user_id: str) -> bool:
+        with get_db() as db:
+            row = self._owned(db, Chat, chat_id, user_id)
+            if row is None:
+                return False
+            db.execute(delete(ChatTag).where(ChatTag.chat_id == chat_id))
+            db.execute(delete(ChatMessage).where(ChatMessage.chat_id == chat_id))
+            db.execute(delete(ChatChange).where(ChatChange.chat_id == chat_id))
+            db.delete(row)
+            db.commit()
+            return True
+
+    def list_chats(
+        self,
+        user_id: str,
+        archived: bool,
+        limit: int,
+        after: Optional[Tuple[datetime, str]] = None,
+        offset: int = 0,
+        folder_id: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> List[Record]:
+        """
+        A page of a user's chats, optionally only those in a folder or with a
+        tag. Each variant walks its own index, so a page costs O(limit).
+        """
+        if tag is not None:
+            statement = self._keyset(
+                select(Chat)
+                .join(ChatTag, ChatTag.chat_id == Chat.id)
+                .where(ChatTag.user_id == user_id, ChatTag.tag == tag, Chat.archived == archived),
+                ChatTag.updated_at, ChatTag.chat_id, after, limit,
+            )
+        elif folder_id is not None:
+            statement = self._keyset(
+                select(Chat).where(
+                    Chat.user_id == user_id, Chat.folder_id == folder_id, Chat.archived == archived
+                ),
+                Chat.updated_at, Chat.id, after, limit,
+            )
+        else:
+            statement = self._keyset(
+                select(Chat).where(Chat.user_id == user_id, Chat.archived == archived),
+                Chat.updated_at, Chat.id, after, limit,
+            )
+        if offset:
+            statement = statement.offset(offset)
+        with get_db() as db:
+            return [to_record(row) for row in db.scalars(statement).all()]
+
+    # Messages
+
+    def insert_message(self, record: Record) -> None:
+        self._insert(Message, record)
+
+    def get_message(self, message_id: str, user_id: str) -> Optional[Record]:
+        with get_db() as db:
+            row = self._owned(db, Message, message_id, user_id)
+            if row is None:
+                return None
+            # Children are found through their parent_id rather than kept in
+            # a list on the parent, so concurrent replies cannot lose each other
+            children_ids = db.scalars(
+                select(Message.id).where(Message.parent_id == message_id).order_by(Message.created_at)
+            ).all()
+            return {**to_record(row), "children_ids": list(children_ids)}
+
+    def delete_message(self, message_id: str, user_id: str) -> bool:
+        return self._delete(Message, message_id, user_id)
+
+    def list_messages(self, chat_id: str, user_id: str) -> List[Record]:
+        with get_db() as db:
+            rows = db.scalars(
+                select(Message)
+                .where(Message.chat_id == chat_id, Message.user_id == user_id)
+                .order_by(Message.created_at)
+            ).all()
+        children: Dict[str, List[str]] = defaultdict(list)
+        for row in rows:
+            if row.parent_id:
+                children[row.parent_id].append(row.id)
+        return [{**to_record(row), "children_ids": children.get(row.id, [])} for row in rows]
+
+    # Folders
+
+    def insert_folder(self, record: Record) -> None:
+        self._insert(Folder, record)
+
+    def get_folder(self, folder_id: str, user_id: str) -> Optional[Record]:
+        return self._get(Folder, folder_id, user_id)
+
+    def update_folder(self, folder_id: str, user_id: str, fields: Record) -> Optional[Record]:
+        return self._update(Folder, folder_id, user_id, fields)
+
+    def delete_folder(self, folder_id: str, user_id: str) -> bool:
+        return self._delete(Folder, folder_id, user_id)
+
+    def list_folders(self, user_id: str) -> List[Record]:
+        with get_db() as db:
+            rows = db.scalars(
+                select(Folder).where(Folder.user_id == user_id).order_by(Folder.name)
+            ).all()
+            return [to_record(row) for row in rows]
+
+    # Tags
+
+    def insert_tag(self, record: Record) -> None:
+        self._insert(Tag, record)
+
+    def get_tag(self, tag_id: str, user_id: str) -> Optional[Record]:
+        return self._get(Tag, tag_id, user_id)
+
+    def update_tag(self, tag_id: str, user_id: str, fields: Record) -> Optional[Record]:
+        return self._update(Tag, tag_id, user_id, fields)
+
+    def delete_tag(self, tag_id: str, user_id: str) -> bool:
+        return self._delete(Tag, tag_id, user_id)
+
+    def list_tags(self, user_id: str) -> List[Record]:
+        with get_db() as db:
+            rows = db.scalars(
+                select(Tag).where(Tag.user_id == user_id).order_by(Tag.name)
+            ).all()
+            return [to_record(row) for row in rows]
+
+    def ping(self) -> bool:
+        with get_db() as db:
+            db.execute(text("SELECT 1"))
+        return True
+
+    def close(self) -> None:
+        engine.dispose()
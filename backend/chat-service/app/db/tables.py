@@ -0,0 +1,119 @@
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, Text
+
+from common.db import Base, JSONField
+
+
+class Chat(Base):
+    __tablename__ = "chat"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String, nullable=False)
+    title = Column(Text, nullable=False)
+    # Messages live in chat_message; this is the next free position
+    message_count = Column(Integer, nullable=False, default=0)
+    models = Column(JSONField, nullable=False)
+    system = Column(Text, nullable=True)
+    tags = Column(JSONField, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+    share_id = Column(String, nullable=True, unique=True)
+    archived = Column(Boolean, nullable=False, default=False)
+    pinned = Column(Boolean, nullable=False, default=False)
+    folder_id = Column(String, nullable=True)
+    # Incremented on every write, for optimistic concurrency
+    version = Column(Integer, nullable=False, default=1)
+
+    __table_args__ = (
+        # Serve keyset-paginated listings ordered by (updated_at, id): a
+        # user's unarchived chats, and the chats in one of their folders
+        Index("chat_user_archived_updated_idx", "user_id", "archived", "updated_at", "id"),
+        Index("chat_user_folder_updated_idx", "user_id", "folder_id", "archived", "updated_at", "id"),
+    )
+
+
+class ChatMessage(Base):
+    """
+    One message of a chat document, so appending or editing a message writes
+    one row rather than the whole conversation
+    """
+    __tablename__ = "chat_message"
+
+    chat_id = Column(String, primary_key=True)
+    position = Column(Integer, primary_key=True)
+    message_id = Column(String, nullable=True)
+    data = Column(JSONField, nullable=False)
+
+    __table_args__ = (
+        Index("chat_message_chat_message_idx", "chat_id", "message_id"),
+    )
+
+
+class ChatChange(Base):
+    """
+    The JSON Patch that produced each version of a chat, so clients can
+    fetch deltas instead of the whole chat
+    """
+    __tablename__ = "chat_change"
+
+    chat_id = Column(String, primary_key=True)
+    version = Column(Integer, primary_key=True)
+    operations = Column(JSONField, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+
+class ChatTag(Base):
+    """
+    One row per tag of a chat, carrying the chat's updated_at so tag-filtered
+    listings are served from an index like the others
+    """
+    __tablename__ = "chat_tag"
+
+    chat_id = Column(String, primary_key=True)
+    tag = Column(String, primary_key=True)
+    user_id = Column(String, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("chat_tag_user_tag_updated_idx", "user_id", "tag", "updated_at", "chat_id"),
+    )
+
+
+class Message(Base):
+    __tablename__ = "message"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String, nullable=False)
+    chat_id = Column(String, nullable=False)
+    parent_id = Column(String, nullable=True, index=True)
+    content = Column(Text, nullable=False)
+    role = Column(String, nullable=False)
+    model = Column(String, nullable=True)
+    meta = Column("metadata", JSONField, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("message_chat_created_idx", "chat_id", "created_at"),
+    )
+
+
+class Folder(Base):
+    __tablename__ = "folder"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String, nullable=False, index=True)
+    name = Column(Text, nullable=False)
+    description = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+
+class Tag(Base):
+    __tablename__ = "tag"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String, nullable=False, index=True)
+    name = Column(Text, nullable=False)
+    color = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
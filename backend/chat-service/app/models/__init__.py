@@ -3,6 +3,11 @@ from .chats import (
     ChatCreateRequest,
     ChatCreateResponse,
     ChatUpdateRequest,
+    ChatAppendRequest,
+    ChatMessageUpdateRequest,
+    ChatVersionResponse,
+    ChatChangeItem,
+    ChatChangesResponse,
     ChatResponse,
     ChatListItem,
     ChatListResponse,
@@ -36,6 +41,11 @@ __all__ = [
     "ChatCreateRequest",
     "ChatCreateResponse",
     "ChatUpdateRequest",
+    "ChatAppendRequest",
+    "ChatMessageUpdateRequest",
+    "ChatVersionResponse",
+    "ChatChangeItem",
+    "ChatChangesResponse",
     "ChatResponse",
     "ChatListItem",
     "ChatListResponse",
@@ -24,6 +24,43 @@ class ChatCreateResponse(BaseModel):
 class ChatUpdateRequest(ChatBase):
     """Chat update request"""
     messages: List[Dict[str, Any]] = []
+    # Version the client last saw; the update fails with 409 if it is stale
+    version: Optional[int] = None
+
+
+class ChatAppendRequest(BaseModel):
+    """Chat message append request"""
+    messages: List[Dict[str, Any]]
+    title: Optional[str] = None
+    tags: Optional[List[str]] = None
+    version: Optional[int] = None
+
+
+class ChatMessageUpdateRequest(BaseModel):
+    """Chat message update request"""
+    message: Dict[str, Any]
+    version: Optional[int] = None
+
+
+class ChatVersionResponse(BaseModel):
+    """Chat version response"""
+    id: str
+    version: int
+    updated_at: datetime
+
+
+class ChatChangeItem(BaseModel):
+    """Chat change log entry"""
+    version: int
+    operations: List[Dict[str, Any]]
+    updated_at: datetime
+
+
+class ChatChangesResponse(BaseModel):
+    """Chat changes response"""
+    id: str
+    version: int
+    changes: List[ChatChangeItem]
 
 
 class ChatResponse(ChatBase):
@@ -37,6 +74,7 @@ class ChatResponse(ChatBase):
     archived: bool = False
     pinned: bool = False
     folder_id: Optional[str] = None
+    version: int = 1
 
 
 class ChatListItem(BaseModel):
@@ -53,3 +91,5 @@ class ChatListItem(BaseModel):
 class ChatListResponse(BaseModel):
     """Chat list response"""
     chats: List[ChatListItem]
+    # Pass back as ?cursor= for the next page; None on the last page
+    next_cursor: Optional[str] = None
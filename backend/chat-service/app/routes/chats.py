@@ -1,26 +1,75 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response, status
+from typing import List, Dict, Any, FrozenSet, Optional
 
 from app.core.config import settings
 from app.models.chats import (
     ChatCreateRequest,
     ChatCreateResponse,
     ChatUpdateRequest,
+    ChatAppendRequest,
+    ChatMessageUpdateRequest,
+    ChatVersionResponse,
+    ChatChangesResponse,
     ChatResponse,
     ChatListResponse,
 )
+from app.db.errors import VersionConflict
+from app.db.patch import PatchError, PatchTestFailed
 from app.services.chats import (
     create_chat,
     update_chat,
+    append_chat_messages,
+    update_chat_message,
+    patch_chat,
+    list_chat_changes,
+    ChangesUnavailable,
     get_chat,
     list_chats,
     delete_chat,
     share_chat,
 )
 from app.services.auth import get_current_user
+from app.services.pagination import InvalidCursor
 
 router = APIRouter()
 
+
+def chat_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[FrozenSet[int]]:
+    """
+    The chat versions named by an If-Match header, or None for any version.
+
+    If-Match uses strong comparison (RFC 9110 13.1.1), so weak tags and tags
+    that are not chat versions match nothing; a header left with no versions
+    can only fail with 412.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    versions = set()
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if not tag:
+            continue
+        weak = tag.startswith("W/")
+        if weak:
+            tag = tag[2:]
+        if len(tag) < 2 or not (tag.startswith('"') and tag.endswith('"')):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid If-Match header: {if_match}",
+            )
+        if weak:
+            continue
+        try:
+            versions.add(int(tag[1:-1]))
+        except ValueError:
+            continue
+    return frozenset(versions)
+
+
 @router.post("/", response_model=ChatCreateResponse)
 async def create_chat_endpoint(
     request: Request,
@@ -51,21 +100,34 @@ async def create_chat_endpoint(
 @router.get("/", response_model=ChatListResponse)
 async def list_chats_endpoint(
     request: Request,
-    page: int = 1,
-    limit: int = 50,
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=settings.chat_list_max_limit),
+    cursor: Optional[str] = None,
+    folder_id: Optional[str] = None,
+    tag: Optional[str] = None,
     current_user: Dict[str, Any] = Depends(get_current_user),
 ):
     """
-    List all chats for the current user
+    List chats for the current user, newest first. Pass next_cursor from the
+    previous response as cursor to get the following page.
     """
     try:
-        chats = await list_chats(
+        chats, next_cursor = await list_chats(
             user_id=current_user["sub"],
             page=page,
             limit=limit,
+            cursor=cursor,
+            folder_id=folder_id,
+            tag=tag,
         )
         return ChatListResponse(
             chats=chats,
+            next_cursor=next_cursor,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
         )
     except Exception as e:
         raise HTTPException(
@@ -76,11 +138,12 @@ async def list_chats_endpoint(
 @router.get("/{chat_id}", response_model=ChatResponse)
 async def get_chat_endpoint(
     request: Request,
+    response: Response,
     chat_id: str,
     current_user: Dict[str, Any] = Depends(get_current_user),
 ):
     """
-    Get a chat by ID
+    Get a chat by ID; the ETag is its version, for If-Match on PATCH
     """
     try:
         chat = await get_chat(
@@ -92,6 +155,7 @@ async def get_chat_endpoint(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Chat not found",
             )
+        response.headers["ETag"] = chat_etag(chat.version)
         return chat
     except HTTPException:
         raise
@@ -120,6 +184,7 @@ async def update_chat_endpoint(
             models=chat_request.models,
             system=chat_request.system,
             tags=chat_request.tags,
+            version=chat_request.version,
         )
         if not chat:
             raise HTTPException(
@@ -129,12 +194,181 @@ async def update_chat_endpoint(
         return chat
     except HTTPException:
         raise
+    except VersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error updating chat: {str(e)}",
         )
 
+@router.patch("/{chat_id}", response_model=ChatVersionResponse)
+async def patch_chat_endpoint(
+    request: Request,
+    response: Response,
+    chat_id: str,
+    operations: List[Dict[str, Any]] = Body(...),
+    if_match: Optional[str] = Header(None),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+):
+    """
+    Change a chat with an RFC 6902 JSON Patch, e.g.
+    [{"op": "replace", "path": "/messages/3/rating", "value": 1}]. With
+    If-Match, the patch only applies to the versions it names.
+    """
+    try:
+        chat = await patch_chat(
+            chat_id=chat_id,
+            user_id=current_user["sub"],
+            operations=operations,
+            versions=parse_if_match(if_match),
+        )
+        if not chat:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Chat not found",
+            )
+        response.headers["ETag"] = chat_etag(chat.version)
+        return chat
+    except HTTPException:
+        raise
+    except VersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=str(e),
+            headers={"ETag": chat_etag(e.version)},
+        )
+    except PatchTestFailed as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
+    except PatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=str(e),
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error patching chat: {str(e)}",
+        )
+
+@router.get("/{chat_id}/changes", response_model=ChatChangesResponse)
+async def list_chat_changes_endpoint(
+    request: Request,
+    chat_id: str,
+    since: int,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+):
+    """
+    Changes to a chat after version since, as JSON Patch operations per
+    version. 410 means the client is too far behind and should fetch the chat.
+    """
+    try:
+        changes = await list_chat_changes(
+            chat_id=chat_id,
+            user_id=current_user["sub"],
+            since=since,
+        )
+        if not changes:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Chat not found",
+            )
+        return changes
+    except HTTPException:
+        raise
+    except ChangesUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=str(e),
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error listing chat changes: {str(e)}",
+        )
+
+@router.post("/{chat_id}/messages", response_model=ChatVersionResponse)
+async def append_chat_messages_endpoint(
+    request: Request,
+    chat_id: str,
+    append_request: ChatAppendRequest,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+):
+    """
+    Append messages to a chat, optionally updating its title and tags
+    """
+    try:
+        chat = await append_chat_messages(
+            chat_id=chat_id,
+            user_id=current_user["sub"],
+            messages=append_request.messages,
+            title=append_request.title,
+            tags=append_request.tags,
+            version=append_request.version,
+        )
+        if not chat:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Chat not found",
+            )
+        return chat
+    except HTTPException:
+        raise
+    except VersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error appending chat messages: {str(e)}",
+        )
+
+@router.put("/{chat_id}/messages/{message_id}", response_model=ChatVersionResponse)
+async def update_chat_message_endpoint(
+    request: Request,
+    chat_id: str,
+    message_id: str,
+    message_request: ChatMessageUpdateRequest,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+):
+    """
+    Replace a single message of a chat
+    """
+    try:
+        chat = await update_chat_message(
+            chat_id=chat_id,
+            user_id=current_user["sub"],
+            message_id=message_id,
+            message=message_request.message,
+            version=message_request.version,
+        )
+        if not chat:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Chat or message not found",
+            )
+        return chat
+    except HTTPException:
+        raise
+    except VersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating chat message: {str(e)}",
+        )
+
 @router.delete("/{chat_id}", response_model=bool)
 async def delete_chat_endpoint(
     request: Request,
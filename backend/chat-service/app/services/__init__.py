@@ -1,5 +1,16 @@
 from .auth import get_current_user
-from .chats import create_chat, update_chat, get_chat, list_chats, delete_chat, share_chat
+from .chats import (
+    create_chat,
+    update_chat,
+    append_chat_messages,
+    update_chat_message,
+    patch_chat,
+    list_chat_changes,
+    get_chat,
+    list_chats,
+    delete_chat,
+    share_chat,
+)
 from .messages import create_message, get_message, list_messages, delete_message
 from .folders import create_folder, update_folder, get_folder, list_folders, delete_folder
 from .tags import create_tag, update_tag, get_tag, list_tags, delete_tag
@@ -8,6 +19,10 @@ __all__ = [
     "get_current_user",
     "create_chat",
     "update_chat",
+    "append_chat_messages",
+    "update_chat_message",
+    "patch_chat",
+    "list_chat_changes",
     "get_chat",
     "list_chats",
     "delete_chat",
@@ -1,15 +1,32 @@
 import logging
 import uuid
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Collection, Optional, Tuple
 from datetime import datetime
 
 from app.core.config import settings
-from app.models.chats import ChatResponse, ChatListItem
+from app.db import get_store, run
+from app.db.errors import VersionConflict
+from app.db.patch import PatchError
+from app.models.chats import (
+    ChatResponse,
+    ChatListItem,
+    ChatVersionResponse,
+    ChatChangeItem,
+    ChatChangesResponse,
+)
+from app.services.pagination import decode_cursor, next_page
 
 logger = logging.getLogger(__name__)
 
-# In-memory database of chats (would be replaced with a real database in production)
-chats_db = {}
+# Attempts at a patch sent without a version, when other writes race it
+PATCH_ATTEMPTS = 3
+
+
+class ChangesUnavailable(Exception):
+    """
+    Raised when the change log no longer reaches back to a client's version
+    """
+    pass
 
 
 async def create_chat(
@@ -29,7 +46,7 @@ async def create_chat(
         
         # Create the chat
         now = datetime.now()
-        chats_db[chat_id] = {
+        await run(get_store().insert_chat, {
             "id": chat_id,
             "user_id": user_id,
             "title": title,
@@ -43,7 +60,8 @@ async def create_chat(
             "archived": False,
             "pinned": False,
             "folder_id": None,
-        }
+            "version": 1,
+        })
         
         return chat_id
     except Exception as e:
@@ -59,31 +77,164 @@ async def update_chat(
     models: List[Dict[str, Any]],
     system: Optional[str] = None,
     tags: Optional[List[str]] = None,
+    version: Optional[int] = None,
 ) -> Optional[ChatResponse]:
     """
-    Update a chat
+    Update a chat, replacing all of its messages. Raises VersionConflict if
+    a version is given and the chat has changed since.
     """
     try:
-        # Check if the chat exists and belongs to the user
-        if chat_id not in chats_db or chats_db[chat_id]["user_id"] != user_id:
-            return None
-        
-        # Update the chat
-        chats_db[chat_id].update({
+        fields = {
             "title": title,
             "messages": messages,
             "models": models,
             "system": system,
-            "tags": tags or chats_db[chat_id]["tags"],
             "updated_at": datetime.now(),
-        })
+        }
+        if tags:
+            fields["tags"] = tags
+        
+        # Only updates the chat if it exists and belongs to the user
+        chat = await run(get_store().update_chat, chat_id, user_id, fields, version)
+        if chat is None:
+            return None
         
-        return ChatResponse(**chats_db[chat_id])
+        return ChatResponse(**chat)
+    except VersionConflict:
+        raise
     except Exception as e:
         logger.error(f"Error updating chat: {e}")
         raise
 
 
+async def append_chat_messages(
+    chat_id: str,
+    user_id: str,
+    messages: List[Dict[str, Any]],
+    title: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    version: Optional[int] = None,
+) -> Optional[ChatVersionResponse]:
+    """
+    Add messages to the end of a chat, without sending or storing the
+    earlier ones again. Raises VersionConflict if a version is given and the
+    chat has changed since.
+    """
+    try:
+        fields: Dict[str, Any] = {"updated_at": datetime.now()}
+        if title:
+            fields["title"] = title
+        if tags:
+            fields["tags"] = tags
+        
+        chat = await run(get_store().append_chat_messages, chat_id, user_id, messages, fields, version)
+        if chat is None:
+            return None
+        
+        return ChatVersionResponse(**chat)
+    except VersionConflict:
+        raise
+    except Exception as e:
+        logger.error(f"Error appending chat messages: {e}")
+        raise
+
+
+async def update_chat_message(
+    chat_id: str,
+    user_id: str,
+    message_id: str,
+    message: Dict[str, Any],
+    version: Optional[int] = None,
+) -> Optional[ChatVersionResponse]:
+    """
+    Replace one message of a chat, found by its id. Raises VersionConflict if
+    a version is given and the chat has changed since.
+    """
+    try:
+        fields = {"updated_at": datetime.now()}
+        
+        # The message keeps its id whatever the body says
+        chat = await run(
+            get_store().update_chat_message,
+            chat_id, user_id, message_id, {**message, "id": message_id}, fields, version,
+        )
+        if chat is None:
+            return None
+        
+        return ChatVersionResponse(**chat)
+    except VersionConflict:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating chat message: {e}")
+        raise
+
+
+async def patch_chat(
+    chat_id: str,
+    user_id: str,
+    operations: List[Dict[str, Any]],
+    versions: Optional[Collection[int]] = None,
+) -> Optional[ChatVersionResponse]:
+    """
+    Apply an RFC 6902 JSON Patch to a chat. Raises VersionConflict if
+    versions are given and the chat is at none of them, and PatchError if the
+    patch does not apply.
+    """
+    try:
+        for attempt in range(PATCH_ATTEMPTS):
+            try:
+                chat = await run(
+                    get_store().patch_chat,
+                    chat_id, user_id, operations, {"updated_at": datetime.now()}, versions,
+                )
+                break
+            except VersionConflict:
+                # Without a version the client accepts whatever is current,
+                # so re-apply the patch on top of the write that won
+                if versions is not None or attempt == PATCH_ATTEMPTS - 1:
+                    raise
+        if chat is None:
+            return None
+        
+        return ChatVersionResponse(**chat)
+    except (VersionConflict, PatchError):
+        raise
+    except Exception as e:
+        logger.error(f"Error patching chat: {e}")
+        raise
+
+
+async def list_chat_changes(
+    chat_id: str,
+    user_id: str,
+    since: int,
+) -> Optional[ChatChangesResponse]:
+    """
+    Changes to a chat after version since, oldest first. Raises
+    ChangesUnavailable if some of them have left the change log, in which
+    case the client should fetch the whole chat again.
+    """
+    try:
+        result = await run(get_store().list_chat_changes, chat_id, user_id, since)
+        if result is None:
+            return None
+        version, changes = result
+        
+        if since < version and (not changes or changes[0]["version"] != since + 1):
+            raise ChangesUnavailable(f"Changes after version {since} are no longer available")
+        
+        return ChatChangesResponse(
+            id=chat_id,
+            version=version,
+            changes=[ChatChangeItem(**change) for change in changes],
+        )
+    except ChangesUnavailable:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing chat changes: {e}")
+        raise
+
+
 async def get_chat(
     chat_id: str,
     user_id: str,
@@ -92,11 +243,12 @@ async def get_chat(
     Get a chat by ID
     """
     try:
-        # Check if the chat exists and belongs to the user
-        if chat_id not in chats_db or chats_db[chat_id]["user_id"] != user_id:
+        # Only finds the chat if it belongs to the user
+        chat = await run(get_store().get_chat, chat_id, user_id)
+        if chat is None:
             return None
         
-        return ChatResponse(**chats_db[chat_id])
+        return ChatResponse(**chat)
     except Exception as e:
         logger.error(f"Error getting chat: {e}")
         raise
@@ -106,15 +258,29 @@ async def list_chats(
     user_id: str,
     page: int = 1,
     limit: int = 50,
-) -> List[ChatListItem]:
+    cursor: Optional[str] = None,
+    folder_id: Optional[str] = None,
+    tag: Optional[str] = None,
+) -> Tuple[List[ChatListItem], Optional[str]]:
     """
-    List all chats for a user
+    List a page of chats for a user, newest first, optionally only those in a
+    folder or with a tag. Returns the page and the cursor of the next one.
     """
     try:
-        # Filter chats by user ID
-        user_chats = [
+        limit = max(1, limit)
+        after = decode_cursor(cursor) if cursor else None
+        # Without a cursor, page numbers still work for older clients
+        offset = 0 if after else (page - 1) * limit
+        
+        # One extra row tells whether there is a next page
+        chats = await run(
+            get_store().list_chats, user_id, False, limit + 1, after, offset, folder_id, tag
+        )
+        chats, next_cursor = next_page(chats, limit)
+        
+        return [
             ChatListItem(
-                id=chat_id,
+                id=chat["id"],
                 title=chat["title"],
                 updated_at=chat["updated_at"],
                 created_at=chat["created_at"],
@@ -122,18 +288,8 @@ async def list_chats(
                 folder_id=chat["folder_id"],
                 tags=chat["tags"],
             )
-            for chat_id, chat in chats_db.items()
-            if chat["user_id"] == user_id and not chat["archived"]
-        ]
-        
-        # Sort by updated_at (newest first)
-        user_chats.sort(key=lambda x: x.updated_at, reverse=True)
-        
-        # Paginate
-        start = (page - 1) * limit
-        end = start + limit
-        
-        return user_chats[start:end]
+            for chat in chats
+        ], next_cursor
     except Exception as e:
         logger.error(f"Error listing chats: {e}")
         raise
@@ -147,14 +303,8 @@ async def delete_chat(
     Delete a chat
     """
     try:
-        # Check if the chat exists and belongs to the user
-        if chat_id not in chats_db or chats_db[chat_id]["user_id"] != user_id:
-            return False
-        
-        # Delete the chat
-        del chats_db[chat_id]
-        
-        return True
+        # Only deletes the chat if it exists and belongs to the user
+        return await run(get_store().delete_chat, chat_id, user_id)
     except Exception as e:
         logger.error(f"Error deleting chat: {e}")
         raise
@@ -169,14 +319,17 @@ async def share_chat(
     """
     try:
         # Check if the chat exists and belongs to the user
-        if chat_id not in chats_db or chats_db[chat_id]["user_id"] != user_id:
+        chat = await run(get_store().get_chat, chat_id, user_id)
+        if chat is None:
             return None
         
         # Generate a share ID if not already shared
-        if not chats_db[chat_id]["share_id"]:
-            chats_db[chat_id]["share_id"] = str(uuid.uuid4())
+        if not chat["share_id"]:
+            chat = await run(get_store().update_chat, chat_id, user_id, {"share_id": str(uuid.uuid4())})
+            if chat is None:
+                return None
         
-        return chats_db[chat_id]["share_id"]
+        return chat["share_id"]
     except Exception as e:
         logger.error(f"Error sharing chat: {e}")
         raise
@@ -4,13 +4,11 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 from app.core.config import settings
+from app.db import get_store, run
 from app.models.folders import FolderResponse
 
 logger = logging.getLogger(__name__)
 
-# In-memory database of folders (would be replaced with a real database in production)
-folders_db = {}
-
 
 async def create_folder(
     user_id: str,
@@ -26,15 +24,14 @@ async def create_folder(
         
         # Create the folder
         now = datetime.now()
-        folders_db[folder_id] = {
+        await run(get_store().insert_folder, {
             "id": folder_id,
             "user_id": user_id,
             "name": name,
             "description": description,
             "created_at": now,
             "updated_at": now,
-            "chat_count": 0,
-        }
+        })
         
         return folder_id
     except Exception as e:
@@ -52,18 +49,16 @@ async def update_folder(
     Update a folder
     """
     try:
-        # Check if the folder exists and belongs to the user
-        if folder_id not in folders_db or folders_db[folder_id]["user_id"] != user_id:
-            return None
-        
-        # Update the folder
-        folders_db[folder_id].update({
+        # Only updates the folder if it exists and belongs to the user
+        folder = await run(get_store().update_folder, folder_id, user_id, {
             "name": name,
             "description": description,
             "updated_at": datetime.now(),
         })
+        if folder is None:
+            return None
         
-        return FolderResponse(**folders_db[folder_id])
+        return FolderResponse(**folder)
     except Exception as e:
         logger.error(f"Error updating folder: {e}")
         raise
@@ -77,11 +72,12 @@ async def get_folder(
     Get a folder by ID
     """
     try:
-        # Check if the folder exists and belongs to the user
-        if folder_id not in folders_db or folders_db[folder_id]["user_id"] != user_id:
+        # Only finds the folder if it belongs to the user
+        folder = await run(get_store().get_folder, folder_id, user_id)
+        if folder is None:
             return None
         
-        return FolderResponse(**folders_db[folder_id])
+        return FolderResponse(**folder)
     except Exception as e:
         logger.error(f"Error getting folder: {e}")
         raise
@@ -94,17 +90,10 @@ async def list_folders(
     List all folders for a user
     """
     try:
-        # Filter folders by user ID
-        user_folders = [
-            FolderResponse(**folder)
-            for folder_id, folder in folders_db.items()
-            if folder["user_id"] == user_id
-        ]
-        
-        # Sort by name
-        user_folders.sort(key=lambda x: x.name)
+        # Folders of the user, sorted by name
+        folders = await run(get_store().list_folders, user_id)
         
-        return user_folders
+        return [FolderResponse(**folder) for folder in folders]
     except Exception as e:
         logger.error(f"Error listing folders: {e}")
         raise
@@ -118,14 +107,8 @@ async def delete_folder(
     Delete a folder
     """
     try:
-        # Check if the folder exists and belongs to the user
-        if folder_id not in folders_db or folders_db[folder_id]["user_id"] != user_id:
-            return False
-        
-        # Delete the folder
-        del folders_db[folder_id]
-        
-        return True
+        # Only deletes the folder if it exists and belongs to the user
+        return await run(get_store().delete_folder, folder_id, user_id)
     except Exception as e:
         logger.error(f"Error deleting folder: {e}")
         raise
@@ -4,13 +4,11 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 from app.core.config import settings
+from app.db import get_store, run
 from app.models.messages import MessageResponse
 
 logger = logging.getLogger(__name__)
 
-# In-memory database of messages (would be replaced with a real database in production)
-messages_db = {}
-
 
 async def create_message(
     user_id: str,
@@ -29,7 +27,8 @@ async def create_message(
         
         # Create the message
         now = datetime.now()
-        messages_db[message_id] = {
+        # Also lists the message among its parent's children
+        await run(get_store().insert_message, {
             "id": message_id,
             "user_id": user_id,
             "chat_id": chat_id,
@@ -39,13 +38,8 @@ async def create_message(
             "model": model,
             "created_at": now,
             "updated_at": now,
-            "children_ids": [],
             "metadata": {},
-        }
-        
-        # Update parent message if it exists
-        if parent_id and parent_id in messages_db:
-            messages_db[parent_id]["children_ids"].append(message_id)
+        })
         
         return message_id
     except Exception as e:
@@ -61,11 +55,12 @@ async def get_message(
     Get a message by ID
     """
     try:
-        # Check if the message exists and belongs to the user
-        if message_id not in messages_db or messages_db[message_id]["user_id"] != user_id:
+        # Only finds the message if it belongs to the user
+        message = await run(get_store().get_message, message_id, user_id)
+        if message is None:
             return None
         
-        return MessageResponse(**messages_db[message_id])
+        return MessageResponse(**message)
     except Exception as e:
         logger.error(f"Error getting message: {e}")
         raise
@@ -79,17 +74,10 @@ async def list_messages(
     List all messages for a chat
     """
     try:
-        # Filter messages by chat ID and user ID
-        chat_messages = [
-            MessageResponse(**message)
-            for message_id, message in messages_db.items()
-            if message["chat_id"] == chat_id and message["user_id"] == user_id
-        ]
-        
-        # Sort by created_at (oldest first)
-        chat_messages.sort(key=lambda x: x.created_at)
+        # Messages of the chat, oldest first
+        messages = await run(get_store().list_messages, chat_id, user_id)
         
-        return chat_messages
+        return [MessageResponse(**message) for message in messages]
     except Exception as e:
         logger.error(f"Error listing messages: {e}")
         raise
@@ -103,19 +91,9 @@ async def delete_message(
     Delete a message
     """
     try:
-        # Check if the message exists and belongs to the user
-        if message_id not in messages_db or messages_db[message_id]["user_id"] != user_id:
-            return False
-        
-        # Remove from parent's children_ids if it has a parent
-        parent_id = messages_db[message_id]["parent_id"]
-        if parent_id and parent_id in messages_db:
-            messages_db[parent_id]["children_ids"].remove(message_id)
-        
-        # Delete the message
-        del messages_db[message_id]
-        
-        return True
+        # Only deletes the message if it exists and belongs to the user; it
+        # also leaves its parent's children
+        return await run(get_store().delete_message, message_id, user_id)
     except Exception as e:
         logger.error(f"Error deleting message: {e}")
         raise
@@ -0,0 +1,46 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Position in a listing ordered by (updated_at, id), newest first
+Keyset = Tuple[datetime, str]
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a client sends a cursor this service did not issue
+    """
+    pass
+
+
+def encode_cursor(updated_at: datetime, item_id: str) -> str:
+    """
+    Opaque cursor pointing just past the given item
+    """
+    payload = json.dumps([updated_at.isoformat(), item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Keyset:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        updated_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        updated_at = datetime.fromisoformat(updated_at)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+    # Timestamps are stored naive (UTC) and cannot be compared with aware ones
+    if updated_at.tzinfo is not None:
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+    return updated_at, str(item_id)
+
+
+def next_page(records: List[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Split a fetch of limit + 1 records into the page and the cursor of the
+    next page, which is None when this is the last page
+    """
+    if len(records) <= limit:
+        return records, None
+    page = records[:limit]
+    return page, encode_cursor(page[-1]["updated_at"], page[-1]["id"])
@@ -4,13 +4,11 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 from app.core.config import settings
+from app.db import get_store, run
 from app.models.tags import TagResponse
 
 logger = logging.getLogger(__name__)
 
-# In-memory database of tags (would be replaced with a real database in production)
-tags_db = {}
-
 
 async def create_tag(
     user_id: str,
@@ -26,15 +24,14 @@ async def create_tag(
         
         # Create the tag
         now = datetime.now()
-        tags_db[tag_id] = {
+        await run(get_store().insert_tag, {
             "id": tag_id,
             "user_id": user_id,
             "name": name,
             "color": color or "#808080",  # Default to gray if no color provided
             "created_at": now,
             "updated_at": now,
-            "chat_count": 0,
-        }
+        })
         
         return tag_id
     except Exception as e:
@@ -52,18 +49,19 @@ async def update_tag(
     Update a tag
     """
     try:
-        # Check if the tag exists and belongs to the user
-        if tag_id not in tags_db or tags_db[tag_id]["user_id"] != user_id:
-            return None
-        
-        # Update the tag
-        tags_db[tag_id].update({
+        fields = {
             "name": name,
-            "color": color or tags_db[tag_id]["color"],
             "updated_at": datetime.now(),
-        })
+        }
+        if color:
+            fields["color"] = color
+        
+        # Only updates the tag if it exists and belongs to the user
+        tag = await run(get_store().update_tag, tag_id, user_id, fields)
+        if tag is None:
+            return None
         
-        return TagResponse(**tags_db[tag_id])
+        return TagResponse(**tag)
     except Exception as e:
         logger.error(f"Error updating tag: {e}")
         raise
@@ -77,11 +75,12 @@ async def get_tag(
     Get a tag by ID
     """
     try:
-        # Check if the tag exists and belongs to the user
-        if tag_id not in tags_db or tags_db[tag_id]["user_id"] != user_id:
+        # Only finds the tag if it belongs to the user
+        tag = await run(get_store().get_tag, tag_id, user_id)
+        if tag is None:
             return None
         
-        return TagResponse(**tags_db[tag_id])
+        return TagResponse(**tag)
     except Exception as e:
         logger.error(f"Error getting tag: {e}")
         raise
@@ -94,17 +93,10 @@ async def list_tags(
     List all tags for a user
     """
     try:
-        # Filter tags by user ID
-        user_tags = [
-            TagResponse(**tag)
-            for tag_id, tag in tags_db.items()
-            if tag["user_id"] == user_id
-        ]
+        # Tags of the user, sorted by name
+        tags = await run(get_store().list_tags, user_id)
         
-        # Sort by name
-        user_tags.sort(key=lambda x: x.name)
-        
-        return user_tags
+        return [TagResponse(**tag) for tag in tags]
     except Exception as e:
         logger.error(f"Error listing tags: {e}")
         raise
@@ -118,14 +110,8 @@ async def delete_tag(
     Delete a tag
     """
     try:
-        # Check if the tag exists and belongs to the user
-        if tag_id not in tags_db or tags_db[tag_id]["user_id"] != user_id:
-            return False
-        
-        # Delete the tag
-        del tags_db[tag_id]
-        
-        return True
+        # Only deletes the tag if it exists and belongs to the user
+        return await run(get_store().delete_tag, tag_id, user_id)
     except Exception as e:
         logger.error(f"Error deleting tag: {e}")
         raise
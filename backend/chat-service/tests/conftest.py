@@ -0,0 +1,53 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The engine is created on import, so point it at a scratch database first
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/chat-tests.db")
+
+# The chat service's app package and the shared common package, as the
+# Dockerfile's PYTHONPATH provides them
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [SERVICE_DIR, os.path.dirname(SERVICE_DIR)]
+
+from app import db  # noqa: E402
+from app.core.config import settings  # noqa: E402
+
+
+@pytest.fixture
+def memory_store(monkeypatch):
+    monkeypatch.setattr(settings, "chat_store", "memory")
+    monkeypatch.setattr(db, "_store", None)
+    yield db.get_store()
+    monkeypatch.setattr(db, "_store", None)
+
+
+@pytest.fixture
+def sql_store(monkeypatch):
+    from app.db.sql import SQLChatStore
+    from common.db import Base, engine
+
+    Base.metadata.drop_all(engine)
+    monkeypatch.setattr(settings, "chat_store", "sql")
+    monkeypatch.setattr(db, "_store", SQLChatStore())
+    yield db.get_store()
+    monkeypatch.setattr(db, "_store", None)
+
+
+@pytest.fixture(params=["memory", "sql"])
+def store(request):
+    return request.getfixturevalue(f"{request.param}_store")
+
+
+@pytest.fixture
+def client(memory_store):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from common.auth.identity import IDENTITY_HEADER, sign_identity
+
+    identity = sign_identity({"sub": "user-1"}, settings.internal_identity_secret)
+    with TestClient(app, headers={IDENTITY_HEADER: identity}) as client:
+        yield client
@@ -0,0 +1,127 @@
+import base64
+
+import pytest
+
+from app.core.config import settings
+from app.db.patch import apply_patch, chat_document
+
+CHATS = f"{settings.api_prefix}/chats/"
+
+
+def create_chat(client, title="Chat"):
+    response = client.post(CHATS, json={"title": title, "models": []})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["page=0", "page=-1", "limit=0", f"limit={settings.chat_list_max_limit + 1}"],
+)
+def test_list_chats_rejects_out_of_range_paging(client, query):
+    assert client.get(f"{CHATS}?{query}").status_code == 422
+
+
+def test_list_chats_rejects_aware_cursor(client):
+    cursor = base64.urlsafe_b64encode(b'["2026-01-01T00:00:00+00:00","x"]').decode()
+    create_chat(client)
+    assert client.get(f"{CHATS}?cursor={cursor}").status_code == 400
+
+
+def test_list_chats_pages_with_cursor(client):
+    ids = [create_chat(client, f"Chat {i}") for i in range(3)]
+    first = client.get(f"{CHATS}?limit=2").json()
+    assert [chat["id"] for chat in first["chats"]] == ids[:0:-1]
+    second = client.get(f"{CHATS}?limit=2&cursor={first['next_cursor']}").json()
+    assert [chat["id"] for chat in second["chats"]] == ids[:1]
+
+
+def patch_title(client, chat_id, title, if_match=None):
+    headers = {"If-Match": if_match} if if_match is not None else {}
+    return client.patch(
+        f"{CHATS}{chat_id}",
+        json=[{"op": "replace", "path": "/title", "value": title}],
+        headers=headers,
+    )
+
+
+def test_patch_returns_new_etag(client):
+    chat_id = create_chat(client)
+    etag = client.get(f"{CHATS}{chat_id}").headers["ETag"]
+    response = patch_title(client, chat_id, "Renamed", etag)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert client.get(f"{CHATS}{chat_id}").json()["title"] == "Renamed"
+
+
+def test_if_match_accepts_any_listed_version(client):
+    chat_id = create_chat(client)
+    etag = client.get(f"{CHATS}{chat_id}").headers["ETag"]
+    assert patch_title(client, chat_id, "Renamed", f'"99", {etag}').status_code == 200
+
+
+@pytest.mark.parametrize("if_match", ['W/"{version}"', '"99"', '"other"'])
+def test_if_match_without_a_strong_match_fails(client, if_match):
+    chat_id = create_chat(client)
+    version = client.get(f"{CHATS}{chat_id}").json()["version"]
+    response = patch_title(client, chat_id, "Renamed", if_match.format(version=version))
+    assert response.status_code == 412
+    assert response.headers["ETag"] == f'"{version}"'
+    assert client.get(f"{CHATS}{chat_id}").json()["title"] == "Chat"
+
+
+def test_if_match_star_and_malformed(client):
+    chat_id = create_chat(client)
+    assert patch_title(client, chat_id, "Renamed", "*").status_code == 200
+    assert patch_title(client, chat_id, "Again", "1").status_code == 400
+
+
+def test_changes_catch_a_client_up(client, monkeypatch):
+    chat_id = create_chat(client)
+    patch_title(client, chat_id, "One")
+    patch_title(client, chat_id, "Two")
+    changes = client.get(f"{CHATS}{chat_id}/changes?since=2").json()
+    assert changes["version"] == 3
+    assert [change["version"] for change in changes["changes"]] == [3]
+    assert client.get(f"{CHATS}{chat_id}/changes?since=3").json()["changes"] == []
+
+    monkeypatch.setattr(settings, "chat_change_log_size", 1)
+    other = create_chat(client)
+    patch_title(client, other, "One")
+    patch_title(client, other, "Two")
+    # Version 2 has left the log, so a client at version 1 must refetch
+    assert client.get(f"{CHATS}{other}/changes?since=1").status_code == 410
+
+
+def test_changes_apply_to_the_document(client):
+    chat_id = create_chat(client)
+    document = chat_document(client.get(f"{CHATS}{chat_id}").json())
+    patch_title(client, chat_id, "One")
+    assert client.post(f"{CHATS}{chat_id}/share").status_code == 200
+    patch_title(client, chat_id, "Two")
+    changes = client.get(f"{CHATS}{chat_id}/changes?since=1").json()["changes"]
+    assert [change["version"] for change in changes] == [2, 3, 4]
+    # Sharing changes the version but nothing a client can patch
+    assert changes[1]["operations"] == []
+    for change in changes:
+        document = apply_patch(document, change["operations"])
+    assert document == chat_document(client.get(f"{CHATS}{chat_id}").json())
+
+
+def test_append_and_edit_messages(client):
+    chat_id = create_chat(client)
+    appended = client.post(
+        f"{CHATS}{chat_id}/messages",
+        json={"messages": [{"id": "m1", "content": "hi"}], "title": "Greeting", "version": 1},
+    )
+    assert appended.status_code == 200
+    assert appended.json()["version"] == 2
+    assert client.post(f"{CHATS}{chat_id}/messages", json={"messages": [], "version": 1}).status_code == 409
+
+    # The message keeps the id in the path whatever the body says
+    edited = client.put(f"{CHATS}{chat_id}/messages/m1", json={"message": {"id": "m9", "content": "hello"}})
+    assert edited.status_code == 200
+    chat = client.get(f"{CHATS}{chat_id}").json()
+    assert chat["title"] == "Greeting"
+    assert chat["messages"] == [{"id": "m1", "content": "hello"}]
+    assert client.put(f"{CHATS}{chat_id}/messages/m9", json={"message": {}}).status_code == 404
@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.errors import VersionConflict
+
+START = datetime(2026, 1, 1)
+
+
+def chat_record(chat_id, user_id="user-1", minutes=0, **fields):
+    at = START + timedelta(minutes=minutes)
+    return {
+        "id": chat_id,
+        "user_id": user_id,
+        "title": chat_id,
+        "messages": [],
+        "models": [],
+        "system": None,
+        "tags": [],
+        "created_at": at,
+        "updated_at": at,
+        "share_id": None,
+        "archived": False,
+        "pinned": False,
+        "folder_id": None,
+        "version": 1,
+        **fields,
+    }
+
+
+def test_update_chat_message_keeps_ids_in_sync(store):
+    store.insert_chat(chat_record("c1", messages=[{"id": "m1", "content": "a"}, {"id": "m2", "content": "b"}]))
+    chat = store.update_chat_message("c1", "user-1", "m2", {"id": "m3", "content": "c"}, {}, 1)
+    assert chat["version"] == 2
+    # The replaced message is found by its new id, not its old one
+    assert store.update_chat_message("c1", "user-1", "m2", {"id": "m2", "content": "d"}, {}) is None
+    store.update_chat_message("c1", "user-1", "m3", {"id": "m3", "content": "e"}, {})
+    assert store.get_chat("c1", "user-1")["messages"] == [{"id": "m1", "content": "a"}, {"id": "m3", "content": "e"}]
+
+
+def test_update_chat_message_checks_version(store):
+    store.insert_chat(chat_record("c1", messages=[{"id": "m1", "content": "a"}]))
+    with pytest.raises(VersionConflict) as e:
+        store.update_chat_message("c1", "user-1", "m1", {"id": "m1", "content": "b"}, {}, 5)
+    assert e.value.version == 1
+
+
+def test_chats_are_owned(store):
+    store.insert_chat(chat_record("c1"))
+    assert store.get_chat("c1", "user-2") is None
+    assert store.patch_chat("c1", "user-2", [{"op": "replace", "path": "/title", "value": "x"}], {}) is None
+
+
+def listed(store, limit, after=None, offset=0, **filters):
+    return [chat["id"] for chat in store.list_chats("user-1", False, limit, after, offset, **filters)]
+
+
+def test_list_chats_walks_keyset_newest_first(store):
+    for i in range(5):
+        store.insert_chat(chat_record(f"c{i}", minutes=i))
+    # Ties on updated_at are broken by id
+    store.insert_chat(chat_record("c3b", minutes=3))
+    store.insert_chat(chat_record("other", user_id="user-2", minutes=9))
+    store.insert_chat(chat_record("old", minutes=9, archived=True))
+
+    assert listed(store, 3) == ["c4", "c3b", "c3"]
+    assert listed(store, 3, after=(START + timedelta(minutes=3), "c3")) == ["c2", "c1", "c0"]
+    assert listed(store, 2, offset=2) == ["c3", "c2"]
+
+
+def test_list_chats_by_folder_and_tag(store):
+    store.insert_chat(chat_record("a", minutes=1, folder_id="f1", tags=["x", "y"]))
+    store.insert_chat(chat_record("b", minutes=2, folder_id="f1", tags=["y"]))
+    store.insert_chat(chat_record("c", minutes=3))
+    assert listed(store, 10, folder_id="f1") == ["b", "a"]
+    assert listed(store, 10, tag="y") == ["b", "a"]
+    assert listed(store, 1, after=(START + timedelta(minutes=2), "b"), tag="y") == ["a"]
+    assert listed(store, 10, tag="x") == ["a"]
+
+
+def test_patch_chat_logs_changes(store):
+    store.insert_chat(chat_record("c1", messages=[{"id": "m1", "content": "a"}]))
+    operations = [
+        {"op": "add", "path": "/messages/-", "value": {"id": "m2", "content": "b"}},
+        {"op": "replace", "path": "/messages/0/content", "value": "A"},
+    ]
+    chat = store.patch_chat("c1", "user-1", operations, {}, {1, 5})
+    assert chat["version"] == 2
+    assert store.get_chat("c1", "user-1")["messages"] == [{"id": "m1", "content": "A"}, {"id": "m2", "content": "b"}]
+    with pytest.raises(VersionConflict):
+        store.patch_chat("c1", "user-1", [{"op": "replace", "path": "/title", "value": "x"}], {}, {1})
+
+    store.patch_chat("c1", "user-1", [{"op": "remove", "path": "/messages/1"}], {})
+    version, changes = store.list_chat_changes("c1", "user-1", 1)
+    assert version == 3
+    assert [change["version"] for change in changes] == [2, 3]
+    assert changes[0]["operations"] == operations
+    assert store.get_chat("c1", "user-1")["messages"] == [{"id": "m1", "content": "A"}]
+
+
+def test_chat_round_trip_and_delete(store):
+    record = chat_record("c1", messages=[{"id": "m1", "content": "a"}], tags=["x"], models=[{"id": "llama"}])
+    store.insert_chat(record)
+    assert store.get_chat("c1", "user-1").items() >= record.items()
+    assert store.update_chat("c1", "user-1", {"title": "Renamed"})["title"] == "Renamed"
+    assert store.delete_chat("c1", "user-1")
+    assert store.get_chat("c1", "user-1") is None
+    assert store.list_chat_changes("c1", "user-1", 0) is None
+    assert listed(store, 10, tag="x") == []
+    assert not store.delete_chat("c1", "user-1")
+
+
+def message_record(message_id, minutes, parent_id=None, user_id="user-1"):
+    at = START + timedelta(minutes=minutes)
+    return {
+        "id": message_id, "user_id": user_id, "chat_id": "c1", "parent_id": parent_id,
+        "content": message_id, "role": "user", "model": None, "metadata": None,
+        "created_at": at, "updated_at": at,
+    }
+
+
+def test_messages_and_their_children(store):
+    store.insert_message(message_record("m0", 0))
+    store.insert_message(message_record("m1", 1, parent_id="m0"))
+    store.insert_message(message_record("m2", 2, parent_id="m0"))
+    store.insert_message(message_record("theirs", 3, user_id="user-2"))
+    assert store.get_message("m0", "user-1")["children_ids"] == ["m1", "m2"]
+    listing = store.list_messages("c1", "user-1")
+    assert [(m["id"], m["children_ids"]) for m in listing] == [("m0", ["m1", "m2"]), ("m1", []), ("m2", [])]
+    assert store.delete_message("m1", "user-1")
+    assert not store.delete_message("theirs", "user-1")
+    assert store.get_message("m0", "user-1")["children_ids"] == ["m2"]
+
+
+def test_folders_and_tags(store):
+    for kind in ("folder", "tag"):
+        insert, update = getattr(store, f"insert_{kind}"), getattr(store, f"update_{kind}")
+        listing, delete = getattr(store, f"list_{kind}s"), getattr(store, f"delete_{kind}")
+        for record_id, name in (("b", "Beta"), ("a", "Alpha")):
+            insert({"id": record_id, "user_id": "user-1", "name": name, "created_at": START, "updated_at": START})
+        assert [record["name"] for record in listing("user-1")] == ["Alpha", "Beta"]
+        assert update("a", "user-1", {"name": "Gamma"})["name"] == "Gamma"
+        assert update("a", "user-2", {"name": "Stolen"}) is None
+        assert delete("b", "user-1")
+        assert [record["id"] for record in listing("user-1")] == ["a"]
+        assert listing("user-2") == []
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+from app.db.memory import MemoryChatStore, SortedIndex
+
+T = [datetime(2026, 1, 1) + timedelta(minutes=i) for i in range(10)]
+
+
+def test_sorted_index_pages_newest_first():
+    index = SortedIndex()
+    for i in (3, 1, 4, 0, 2):
+        index.add("k", (T[i], f"id{i}"))
+    assert index.oldest("k") == ["id0", "id1", "id2", "id3", "id4"]
+    assert index.newest("k", 2) == ["id4", "id3"]
+    assert index.newest("k", 2, after=(T[3], "id3")) == ["id2", "id1"]
+    assert index.newest("k", 2, offset=4) == ["id0"]
+    assert index.newest("missing", 5) == []
+
+
+def test_sorted_index_remove():
+    index = SortedIndex()
+    index.add("k", (T[0], "a"))
+    index.add("k", (T[0], "b"))
+    index.remove("k", (T[0], "a"))
+    index.remove("k", (T[1], "a"))
+    index.remove("missing", (T[0], "a"))
+    assert index.oldest("k") == ["b"]
+    index.remove("k", (T[0], "b"))
+    assert index._groups == {}
+
+
+def chat(chat_id, minute, **fields):
+    return {
+        "id": chat_id,
+        "user_id": "user-1",
+        "title": chat_id,
+        "messages": [],
+        "models": [],
+        "system": None,
+        "tags": [],
+        "created_at": T[minute],
+        "updated_at": T[minute],
+        "share_id": None,
+        "archived": False,
+        "pinned": False,
+        "folder_id": None,
+        "version": 1,
+        **fields,
+    }
+
+
+def ids(store, **filters):
+    return [record["id"] for record in store.list_chats("user-1", False, 10, **filters)]
+
+
+def test_indexes_follow_chat_updates():
+    store = MemoryChatStore()
+    store.insert_chat(chat("a", 0, tags=["x"], folder_id="f1"))
+    store.insert_chat(chat("b", 1, tags=["x"]))
+
+    store.update_chat("a", "user-1", {"updated_at": T[5], "tags": ["y"], "folder_id": "f2"})
+    assert ids(store) == ["a", "b"]
+    assert ids(store, tag="x") == ["b"]
+    assert ids(store, tag="y") == ["a"]
+    assert ids(store, folder_id="f1") == []
+    assert ids(store, folder_id="f2") == ["a"]
+
+    store.update_chat("b", "user-1", {"archived": True})
+    assert ids(store) == ["a"]
+    assert [record["id"] for record in store.list_chats("user-1", True, 10)] == ["b"]
+
+    store.delete_chat("a", "user-1")
+    assert ids(store) == [] and ids(store, tag="y") == []
+
+
+def test_messages_indexed_by_chat():
+    store = MemoryChatStore()
+    for i, message_id in ((2, "m2"), (0, "m0"), (1, "m1")):
+        store.insert_message({
+            "id": message_id, "chat_id": "c1", "user_id": "user-1", "parent_id": "m0" if i else None,
+            "created_at": T[i],
+        })
+    assert [message["id"] for message in store.list_messages("c1", "user-1")] == ["m0", "m1", "m2"]
+    assert store.get_message("m0", "user-1")["children_ids"] == ["m1"]
+    store.delete_message("m1", "user-1")
+    assert [message["id"] for message in store.list_messages("c1", "user-1")] == ["m0", "m2"]
+    assert store.get_message("m0", "user-1")["children_ids"] == []
+
+
+def test_folders_and_tags_by_user():
+    store = MemoryChatStore()
+    store.insert_folder({"id": "f2", "user_id": "user-1", "name": "b"})
+    store.insert_folder({"id": "f1", "user_id": "user-1", "name": "a"})
+    store.insert_tag({"id": "t1", "user_id": "user-2", "name": "x"})
+    assert [folder["id"] for folder in store.list_folders("user-1")] == ["f1", "f2"]
+    assert store.list_tags("user-1") == []
+    assert store.delete_folder("f1", "user-1")
+    assert not store.delete_tag("t1", "user-1")
+    assert [folder["id"] for folder in store.list_folders("user-1")] == ["f2"]
@@ -0,0 +1,33 @@
+import base64
+from datetime import datetime
+
+import pytest
+
+from app.services.pagination import InvalidCursor, decode_cursor, encode_cursor, next_page
+
+
+def test_cursor_round_trip():
+    at = datetime(2026, 5, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor(at, "chat-1")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (at, "chat-1")
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", "e30", encode_cursor(datetime(2026, 1, 1), "x")[:-3]])
+def test_decode_rejects_foreign_cursors(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_decode_rejects_aware_timestamps():
+    cursor = base64.urlsafe_b64encode(b'["2026-01-01T00:00:00+00:00","x"]').decode()
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_next_page():
+    records = [{"id": str(i), "updated_at": datetime(2026, 1, 1, 0, i)} for i in range(3)]
+    assert next_page(records, 3) == (records, None)
+    page, cursor = next_page(records, 2)
+    assert page == records[:2]
+    assert decode_cursor(cursor) == (records[1]["updated_at"], "1")
@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import pytest
+
+from app.db.patch import PatchError, PatchTestFailed, apply_patch, replace_operations
+
+
+def document(**fields):
+    return {
+        "title": "Chat",
+        "models": [],
+        "system": None,
+        "tags": ["a"],
+        "messages": [{"id": "m0", "content": "hi"}, {"id": "m1", "content": "there", "rating": 0}],
+        "archived": False,
+        "pinned": False,
+        "folder_id": None,
+        **fields,
+    }
+
+
+def test_operations():
+    patched = apply_patch(document(), [
+        {"op": "replace", "path": "/messages/1/rating", "value": 1},
+        {"op": "add", "path": "/messages/-", "value": {"id": "m2", "content": "new"}},
+        {"op": "add", "path": "/tags/0", "value": "first"},
+        {"op": "remove", "path": "/messages/0/content"},
+        {"op": "copy", "from": "/title", "path": "/system"},
+        {"op": "move", "from": "/tags/1", "path": "/tags/0"},
+        {"op": "test", "path": "/messages/2/id", "value": "m2"},
+        {"op": "replace", "path": "/pinned", "value": True},
+    ])
+    assert patched["messages"] == [
+        {"id": "m0"},
+        {"id": "m1", "content": "there", "rating": 1},
+        {"id": "m2", "content": "new"},
+    ]
+    assert patched["tags"] == ["a", "first"]
+    assert patched["system"] == "Chat"
+    assert patched["pinned"] is True
+
+
+def test_escaped_pointer_tokens():
+    patched = apply_patch(document(), [{"op": "add", "path": "/messages/0/a~1b~0c", "value": 1}])
+    assert patched["messages"][0]["a/b~c"] == 1
+
+
+def test_patch_is_atomic():
+    original = document()
+    with pytest.raises(PatchError):
+        apply_patch(original, [
+            {"op": "replace", "path": "/title", "value": "Renamed"},
+            {"op": "remove", "path": "/messages/5"},
+        ])
+    assert original == document()
+
+
+def test_failed_test_operation():
+    with pytest.raises(PatchTestFailed):
+        apply_patch(document(), [{"op": "test", "path": "/title", "value": "Other"}])
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        {"op": "replace", "path": "/user_id", "value": "admin"},
+        {"op": "replace", "path": "title", "value": "x"},
+        {"op": "remove", "path": "/title"},
+        {"op": "replace", "path": "/archived", "value": "yes"},
+        {"op": "add", "path": "/messages/-", "value": "not an object"},
+        {"op": "add", "path": "/tags/-", "value": 1},
+        {"op": "add", "path": "/messages/01", "value": {}},
+        {"op": "add", "path": "/messages/3", "value": {}},
+        {"op": "replace", "path": "/messages/2", "value": {}},
+        {"op": "move", "from": "/messages/0", "path": "/messages/0/child"},
+        {"op": "add", "path": "/title"},
+        {"op": "frobnicate", "path": "/title"},
+        "not an operation",
+    ],
+)
+def test_invalid_patches(operation):
+    with pytest.raises(PatchError):
+        apply_patch(document(), [operation])
+
+
+def test_replace_operations_log_document_fields_only():
+    at = datetime(2026, 1, 1)
+    assert replace_operations({"title": "x", "updated_at": at, "share_id": "s1"}) == [
+        {"op": "replace", "path": "/title", "value": "x"},
+    ]
@@ -1,3 +1,12 @@
 from .auth import create_access_token, decode_token, get_current_user, oauth2_scheme
+from .identity import IDENTITY_HEADER, sign_identity, verify_identity
 
-__all__ = ["create_access_token", "decode_token", "get_current_user", "oauth2_scheme"]
+__all__ = [
+    "create_access_token",
+    "decode_token",
+    "get_current_user",
+    "oauth2_scheme",
+    "IDENTITY_HEADER",
+    "sign_identity",
+    "verify_identity",
+]
@@ -1,15 +1,18 @@
+import os
 import jwt
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 
+from .identity import IDENTITY_HEADER, verify_identity
+
 # These would be imported from environment variables in a real implementation
 JWT_SECRET_KEY = "your-secret-key"
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRES_IN = 30  # days
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
 
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
@@ -40,8 +43,24 @@ def decode_token(token: str) -> Dict[str, Any]:
         )
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
-    """Get the current user from the JWT token"""
+async def get_current_user(request: Request, token: Optional[str] = Depends(oauth2_scheme)) -> Dict[str, Any]:
+    """Get the current user from the gateway identity header or the JWT token"""
+    # The gateway has already verified the token; trust its signed identity
+    identity = request.headers.get(IDENTITY_HEADER)
+    if identity:
+        # Read as the services' settings do, so it matches what the gateway signs with
+        secret = os.getenv("INTERNAL_IDENTITY_SECRET", os.getenv("JWT_SECRET_KEY", JWT_SECRET_KEY))
+        payload = verify_identity(identity, secret)
+        if payload is not None and payload.get("sub") is not None:
+            return payload
+    
+    if token is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
     payload = decode_token(token)
     
     user_id = payload.get("sub")
@@ -1,22 +1,22 @@
 import json
 import logging
+import os
 from contextlib import contextmanager
 from typing import Any, Optional
 
-from sqlalchemy import create_engine, MetaData, types
+from sqlalchemy import create_engine, event, MetaData, types
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.pool import QueuePool, NullPool
 from sqlalchemy.sql.type_api import _T
 from sqlalchemy import Dialect
 
-# Will be imported from environment variables in a real implementation
-DATABASE_URL = "sqlite:///./webui.db"
-DATABASE_SCHEMA = None
-DATABASE_POOL_SIZE = 0
-DATABASE_POOL_MAX_OVERFLOW = 10
-DATABASE_POOL_RECYCLE = 3600
-DATABASE_POOL_TIMEOUT = 30
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./webui.db")
+DATABASE_SCHEMA = os.getenv("DATABASE_SCHEMA") or None
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "0"))
+DATABASE_POOL_MAX_OVERFLOW = int(os.getenv("DATABASE_POOL_MAX_OVERFLOW", "10"))
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", "3600"))
+DATABASE_POOL_TIMEOUT = int(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
 
 log = logging.getLogger(__name__)
 
@@ -41,6 +41,14 @@ if "sqlite" in SQLALCHEMY_DATABASE_URL:
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
     )
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL lets several worker processes read while one writes
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
 else:
     if DATABASE_POOL_SIZE > 0:
         engine = create_engine(
@@ -1,3 +1,4 @@
+from .compression import CompressionMiddleware, setup_compression
 from .cors import setup_cors
 
-__all__ = ["setup_cors"]
+__all__ = ["CompressionMiddleware", "setup_compression", "setup_cors"]
@@ -0,0 +1,223 @@
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Content types streamed event by event; every chunk is flushed to the client
+STREAMING_CONTENT_TYPES = ("text/event-stream", "application/x-ndjson", "application/jsonl")
+
+# Content types that are already compressed and not worth compressing again
+INCOMPRESSIBLE_CONTENT_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zstd",
+    "application/pdf",
+    "application/octet-stream",
+)
+
+
+class GzipCompressor:
+    encoding = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        output = self._compressor.compress(data)
+        if flush:
+            output += self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return output
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class ZstdCompressor:
+    encoding = "zstd"
+
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        output = self._compressor.compress(data)
+        if flush:
+            output += self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return output
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def parse_accept_encoding(value: str) -> Dict[str, float]:
+    """
+    Parse an Accept-Encoding header into encoding -> q-value
+    """
+    encodings: Dict[str, float] = {}
+    for item in value.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, number = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        encodings[name] = q
+    return encodings
+
+
+def choose_encoding(accept_encoding: str, preferred: List[str]) -> Optional[str]:
+    """
+    Pick the first preferred encoding the client accepts, or None
+    """
+    accepted = parse_accept_encoding(accept_encoding)
+    for encoding in preferred:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with zstd or gzip according to Accept-Encoding.
+
+    Buffered responses are compressed only above minimum_size. Event streams
+    (SSE, NDJSON) are compressed chunk by chunk with a flush after each one,
+    so every event reaches the client as soon as it is produced. Responses
+    that already carry a Content-Encoding are passed through untouched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        zstd_level: int = 3,
+        encodings: Tuple[str, ...] = ("zstd", "gzip"),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self.encodings = [e for e in encodings if e != "zstd" or zstandard is not None]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def compressor(self, encoding: str):
+        if encoding == "zstd":
+            return ZstdCompressor(self.zstd_level)
+        return GzipCompressor(self.gzip_level)
+
+
+class CompressionResponder:
+    """
+    Per-response state for CompressionMiddleware
+    """
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+        self.streaming = False
+        self.passthrough = False
+        self.started = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Hold the headers until the first body chunk decides the encoding
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            if not self._should_compress(body, more_body):
+                self.passthrough = True
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["content-encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            self.compressor = self.middleware.compressor(self.encoding)
+
+            if not more_body:
+                # Whole response in one message: compress it in one go
+                compressed = self.compressor.compress(body) + self.compressor.finish()
+                headers["content-length"] = str(len(compressed))
+                await self._send(self.start_message)
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+
+            del headers["content-length"]
+            await self._send(self.start_message)
+
+        if more_body:
+            chunk = self.compressor.compress(body, flush=self.streaming)
+        else:
+            chunk = self.compressor.compress(body) + self.compressor.finish()
+        if chunk or not more_body:
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _should_compress(self, body: bytes, more_body: bool) -> bool:
+        status = self.start_message["status"]
+        if status < 200 or status in (204, 304):
+            return False
+
+        headers = Headers(raw=self.start_message["headers"])
+        if "content-encoding" in headers:
+            return False
+
+        content_type = headers.get("content-type", "").lower()
+        if content_type.startswith(INCOMPRESSIBLE_CONTENT_TYPES):
+            return False
+
+        self.streaming = content_type.startswith(STREAMING_CONTENT_TYPES)
+        if self.streaming:
+            return True
+
+        content_length = headers.get("content-length")
+        if content_length is not None and content_length.isdigit():
+            return int(content_length) >= self.middleware.minimum_size
+        return more_body or len(body) >= self.middleware.minimum_size
+
+
+def setup_compression(app: FastAPI, minimum_size: int = 1024) -> None:
+    """Setup response compression middleware for the FastAPI app"""
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size)
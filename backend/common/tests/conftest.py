@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The directory holding the common package, as PYTHONPATH provides it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
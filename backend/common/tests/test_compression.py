@@ -0,0 +1,100 @@
+import asyncio
+import zlib
+
+import pytest
+
+from common.middleware.compression import CompressionMiddleware, choose_encoding, parse_accept_encoding
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip, zstd;q=0.5, br;q=x, ,identity;q=0") == {
+        "gzip": 1.0,
+        "zstd": 0.5,
+        "br": 0.0,
+        "identity": 0.0,
+    }
+
+
+@pytest.mark.parametrize(
+    "accept, chosen",
+    [
+        ("gzip, zstd", "zstd"),
+        ("gzip", "gzip"),
+        ("zstd;q=0, gzip", "gzip"),
+        ("*", "zstd"),
+        ("*, zstd;q=0", "gzip"),
+        ("br", None),
+        ("", None),
+    ],
+)
+def test_choose_encoding(accept, chosen):
+    assert choose_encoding(accept, ["zstd", "gzip"]) == chosen
+
+
+def app_sending(headers, *chunks, status=200):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+
+    return app
+
+
+def run(app, accept="gzip", method="GET", minimum_size=10):
+    middleware = CompressionMiddleware(app, minimum_size=minimum_size, encodings=("gzip",))
+    scope = {"type": "http", "method": method, "headers": [(b"accept-encoding", accept.encode())]}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    start, bodies = messages[0], [m["body"] for m in messages[1:]]
+    return {k.decode(): v.decode() for k, v in start["headers"]}, bodies
+
+
+def gunzip(data):
+    return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+
+
+JSON = [(b"content-type", b"application/json")]
+
+
+def test_compresses_large_buffered_response():
+    body = b'{"text": "' + b"a" * 100 + b'"}'
+    headers, bodies = run(app_sending(JSON + [(b"content-length", str(len(body)).encode())], body))
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert int(headers["content-length"]) == len(bodies[0])
+    assert gunzip(bodies[0]) == body
+
+
+@pytest.mark.parametrize(
+    "headers, body, accept, method",
+    [
+        (JSON, b"{}", "gzip", "GET"),
+        (JSON, b"a" * 100, "identity", "GET"),
+        (JSON, b"a" * 100, "gzip", "HEAD"),
+        ([(b"content-type", b"image/png")], b"a" * 100, "gzip", "GET"),
+        (JSON + [(b"content-encoding", b"br")], b"a" * 100, "gzip", "GET"),
+    ],
+)
+def test_passes_through(headers, body, accept, method):
+    sent_headers, bodies = run(app_sending(headers, body), accept=accept, method=method)
+    assert "content-encoding" not in sent_headers or sent_headers["content-encoding"] == "br"
+    assert bodies == [body]
+
+
+def test_flushes_each_event_of_a_stream():
+    events = [b"data: one\n\n", b"data: two\n\n", b""]
+    headers, bodies = run(app_sending([(b"content-type", b"text/event-stream")], *events))
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Each event can be decoded on arrival, before the stream ends
+    assert decompressor.decompress(bodies[0]) == events[0]
+    assert decompressor.decompress(bodies[1]) == events[1]
+    assert decompressor.decompress(bodies[2]) == b""
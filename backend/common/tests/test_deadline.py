@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+import pytest
+
+from common.utils.deadline import Deadline, DeadlineExceeded
+
+
+def test_from_header_reads_milliseconds():
+    deadline = Deadline.from_header("2000")
+    assert 1.9 < deadline.remaining() <= 2.0
+    assert Deadline.from_header(None).remaining() is None
+    assert Deadline.from_header("soon").remaining() is None
+
+
+def test_check_raises_once_expired():
+    Deadline.from_timeout(10).check()
+    with pytest.raises(DeadlineExceeded):
+        Deadline.from_timeout(0).check("searching")
+
+
+def test_run_returns_the_result_in_time():
+    async def answer():
+        await asyncio.sleep(0)
+        return 42
+
+    assert asyncio.run(Deadline.from_timeout(1).run(answer())) == 42
+
+
+def test_run_stops_waiting_for_blocking_work_in_a_thread():
+    async def main():
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            await Deadline.from_timeout(0.1).run(asyncio.to_thread(time.sleep, 0.5), "sleeping")
+        return time.monotonic() - started
+
+    assert asyncio.run(main()) < 0.4
+
+
+def test_header_value_forwards_the_remaining_time():
+    assert Deadline().header_value() is None
+    assert 900 <= int(Deadline.from_timeout(1).header_value()) <= 1000
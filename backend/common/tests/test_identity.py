@@ -0,0 +1,46 @@
+import time
+
+from common.auth.identity import _b64encode, _signature, sign_identity, verify_identity
+
+SECRET = "identity-test-secret"
+
+
+def test_round_trip():
+    claims = verify_identity(sign_identity({"sub": "user-1", "role": "admin"}, SECRET), SECRET)
+    assert claims["sub"] == "user-1"
+    assert claims["role"] == "admin"
+
+
+def test_rejects_other_secret():
+    assert verify_identity(sign_identity({"sub": "user-1"}, SECRET), "other") is None
+
+
+def test_rejects_tampered_payload():
+    signature = sign_identity({"sub": "user-1"}, SECRET).split(".")[1]
+    forged = sign_identity({"sub": "admin"}, SECRET).split(".")[0]
+    assert verify_identity(f"{forged}.{signature}", SECRET) is None
+
+
+def test_rejects_garbage():
+    for value in ("", "no-dot", "a.b.c", "!!!.???"):
+        assert verify_identity(value, SECRET) is None
+
+
+def test_rejects_non_ascii_signature():
+    payload = sign_identity({"sub": "user-1"}, SECRET).split(".")[0]
+    assert verify_identity(f"{payload}.sïgnature", SECRET) is None
+
+
+def test_rejects_claims_that_are_not_an_object():
+    payload = _b64encode(b'["user-1"]')
+    assert verify_identity(f"{payload}.{_signature(payload, SECRET)}", SECRET) is None
+
+
+def test_rejects_stale_and_expired(monkeypatch):
+    value = sign_identity({"sub": "user-1"}, SECRET)
+    assert verify_identity(value, SECRET) is not None
+    monkeypatch.setattr(time, "time", lambda: 10**10)
+    assert verify_identity(value, SECRET) is None
+    monkeypatch.undo()
+    expired = sign_identity({"sub": "user-1", "exp": time.time() - 1}, SECRET)
+    assert verify_identity(expired, SECRET) is None
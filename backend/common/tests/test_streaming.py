@@ -0,0 +1,71 @@
+import asyncio
+
+from starlette.background import BackgroundTask
+
+from common.utils.streaming import CancellableStreamingResponse
+
+
+def test_disconnect_cancels_the_stream():
+    events = []
+
+    async def body():
+        try:
+            yield b"first"
+            await asyncio.sleep(10)
+            yield b"never"
+        finally:
+            events.append("closed")
+
+    async def on_disconnect():
+        events.append("disconnected")
+
+    async def background():
+        events.append("background")
+
+    async def main():
+        sent = []
+        disconnect = asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if message.get("body") == b"first":
+                disconnect.set()
+
+        response = CancellableStreamingResponse(
+            body(), background=BackgroundTask(background), on_disconnect=on_disconnect
+        )
+        await asyncio.wait_for(response({"type": "http"}, receive, send), 2)
+        return response, [message.get("body") for message in sent]
+
+    response, bodies = asyncio.run(main())
+    assert response.disconnected
+    assert b"never" not in bodies
+    assert events == ["closed", "disconnected", "background"]
+
+
+def test_completed_stream_is_not_a_disconnect():
+    calls = []
+
+    async def body():
+        yield b"all"
+
+    async def on_disconnect():
+        calls.append("disconnected")
+
+    async def main():
+        async def receive():
+            await asyncio.sleep(10)
+
+        async def send(message):
+            pass
+
+        response = CancellableStreamingResponse(body(), on_disconnect=on_disconnect)
+        await asyncio.wait_for(response({"type": "http"}, receive, send), 2)
+        return response
+
+    assert not asyncio.run(main()).disconnected
+    assert calls == []
@@ -1,3 +1,18 @@
+from .deadline import DEADLINE_HEADER, Deadline, DeadlineExceeded, get_deadline
 from .logger import configure_logger, get_logger
+from .readiness import Readiness, setup_readiness
+from .server import serve
+from .streaming import CancellableStreamingResponse
 
-__all__ = ["configure_logger", "get_logger"]
+__all__ = [
+    "DEADLINE_HEADER",
+    "Deadline",
+    "DeadlineExceeded",
+    "get_deadline",
+    "CancellableStreamingResponse",
+    "Readiness",
+    "setup_readiness",
+    "serve",
+    "configure_logger",
+    "get_logger",
+]
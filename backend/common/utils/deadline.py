@@ -0,0 +1,98 @@
+import asyncio
+import time
+from typing import Awaitable, Optional, TypeVar
+
+from fastapi import Request
+
+T = TypeVar("T")
+
+# Time the caller is still willing to wait, in milliseconds, set by the API gateway
+DEADLINE_HEADER = "X-Request-Timeout"
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when a request's deadline passes before its work is done
+    """
+    pass
+
+
+class Deadline:
+    """
+    The point in time after which nobody is waiting for a request's result
+    """
+
+    def __init__(self, expires_at: Optional[float] = None):
+        # Monotonic clock; None means no deadline
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_timeout(cls, timeout: Optional[float]) -> "Deadline":
+        if timeout is None:
+            return cls()
+        return cls(time.monotonic() + timeout)
+
+    @classmethod
+    def from_header(cls, value: Optional[str]) -> "Deadline":
+        """
+        Build a deadline from a remaining-time header value in milliseconds
+        """
+        if not value:
+            return cls()
+        try:
+            return cls.from_timeout(max(0.0, float(value)) / 1000)
+        except ValueError:
+            return cls()
+
+    def remaining(self) -> Optional[float]:
+        """
+        Seconds left, or None if there is no deadline
+        """
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def check(self, operation: str = "request") -> None:
+        """
+        Raise DeadlineExceeded if the deadline has passed
+        """
+        if self.expired:
+            raise DeadlineExceeded(f"Deadline exceeded before {operation}")
+
+    async def run(self, awaitable: Awaitable[T], operation: str = "request") -> T:
+        """
+        Await something, cancelling it if the deadline passes first.
+
+        Cancellation only lands where the awaitable yields to the event loop,
+        so blocking work must be awaited through asyncio.to_thread. The
+        deadline then stops the wait on time, but the thread itself runs to
+        completion in the background and its result is discarded.
+        """
+        self.check(operation)
+        remaining = self.remaining()
+        if remaining is None:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"Deadline exceeded during {operation}")
+
+    def header_value(self) -> Optional[str]:
+        """
+        Remaining time to forward to the next hop
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return None
+        return str(int(remaining * 1000))
+
+
+def get_deadline(request: Request) -> Deadline:
+    """
+    FastAPI dependency returning the deadline the caller attached to a request
+    """
+    return Deadline.from_header(request.headers.get(DEADLINE_HEADER))
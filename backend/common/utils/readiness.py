@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# Component states
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+
+ReadinessProbe = Callable[[], Awaitable[bool]]
+
+
+class Component:
+    """
+    Something a service needs before it can take traffic, e.g. a loaded model
+    """
+
+    def __init__(self, name: str, probe: Optional[ReadinessProbe] = None):
+        self.name = name
+        self.probe = probe
+        self.state = STARTING
+        self.detail: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    def mark_ready(self) -> None:
+        if self.state != READY:
+            logger.info(f"Component {self.name} is ready")
+        self.state = READY
+        self.detail = None
+
+    def mark_failed(self, detail: str) -> None:
+        if self.state != FAILED:
+            logger.error(f"Component {self.name} is not ready: {detail}")
+        self.state = FAILED
+        self.detail = detail
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "state": self.state, "detail": self.detail}
+
+
+class Readiness:
+    """
+    Readiness of a service, derived from the readiness of its components.
+
+    Components are either marked ready by the code that initializes them
+    (model loading) or carry a probe that is re-run at most every
+    ``probe_interval`` seconds when readiness is asked for (DB reachable).
+    """
+
+    def __init__(self, probe_interval: float = 5.0, probe_timeout: float = 2.0):
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.components: Dict[str, Component] = {}
+        self._lock = asyncio.Lock()
+
+    def component(self, name: str, probe: Optional[ReadinessProbe] = None) -> Component:
+        """
+        Register a component, or get an already registered one
+        """
+        component = self.components.get(name)
+        if component is None:
+            component = Component(name, probe)
+            self.components[name] = component
+        return component
+
+    async def _run_probe(self, component: Component) -> None:
+        try:
+            ok = await asyncio.wait_for(component.probe(), self.probe_timeout)
+        except Exception as e:
+            component.mark_failed(str(e) or type(e).__name__)
+        else:
+            if ok:
+                component.mark_ready()
+            else:
+                component.mark_failed("Probe failed")
+        component.checked_at = time.monotonic()
+
+    async def refresh(self) -> None:
+        """
+        Re-run the probes whose last result is older than probe_interval
+        """
+        if not self._stale():
+            return
+        # Concurrent readiness requests share one probe run
+        async with self._lock:
+            await asyncio.gather(*(self._run_probe(component) for component in self._stale()))
+
+    def _stale(self) -> List[Component]:
+        now = time.monotonic()
+        return [
+            component
+            for component in self.components.values()
+            if component.probe is not None
+            and (component.checked_at is None or now - component.checked_at >= self.probe_interval)
+        ]
+
+    @property
+    def ready(self) -> bool:
+        return all(component.ready for component in self.components.values())
+
+    async def status(self) -> Dict[str, Any]:
+        await self.refresh()
+        return {
+            "status": READY if self.ready else "not_ready",
+            "components": {name: component.to_dict() for name, component in self.components.items()},
+        }
+
+
+def setup_readiness(app: FastAPI, readiness: Readiness, path: str = "/ready") -> None:
+    """
+    Serve a readiness endpoint answering 200 when every component is ready
+    and 503 otherwise, for orchestrator probes and the API gateway
+    """
+
+    @app.get(path, include_in_schema=False)
+    async def readiness_check():
+        status = await readiness.status()
+        return JSONResponse(status_code=200 if readiness.ready else 503, content=status)
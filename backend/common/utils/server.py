@@ -0,0 +1,38 @@
+import logging
+import os
+import stat
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Unix socket path to serve on instead of TCP, for services co-located with the gateway
+UDS_ENV = "SERVICE_UDS"
+
+
+def remove_stale_socket(path: str) -> None:
+    """
+    Remove a socket file left behind by a previous run so it can be bound again
+    """
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise RuntimeError(f"{path} exists and is not a socket")
+    os.unlink(path)
+
+
+def serve(app: Any, host: str = "0.0.0.0", port: int = 8000, uds: Optional[str] = None, **kwargs: Any) -> None:
+    """
+    Run an app with uvicorn on TCP, or on a Unix domain socket if one is given
+    or set in SERVICE_UDS
+    """
+    import uvicorn
+
+    uds = uds or os.getenv(UDS_ENV)
+    if uds:
+        remove_stale_socket(uds)
+        logger.info(f"Serving on unix socket {uds}")
+        uvicorn.run(app, uds=uds, **kwargs)
+    else:
+        uvicorn.run(app, host=host, port=port, **kwargs)
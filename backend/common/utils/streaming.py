@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Mapping, Optional
+
+from starlette.background import BackgroundTask
+from starlette.requests import ClientDisconnect
+from starlette.responses import ContentStream, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class CancellableStreamingResponse(StreamingResponse):
+    """
+    A streaming response that stops as soon as the client disconnects.
+
+    Under ASGI 2.4 servers Starlette only notices a disconnect on the next
+    write, so a stream waiting on a slow upstream keeps the upstream busy.
+    This watches for http.disconnect while streaming, cancels the body
+    iterator and calls on_disconnect, so the upstream request can be dropped
+    right away. The background task always runs, including on disconnect.
+    """
+
+    def __init__(
+        self,
+        content: ContentStream,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        background: Optional[BackgroundTask] = None,
+        on_disconnect: Optional[Callable[[], Awaitable[None]]] = None,
+    ):
+        super().__init__(content, status_code, headers, media_type, background)
+        self.on_disconnect = on_disconnect
+        self.disconnected = False
+
+    async def _wait_for_disconnect(self, receive: Receive) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await super().__call__(scope, receive, send)
+            return
+
+        stream = asyncio.ensure_future(self.stream_response(send))
+        watcher = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        try:
+            await asyncio.wait({stream, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if stream.done():
+                try:
+                    stream.result()
+                except (OSError, ClientDisconnect):
+                    # The client went away while we were writing to it
+                    self.disconnected = True
+            else:
+                self.disconnected = True
+        except asyncio.CancelledError:
+            # The server abandoned the request, e.g. an in-process caller closed it
+            self.disconnected = True
+            raise
+        finally:
+            for task in (stream, watcher):
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(stream, watcher, return_exceptions=True)
+
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            if self.disconnected and self.on_disconnect is not None:
+                try:
+                    await self.on_disconnect()
+                except Exception as e:
+                    logger.error(f"Error handling client disconnect: {e}")
+            if self.background is not None:
+                await self.background()
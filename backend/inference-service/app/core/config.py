@@ -23,6 +23,20 @@ class Settings(BaseSettings):
     openai_api_keys: List[str] = []
     openai_api_configs: Dict[str, Any] = {}
     
+    # Total time allowed for a model backend call, including streaming
+    aiohttp_client_timeout: int = int(os.getenv("AIOHTTP_CLIENT_TIMEOUT", "300"))
+    
+    # Streamed generations can be joined by other clients: bytes buffered for
+    # catch-up, seconds kept running without subscribers, and seconds a
+    # finished generation stays available for replay
+    generation_buffer_max_bytes: int = int(os.getenv("GENERATION_BUFFER_MAX_BYTES", str(8 * 1024 * 1024)))
+    generation_detach_grace: float = float(os.getenv("GENERATION_DETACH_GRACE", "10"))
+    generation_retention: float = float(os.getenv("GENERATION_RETENTION", "60"))
+    
+    # Readiness probes of the model backends (seconds between probes, timeout)
+    readiness_probe_interval: float = float(os.getenv("READINESS_PROBE_INTERVAL", "30"))
+    readiness_probe_timeout: float = float(os.getenv("READINESS_PROBE_TIMEOUT", "2"))
+    
     # Direct connections
     enable_direct_connections: bool = False
     
@@ -30,6 +44,11 @@ class Settings(BaseSettings):
     jwt_secret_key: str = os.getenv("JWT_SECRET_KEY", "your-secret-key")
     jwt_algorithm: str = "HS256"
     
+    # Shared secret for the identity header signed by the gateway
+    internal_identity_secret: str = os.getenv(
+        "INTERNAL_IDENTITY_SECRET", os.getenv("JWT_SECRET_KEY", "your-secret-key")
+    )
+    
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,8 @@
+from app.core.config import settings
+from common.utils.readiness import Readiness
+
+# Components the service needs before it can take traffic, served on /ready
+readiness = Readiness(
+    probe_interval=settings.readiness_probe_interval,
+    probe_timeout=settings.readiness_probe_timeout,
+)
@@ -3,7 +3,12 @@ from fastapi.responses import JSONResponse
 import logging
 
 from app.core.config import settings
+from app.core.readiness import readiness
 from app.routes import router as api_router
+from app.services.fanout import generation_broadcasts
+from app.services.generations import generation_stats
+from app.services.models import model_backends_ready
+from common.utils.readiness import setup_readiness
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -25,6 +30,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Add response compression middleware
+from common.middleware import setup_compression
+setup_compression(app)
+
 # Add error handling middleware
 @app.middleware("http")
 async def error_handling_middleware(request: Request, call_next):
@@ -45,6 +54,16 @@ app.include_router(api_router, prefix=settings.api_prefix)
 async def health_check():
     return {"status": "healthy"}
 
+# Readiness: a model backend must be reachable
+readiness.component("model_backends", model_backends_ready)
+setup_readiness(app, readiness)
+
+# Streamed generation counters, including ones cancelled by client disconnects
+@app.get("/generations")
+async def generations():
+    return {**generation_stats.to_dict(), "broadcasts": generation_broadcasts.to_dict()}
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    # Set SERVICE_UDS to serve on a Unix socket for a gateway on the same host
+    from common.utils.server import serve
+    serve(app, host="0.0.0.0", port=8001)
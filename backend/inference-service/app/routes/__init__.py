@@ -1,8 +1,9 @@
 from fastapi import APIRouter
-from app.routes import ollama, openai, models
+from app.routes import ollama, openai, models, generations
 
 router = APIRouter()
 
 router.include_router(ollama.router, prefix="/ollama", tags=["ollama"])
 router.include_router(openai.router, prefix="/openai", tags=["openai"])
 router.include_router(models.router, prefix="/models", tags=["models"])
+router.include_router(generations.router, prefix="/generations", tags=["generations"])
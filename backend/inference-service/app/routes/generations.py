@@ -0,0 +1,33 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+
+from app.services.fanout import generation_broadcasts, get_generation_owner
+from app.services.generations import generation_stats
+
+router = APIRouter()
+
+@router.get("/{generation_id}/stream")
+async def subscribe(
+    request: Request,
+    generation_id: str,
+    owner: Optional[str] = Depends(get_generation_owner),
+):
+    """
+    Attach to one of the caller's streamed generations: everything generated
+    so far, then live chunks until it ends. Finished generations are replayed
+    for a while.
+    """
+    if owner is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+        )
+    broadcast = generation_broadcasts.get(generation_id, owner)
+    if broadcast is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Generation not found",
+        )
+    generation_stats.attached += 1
+    return broadcast.to_response()
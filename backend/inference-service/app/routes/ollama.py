@@ -12,11 +12,19 @@ from app.models.ollama import (
     OllamaCompletionRequest,
     OllamaChatCompletionRequest,
 )
+from app.services.fanout import get_generation_id, get_generation_owner
+from common.utils.deadline import Deadline, get_deadline
 
 router = APIRouter()
 
 @router.post("/generate")
-async def generate(request: Request, form_data: OllamaGenerateRequest):
+async def generate(
+    request: Request,
+    form_data: OllamaGenerateRequest,
+    deadline: Deadline = Depends(get_deadline),
+    generation_id: Optional[str] = Depends(get_generation_id),
+    owner: Optional[str] = Depends(get_generation_owner),
+):
     """
     Generate text using Ollama
     """
@@ -42,10 +50,19 @@ async def generate(request: Request, form_data: OllamaGenerateRequest):
         url=f"{url}/api/generate",
         payload=form_data.model_dump_json(exclude_none=True).encode(),
         key=None,  # Ollama doesn't use API keys in the same way
+        deadline=deadline,
+        generation_id=generation_id,
+        owner=owner,
     )
 
 @router.post("/chat")
-async def chat(request: Request, form_data: OllamaChatRequest):
+async def chat(
+    request: Request,
+    form_data: OllamaChatRequest,
+    deadline: Deadline = Depends(get_deadline),
+    generation_id: Optional[str] = Depends(get_generation_id),
+    owner: Optional[str] = Depends(get_generation_owner),
+):
     """
     Chat with Ollama
     """
@@ -76,10 +93,19 @@ async def chat(request: Request, form_data: OllamaChatRequest):
         payload=json.dumps(payload),
         stream=form_data.stream,
         content_type="application/x-ndjson",
+        deadline=deadline,
+        generation_id=generation_id,
+        owner=owner,
     )
 
 @router.post("/completions")
-async def completions(request: Request, form_data: OllamaCompletionRequest):
+async def completions(
+    request: Request,
+    form_data: OllamaCompletionRequest,
+    deadline: Deadline = Depends(get_deadline),
+    generation_id: Optional[str] = Depends(get_generation_id),
+    owner: Optional[str] = Depends(get_generation_owner),
+):
     """
     Get completions from Ollama
     """
@@ -106,10 +132,19 @@ async def completions(request: Request, form_data: OllamaCompletionRequest):
         url=f"{url}/v1/completions",
         payload=json.dumps(payload),
         stream=payload.get("stream", False),
+        deadline=deadline,
+        generation_id=generation_id,
+        owner=owner,
     )
 
 @router.post("/chat/completions")
-async def chat_completions(request: Request, form_data: OllamaChatCompletionRequest):
+async def chat_completions(
+    request: Request,
+    form_data: OllamaChatCompletionRequest,
+    deadline: Deadline = Depends(get_deadline),
+    generation_id: Optional[str] = Depends(get_generation_id),
+    owner: Optional[str] = Depends(get_generation_owner),
+):
     """
     Get chat completions from Ollama
     """
@@ -136,4 +171,7 @@ async def chat_completions(request: Request, form_data: OllamaChatCompletionRequ
         url=f"{url}/v1/chat/completions",
         payload=json.dumps(payload),
         stream=payload.get("stream", False),
+        deadline=deadline,
+        generation_id=generation_id,
+        owner=owner,
     )
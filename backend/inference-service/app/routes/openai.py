@@ -7,15 +7,24 @@ from typing import Any, Dict, Optional
 
 from app.core.config import settings
 from app.services.openai import send_post_request, cleanup_response
+from app.services.utils import attach_to_generation, client_timeout, stream_response
 from app.models.openai import (
     OpenAIChatCompletionRequest,
     OpenAICompletionRequest,
 )
+from app.services.fanout import get_generation_id, get_generation_owner
+from common.utils.deadline import Deadline, get_deadline
 
 router = APIRouter()
 
 @router.post("/chat/completions")
-async def chat_completions(request: Request, form_data: OpenAIChatCompletionRequest):
+async def chat_completions(
+    request: Request,
+    form_data: OpenAIChatCompletionRequest,
+    deadline: Deadline = Depends(get_deadline),
+    generation_id: Optional[str] = Depends(get_generation_id),
+    owner: Optional[str] = Depends(get_generation_owner),
+):
     """
     Get chat completions from OpenAI
     """
@@ -53,10 +62,19 @@ async def chat_completions(request: Request, form_data: OpenAIChatCompletionRequ
         payload=json.dumps(payload),
         key=key,
         stream=payload.get("stream", False),
+        deadline=deadline,
+        generation_id=generation_id,
+        owner=owner,
     )
 
 @router.post("/completions")
-async def completions(request: Request, form_data: OpenAICompletionRequest):
+async def completions(
+    request: Request,
+    form_data: OpenAICompletionRequest,
+    deadline: Deadline = Depends(get_deadline),
+    generation_id: Optional[str] = Depends(get_generation_id),
+    owner: Optional[str] = Depends(get_generation_owner),
+):
     """
     Get completions from OpenAI
     """
@@ -77,10 +95,20 @@ async def completions(request: Request, form_data: OpenAICompletionRequest):
         payload=json.dumps(payload),
         key=key,
         stream=payload.get("stream", False),
+        deadline=deadline,
+        generation_id=generation_id,
+        owner=owner,
     )
 
 @router.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
-async def openai_proxy(request: Request, path: str, background_tasks: BackgroundTasks):
+async def openai_proxy(
+    request: Request,
+    path: str,
+    background_tasks: BackgroundTasks,
+    deadline: Deadline = Depends(get_deadline),
+    generation_id: Optional[str] = Depends(get_generation_id),
+    owner: Optional[str] = Depends(get_generation_owner),
+):
     """
     Proxy requests to OpenAI API
     """
@@ -109,8 +137,16 @@ async def openai_proxy(request: Request, path: str, background_tasks: Background
     # Get request body
     body = await request.body()
     
+    # A client re-sending a request that is still streaming joins it
+    if request.method == "POST":
+        attached = attach_to_generation(generation_id, owner, body)
+        if attached is not None:
+            return attached
+    
+    r = None
+    session = None
     try:
-        session = aiohttp.ClientSession(trust_env=True)
+        session = aiohttp.ClientSession(trust_env=True, timeout=client_timeout(deadline))
         r = await session.request(
             method=request.method,
             url=f"{url}/{path}",
@@ -124,18 +160,13 @@ async def openai_proxy(request: Request, path: str, background_tasks: Background
         
         # Check if response is SSE
         if "text/event-stream" in r.headers.get("Content-Type", ""):
-            return StreamingResponse(
-                r.content,
-                status_code=r.status,
-                headers=dict(r.headers),
-                background=BackgroundTasks(
-                    cleanup_response, response=r, session=session
-                ),
-            )
+            return stream_response(r, session, "OpenAI", body, owner=owner)
         else:
             response_data = await r.json()
+            await cleanup_response(r, session)
             return JSONResponse(content=response_data)
     except aiohttp.ClientError as e:
+        await cleanup_response(r, session)
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Error connecting to OpenAI API: {str(e)}",
@@ -0,0 +1,11 @@
+from .models import get_all_models, get_all_base_models
+from .ollama import get_ollama_url
+from .utils import cleanup_response, send_post_request
+
+__all__ = [
+    "get_all_models",
+    "get_all_base_models",
+    "get_ollama_url",
+    "cleanup_response",
+    "send_post_request",
+]
@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+import logging
+import re
+import secrets
+import time
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from fastapi import Request
+
+from app.core.config import settings
+from common.auth.identity import IDENTITY_HEADER, verify_identity
+from common.utils.streaming import CancellableStreamingResponse
+
+logger = logging.getLogger(__name__)
+
+# Identifies a streamed generation so other clients can attach to it
+GENERATION_ID_HEADER = "X-Generation-Id"
+
+# Ids are issued by this service (see BroadcastRegistry.start); anything else
+# cannot name a generation
+GENERATION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{32,128}$")
+
+
+def get_generation_id(request: Request) -> Optional[str]:
+    """
+    FastAPI dependency returning the generation id a client wants to join, if valid
+    """
+    value = request.headers.get(GENERATION_ID_HEADER)
+    if value and GENERATION_ID_PATTERN.match(value):
+        return value
+    return None
+
+
+def get_generation_owner(request: Request) -> Optional[str]:
+    """
+    FastAPI dependency returning the user verified by the gateway, who alone
+    may join the generations their requests start
+    """
+    identity = request.headers.get(IDENTITY_HEADER)
+    claims = verify_identity(identity, settings.internal_identity_secret) if identity else None
+    if not claims or claims.get("sub") is None:
+        return None
+    return str(claims["sub"])
+
+
+def payload_digest(payload: Union[str, bytes]) -> str:
+    """
+    Fingerprint of a request body, to tell a resent request from a different one
+    """
+    return hashlib.sha256(payload.encode() if isinstance(payload, str) else payload).hexdigest()
+
+
+class Broadcast:
+    """
+    One upstream generation stream shared by any number of subscribers.
+
+    A background task reads the upstream stream into a buffer; each
+    subscriber replays the buffer from the start and then follows live
+    chunks. When the last subscriber leaves, the upstream is kept for a
+    short grace period so a reloading client can attach again, and is
+    cancelled after that; a generation nobody can join is cancelled at once.
+    """
+
+    def __init__(
+        self,
+        generation_id: str,
+        owner: Optional[str],
+        digest: str,
+        status_code: int,
+        headers: Dict[str, str],
+        content: AsyncIterable[bytes],
+        on_cancel: Callable[[], Awaitable[None]],
+        on_close: Callable[[], Awaitable[None]],
+    ):
+        self.generation_id = generation_id
+        self.owner = owner
+        self.digest = digest
+        self.status_code = status_code
+        self.headers = headers
+        self.chunks: List[bytes] = []
+        # Chunks dropped from the front of the buffer once it is full
+        self.offset = 0
+        self.size = 0
+        self.subscribers = 0
+        self.done = False
+        self.cancelled = False
+        self.finished_at: Optional[float] = None
+        self._changed = asyncio.Event()
+        self._on_cancel = on_cancel
+        self._on_close = on_close
+        self._grace_task: Optional[asyncio.Task] = None
+        self._pump_task = asyncio.ensure_future(self._pump(content))
+
+    async def _pump(self, content: AsyncIterable[bytes]) -> None:
+        try:
+            async for chunk in content:
+                self._append(chunk)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Generation {self.generation_id} stream interrupted: {e}")
+        finally:
+            self.done = True
+            self.finished_at = time.monotonic()
+            self._notify()
+            await self._on_close()
+
+    def _append(self, chunk: bytes) -> None:
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+        # Keep the buffer bounded; subscribers joining later miss the start
+        while self.size > settings.generation_buffer_max_bytes and len(self.chunks) > 1:
+            self.size -= len(self.chunks.pop(0))
+            self.offset += 1
+        self._notify()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def subscribe(self) -> AsyncIterator[bytes]:
+        """
+        Buffered catch-up followed by live chunks until the generation ends
+        """
+        self._attach()
+        index = 0
+        try:
+            while True:
+                index = max(index, self.offset)
+                while index < self.offset + len(self.chunks):
+                    yield self.chunks[index - self.offset]
+                    index += 1
+                if self.done:
+                    return
+                changed = self._changed
+                if index < self.offset + len(self.chunks) or self.done:
+                    continue
+                await changed.wait()
+        finally:
+            self._detach()
+
+    def _attach(self) -> None:
+        self.subscribers += 1
+        if self._grace_task is not None:
+            self._grace_task.cancel()
+            self._grace_task = None
+
+    def _detach(self) -> None:
+        self.subscribers -= 1
+        if self.subscribers == 0 and not self.done:
+            self._grace_task = asyncio.ensure_future(self._cancel_after_grace())
+
+    @property
+    def joinable(self) -> bool:
+        """
+        Whether another client could attach; only the owner can find it
+        """
+        return self.owner is not None and settings.generation_detach_grace > 0
+
+    async def _cancel_after_grace(self) -> None:
+        # Nobody can reattach to a generation without an owner, so it is
+        # cancelled as soon as its client leaves, like any other stream
+        if self.joinable:
+            await asyncio.sleep(settings.generation_detach_grace)
+        if self.subscribers == 0 and not self.done:
+            self.cancelled = True
+            self._pump_task.cancel()
+            await self._on_cancel()
+
+    def to_response(self) -> CancellableStreamingResponse:
+        return CancellableStreamingResponse(
+            self.subscribe(),
+            status_code=self.status_code,
+            headers={**self.headers, GENERATION_ID_HEADER: self.generation_id},
+        )
+
+
+class BroadcastRegistry:
+    """
+    Running and recently finished generations, by owner and generation id.
+
+    Only a generation's owner can find it, so an id seen by another user is
+    no use to them. Generations without a verified owner cannot be joined.
+    """
+
+    def __init__(self):
+        self._broadcasts: Dict[Tuple[Optional[str], str], Broadcast] = {}
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        expired = [
+            key
+            for key, broadcast in self._broadcasts.items()
+            if broadcast.done and now - broadcast.finished_at >= settings.generation_retention
+        ]
+        for key in expired:
+            del self._broadcasts[key]
+
+    def get(self, generation_id: Optional[str], owner: Optional[str]) -> Optional[Broadcast]:
+        if generation_id is None or owner is None:
+            return None
+        self._expire()
+        return self._broadcasts.get((owner, generation_id))
+
+    def running(self, generation_id: Optional[str], owner: Optional[str]) -> Optional[Broadcast]:
+        """
+        A generation that is still streaming, which a new request can join
+        """
+        broadcast = self.get(generation_id, owner)
+        if broadcast is None or broadcast.done:
+            return None
+        return broadcast
+
+    def start(
+        self,
+        owner: Optional[str],
+        payload: Union[str, bytes],
+        status_code: int,
+        headers: Dict[str, str],
+        content: AsyncIterable[bytes],
+        on_cancel: Callable[[], Awaitable[None]],
+        on_close: Callable[[], Awaitable[None]],
+    ) -> Broadcast:
+        self._expire()
+        # Unguessable, so a generation cannot be found by trying ids
+        generation_id = secrets.token_urlsafe(32)
+        broadcast = Broadcast(
+            generation_id, owner, payload_digest(payload), status_code, headers, content, on_cancel, on_close
+        )
+        self._broadcasts[(owner, generation_id)] = broadcast
+        return broadcast
+
+    def to_dict(self) -> Dict[str, int]:
+        self._expire()
+        running = [broadcast for broadcast in self._broadcasts.values() if not broadcast.done]
+        return {
+            "running": len(running),
+            "finished": len(self._broadcasts) - len(running),
+            "subscribers": sum(broadcast.subscribers for broadcast in running),
+        }
+
+
+# Shared registry of streamed generations
+generation_broadcasts = BroadcastRegistry()
@@ -0,0 +1,100 @@
+import json
+import logging
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+def requested_max_tokens(payload: Union[str, bytes]) -> Optional[int]:
+    """
+    The generation length a request asked for, if it set one
+    """
+    try:
+        body = json.loads(payload)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(body, dict):
+        return None
+    options = body.get("options") or {}
+    for value in (
+        body.get("max_completion_tokens"),
+        body.get("max_tokens"),
+        options.get("num_predict") if isinstance(options, dict) else None,
+    ):
+        if isinstance(value, int) and value > 0:
+            return value
+    return None
+
+
+def is_token_chunk(line: bytes) -> bool:
+    """
+    Whether a streamed line carries a generated token.
+
+    Ollama streams one NDJSON object and OpenAI one SSE event per token, so
+    counting lines is a close approximation of the number of tokens.
+    """
+    line = line.strip()
+    return bool(line) and line != b"data: [DONE]" and not line.startswith(b":")
+
+
+class GenerationStats:
+    """
+    Counters for streamed generations
+    """
+
+    def __init__(self):
+        self.started = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.tokens_streamed = 0
+        self.tokens_before_cancel = 0
+        self.tokens_saved = 0
+        self.attached = 0
+        self.deduplicated = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "started": self.started,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "tokens_streamed": self.tokens_streamed,
+            "tokens_before_cancel": self.tokens_before_cancel,
+            # Estimated from the requested max tokens of cancelled generations
+            "tokens_saved": self.tokens_saved,
+            # Clients that joined a running generation instead of starting one
+            "attached": self.attached,
+            "deduplicated": self.deduplicated,
+        }
+
+
+generation_stats = GenerationStats()
+
+
+class Generation:
+    """
+    One streamed generation, counted as it is relayed to the client
+    """
+
+    def __init__(self, provider: str, payload: Union[str, bytes]):
+        self.provider = provider
+        self.max_tokens = requested_max_tokens(payload)
+        self.tokens = 0
+        generation_stats.started += 1
+
+    async def relay(self, content: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+        async for line in content:
+            if is_token_chunk(line):
+                self.tokens += 1
+                generation_stats.tokens_streamed += 1
+            yield line
+        generation_stats.completed += 1
+
+    async def cancel(self) -> None:
+        """
+        Record a generation abandoned by its client
+        """
+        generation_stats.cancelled += 1
+        generation_stats.tokens_before_cancel += self.tokens
+        if self.max_tokens is not None:
+            generation_stats.tokens_saved += max(0, self.max_tokens - self.tokens)
+        logger.info(f"Client disconnected, cancelled {self.provider} generation after {self.tokens} tokens")
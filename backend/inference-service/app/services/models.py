@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from app.core.config import settings
+from app.models.models import ModelResponse
+from app.services.utils import client_timeout
+
+logger = logging.getLogger(__name__)
+
+
+async def fetch_json(url: str, key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    GET a JSON document from a model backend, or None if it is unreachable
+    """
+    headers = {"Authorization": f"Bearer {key}"} if key else {}
+    try:
+        async with aiohttp.ClientSession(trust_env=True, timeout=client_timeout()) as session:
+            async with session.get(url, headers=headers) as r:
+                r.raise_for_status()
+                return await r.json()
+    except Exception as e:
+        logger.error(f"Error fetching models from {url}: {e}")
+        return None
+
+
+async def get_ollama_models() -> List[ModelResponse]:
+    if not settings.enable_ollama_api:
+        return []
+
+    responses = await asyncio.gather(
+        *[fetch_json(f"{url}/api/tags") for url in settings.ollama_base_urls]
+    )
+    models = []
+    for idx, response in enumerate(responses):
+        if not response:
+            continue
+        url = settings.ollama_base_urls[idx]
+        prefix_id = settings.ollama_api_configs.get(str(idx), settings.ollama_api_configs.get(url, {})).get("prefix_id")
+        for model in response.get("models", []):
+            model_id = f"{prefix_id}.{model['model']}" if prefix_id else model["model"]
+            models.append(
+                ModelResponse(
+                    id=model_id,
+                    name=model.get("name", model_id),
+                    owned_by="ollama",
+                )
+            )
+    return models
+
+
+async def get_openai_models() -> List[ModelResponse]:
+    if not settings.enable_openai_api:
+        return []
+
+    urls = settings.openai_api_base_urls
+    keys = settings.openai_api_keys
+    responses = await asyncio.gather(
+        *[fetch_json(f"{url}/models", keys[idx] if idx < len(keys) else None) for idx, url in enumerate(urls)]
+    )
+    models = []
+    for response in responses:
+        if not response:
+            continue
+        for model in response.get("data", []):
+            models.append(
+                ModelResponse(
+                    id=model["id"],
+                    name=model.get("name", model["id"]),
+                    owned_by="openai",
+                    created_at=model.get("created"),
+                )
+            )
+    return models
+
+
+async def get_all_base_models() -> List[ModelResponse]:
+    """
+    Models offered by the configured Ollama and OpenAI backends
+    """
+    ollama_models, openai_models = await asyncio.gather(get_ollama_models(), get_openai_models())
+    return ollama_models + openai_models
+
+
+async def get_all_models() -> List[ModelResponse]:
+    """
+    All available models
+    """
+    return await get_all_base_models()
+
+
+async def backend_reachable(url: str, key: Optional[str] = None) -> bool:
+    """
+    Check whether a model backend answers at all; auth errors still count
+    """
+    headers = {"Authorization": f"Bearer {key}"} if key else {}
+    try:
+        timeout = aiohttp.ClientTimeout(total=settings.readiness_probe_timeout)
+        async with aiohttp.ClientSession(trust_env=True, timeout=timeout) as session:
+            async with session.get(url, headers=headers) as r:
+                return r.status < 500
+    except Exception as e:
+        logger.debug(f"Model backend {url} is unreachable: {e}")
+        return False
+
+
+async def model_backends_ready() -> bool:
+    """
+    Readiness probe: at least one enabled model backend is reachable
+    """
+    checks = []
+    if settings.enable_ollama_api:
+        checks += [backend_reachable(f"{url}/api/version") for url in settings.ollama_base_urls]
+    if settings.enable_openai_api:
+        keys = settings.openai_api_keys
+        checks += [
+            backend_reachable(f"{url}/models", keys[idx] if idx < len(keys) else None)
+            for idx, url in enumerate(settings.openai_api_base_urls)
+        ]
+    if not checks:
+        return True
+    return any(await asyncio.gather(*checks))
@@ -0,0 +1,41 @@
+from typing import Optional, Union
+
+from app.core.config import settings
+from app.services.utils import cleanup_response, send_post_request as _send_post_request
+from common.utils.deadline import Deadline
+
+
+def get_ollama_url(url_idx: Optional[int] = None) -> str:
+    """
+    Get the Ollama base URL for an index, defaulting to the first one
+    """
+    return settings.ollama_base_urls[url_idx if url_idx is not None else 0]
+
+
+async def send_post_request(
+    url: str,
+    payload: Union[str, bytes],
+    stream: bool = True,
+    key: Optional[str] = None,
+    content_type: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+    generation_id: Optional[str] = None,
+    owner: Optional[str] = None,
+):
+    """
+    Send a request to an Ollama backend
+    """
+    return await _send_post_request(
+        url=url,
+        payload=payload,
+        stream=stream,
+        key=key,
+        content_type=content_type,
+        deadline=deadline,
+        provider="Ollama",
+        generation_id=generation_id,
+        owner=owner,
+    )
+
+
+__all__ = ["cleanup_response", "get_ollama_url", "send_post_request"]
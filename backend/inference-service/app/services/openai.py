@@ -0,0 +1,33 @@
+from typing import Optional, Union
+
+from app.services.utils import cleanup_response, send_post_request as _send_post_request
+from common.utils.deadline import Deadline
+
+
+async def send_post_request(
+    url: str,
+    payload: Union[str, bytes],
+    key: Optional[str] = None,
+    stream: bool = False,
+    content_type: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+    generation_id: Optional[str] = None,
+    owner: Optional[str] = None,
+):
+    """
+    Send a request to an OpenAI-compatible backend
+    """
+    return await _send_post_request(
+        url=url,
+        payload=payload,
+        stream=stream,
+        key=key,
+        content_type=content_type,
+        deadline=deadline,
+        provider="OpenAI",
+        generation_id=generation_id,
+        owner=owner,
+    )
+
+
+__all__ = ["cleanup_response", "send_post_request"]
@@ -0,0 +1,165 @@
+import logging
+from typing import Optional, Union
+
+import aiohttp
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.services.fanout import generation_broadcasts, payload_digest
+from app.services.generations import Generation, generation_stats
+from common.utils.deadline import Deadline, DeadlineExceeded
+from common.utils.streaming import CancellableStreamingResponse
+
+logger = logging.getLogger(__name__)
+
+# Headers describing the backend connection rather than the relayed body;
+# aiohttp has already decoded any content encoding
+STREAM_EXCLUDED_HEADERS = {"content-length", "content-encoding", "transfer-encoding", "connection"}
+
+
+async def cleanup_response(
+    response: Optional[aiohttp.ClientResponse],
+    session: Optional[aiohttp.ClientSession],
+) -> None:
+    """
+    Release an upstream response and its session
+    """
+    if response:
+        response.close()
+    if session:
+        await session.close()
+
+
+def client_timeout(deadline: Optional[Deadline] = None) -> aiohttp.ClientTimeout:
+    """
+    Total timeout for an upstream call, capped by the caller's deadline
+    """
+    total = settings.aiohttp_client_timeout
+    remaining = deadline.remaining() if deadline is not None else None
+    if remaining is not None:
+        total = min(total, remaining) if total else remaining
+    return aiohttp.ClientTimeout(total=total)
+
+
+def stream_response(
+    r: aiohttp.ClientResponse,
+    session: aiohttp.ClientSession,
+    provider: str,
+    payload: Union[str, bytes],
+    headers: Optional[dict] = None,
+    owner: Optional[str] = None,
+) -> CancellableStreamingResponse:
+    """
+    Relay a streamed backend response through a broadcast the owner's other
+    clients can attach to, using the id returned in X-Generation-Id. The
+    backend response is dropped once every client has gone.
+    """
+    generation = Generation(provider, payload)
+    broadcast = generation_broadcasts.start(
+        owner,
+        payload,
+        r.status,
+        headers if headers is not None else {
+            key: value for key, value in r.headers.items() if key.lower() not in STREAM_EXCLUDED_HEADERS
+        },
+        generation.relay(r.content),
+        on_cancel=generation.cancel,
+        on_close=lambda: cleanup_response(r, session),
+    )
+    return broadcast.to_response()
+
+
+def attach_to_generation(
+    generation_id: Optional[str],
+    owner: Optional[str],
+    payload: Union[str, bytes],
+) -> Optional[CancellableStreamingResponse]:
+    """
+    Join a generation of the same user that is still streaming instead of
+    starting a duplicate, e.g. when a client reloads while its answer is
+    being generated. The request must be the one that started it.
+    """
+    broadcast = generation_broadcasts.running(generation_id, owner)
+    if broadcast is None:
+        return None
+    if broadcast.digest != payload_digest(payload):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Generation was started by a different request",
+        )
+    generation_stats.deduplicated += 1
+    logger.info(f"Attaching request to running generation {generation_id}")
+    return broadcast.to_response()
+
+
+async def send_post_request(
+    url: str,
+    payload: Union[str, bytes],
+    stream: bool = True,
+    key: Optional[str] = None,
+    content_type: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+    provider: str = "Upstream",
+    generation_id: Optional[str] = None,
+    owner: Optional[str] = None,
+):
+    """
+    POST a payload to a model backend, streaming the response if requested.
+
+    The whole call, including reading a streamed body, is bounded by the
+    caller's deadline. The upstream connection is dropped when the deadline
+    passes or every client has disconnected, which stops the generation.
+    A streamed request with the id of a generation that is still running
+    joins it instead of starting another one.
+    """
+    if stream:
+        attached = attach_to_generation(generation_id, owner, payload)
+        if attached is not None:
+            return attached
+
+    r = None
+    session = None
+    try:
+        if deadline is not None:
+            deadline.check(f"calling {provider}")
+
+        session = aiohttp.ClientSession(trust_env=True, timeout=client_timeout(deadline))
+        headers = {"Content-Type": "application/json"}
+        if key:
+            headers["Authorization"] = f"Bearer {key}"
+
+        r = await session.post(url, data=payload, headers=headers)
+        r.raise_for_status()
+
+        if stream:
+            response_headers = {
+                key: value for key, value in r.headers.items() if key.lower() not in STREAM_EXCLUDED_HEADERS
+            }
+            if content_type:
+                response_headers["Content-Type"] = content_type
+            return stream_response(r, session, provider, payload, response_headers, owner)
+
+        res = await r.json()
+        await cleanup_response(r, session)
+        return res
+    except (DeadlineExceeded, TimeoutError) as e:
+        await cleanup_response(r, session)
+        logger.warning(f"Deadline exceeded calling {url}: {e}")
+        raise HTTPException(status_code=504, detail=f"{provider}: Deadline exceeded")
+    except Exception as e:
+        detail = None
+        if r is not None:
+            try:
+                res = await r.json()
+                if "error" in res:
+                    error = res["error"]
+                    detail = f"{provider}: {error.get('message', error) if isinstance(error, dict) else error}"
+            except Exception:
+                detail = f"{provider}: {e}"
+        status_code = r.status if r is not None else 500
+        await cleanup_response(r, session)
+        logger.error(f"Error calling {url}: {e}")
+        raise HTTPException(
+            status_code=status_code,
+            detail=detail if detail else "Open WebUI: Server Connection Error",
+        )
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The inference service's app package and the shared common package, as the
+# Dockerfile's PYTHONPATH provides them
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [SERVICE_DIR, os.path.dirname(SERVICE_DIR)]
@@ -0,0 +1,157 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services import utils
+from app.services.fanout import GENERATION_ID_PATTERN, BroadcastRegistry, get_generation_owner
+from common.auth.identity import IDENTITY_HEADER, sign_identity
+
+
+class Upstream:
+    """
+    A generation stream fed by the test, recording how it ended
+    """
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.cancelled = False
+        self.closed = False
+
+    async def content(self):
+        while True:
+            chunk = await self.queue.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    async def on_cancel(self):
+        self.cancelled = True
+
+    async def on_close(self):
+        self.closed = True
+
+
+def start(registry, upstream, owner="user-1", payload=b"{}"):
+    return registry.start(owner, payload, 200, {}, upstream.content(), upstream.on_cancel, upstream.on_close)
+
+
+async def drain(broadcast):
+    return [chunk async for chunk in broadcast.subscribe()]
+
+
+def test_subscribers_get_the_whole_stream():
+    async def main():
+        registry, upstream = BroadcastRegistry(), Upstream()
+        broadcast = start(registry, upstream)
+        first = asyncio.create_task(drain(broadcast))
+        await upstream.queue.put(b"a")
+        await asyncio.sleep(0.01)
+        # A late subscriber catches up from the buffer
+        second = asyncio.create_task(drain(broadcast))
+        await upstream.queue.put(b"b")
+        await upstream.queue.put(None)
+        return await first, await second, upstream
+
+    first, second, upstream = asyncio.run(main())
+    assert first == second == [b"a", b"b"]
+    assert upstream.closed and not upstream.cancelled
+
+
+def test_ids_are_scoped_to_their_owner():
+    async def main():
+        registry, upstream = BroadcastRegistry(), Upstream()
+        broadcast = start(registry, upstream)
+        found = (
+            registry.running(broadcast.generation_id, "user-1"),
+            registry.running(broadcast.generation_id, "user-2"),
+            registry.running(broadcast.generation_id, None),
+        )
+        await upstream.queue.put(None)
+        await asyncio.sleep(0.01)
+        return broadcast, found, registry.running(broadcast.generation_id, "user-1")
+
+    broadcast, found, after = asyncio.run(main())
+    assert GENERATION_ID_PATTERN.match(broadcast.generation_id)
+    assert found == (broadcast, None, None)
+    assert after is None
+
+
+def test_upstream_cancelled_after_grace(monkeypatch):
+    monkeypatch.setattr(settings, "generation_detach_grace", 0.01)
+
+    async def main():
+        registry, upstream = BroadcastRegistry(), Upstream()
+        broadcast = start(registry, upstream)
+        subscriber = broadcast.subscribe()
+        await upstream.queue.put(b"a")
+        assert await subscriber.__anext__() == b"a"
+        await subscriber.aclose()
+        await asyncio.sleep(0.05)
+        return broadcast, upstream
+
+    broadcast, upstream = asyncio.run(main())
+    assert broadcast.cancelled and upstream.cancelled
+
+
+@pytest.mark.parametrize("owner, grace", [(None, 10), ("user-1", 0)])
+def test_unjoinable_upstream_cancelled_on_disconnect(monkeypatch, owner, grace):
+    monkeypatch.setattr(settings, "generation_detach_grace", grace)
+
+    async def main():
+        registry, upstream = BroadcastRegistry(), Upstream()
+        broadcast = start(registry, upstream, owner=owner)
+        subscriber = broadcast.subscribe()
+        await upstream.queue.put(b"a")
+        assert await subscriber.__anext__() == b"a"
+        await subscriber.aclose()
+        await asyncio.sleep(0.01)
+        return broadcast, upstream
+
+    broadcast, upstream = asyncio.run(main())
+    assert broadcast.cancelled and upstream.cancelled
+
+
+def test_owner_is_verified_with_the_configured_secret(monkeypatch):
+    monkeypatch.setattr(settings, "internal_identity_secret", "deployment-secret")
+
+    def owner(secret):
+        identity = sign_identity({"sub": "user-1"}, secret)
+        return get_generation_owner(SimpleNamespace(headers={IDENTITY_HEADER: identity}))
+
+    assert owner("deployment-secret") == "user-1"
+    assert owner("your-secret-key") is None
+
+
+def test_buffer_is_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "generation_buffer_max_bytes", 2)
+
+    async def main():
+        registry, upstream = BroadcastRegistry(), Upstream()
+        broadcast = start(registry, upstream)
+        for chunk in (b"a", b"b", b"c", None):
+            await upstream.queue.put(chunk)
+        await asyncio.sleep(0.01)
+        return await drain(broadcast)
+
+    assert asyncio.run(main()) == [b"b", b"c"]
+
+
+def test_attach_requires_the_same_request(monkeypatch):
+    async def main():
+        registry, upstream = BroadcastRegistry(), Upstream()
+        monkeypatch.setattr(utils, "generation_broadcasts", registry)
+        broadcast = start(registry, upstream, payload=b'{"prompt": "hi"}')
+        attached = utils.attach_to_generation(broadcast.generation_id, "user-1", b'{"prompt": "hi"}')
+        with pytest.raises(HTTPException) as e:
+            utils.attach_to_generation(broadcast.generation_id, "user-1", b'{"prompt": "other"}')
+        other_user = utils.attach_to_generation(broadcast.generation_id, "user-2", b'{"prompt": "hi"}')
+        await upstream.queue.put(None)
+        return attached, e.value.status_code, other_user
+
+    attached, status_code, other_user = asyncio.run(main())
+    assert attached is not None
+    assert status_code == 409
+    assert other_user is None
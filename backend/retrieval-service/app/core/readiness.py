@@ -0,0 +1,4 @@
+from common.utils.readiness import Readiness
+
+# Components the service needs before it can take traffic, served on /ready
+readiness = Readiness()
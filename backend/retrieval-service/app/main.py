@@ -1,18 +1,31 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 import logging
 
 from app.core.config import settings
+from app.core.readiness import readiness
 from app.routes import router as api_router
+from app.services.vector import load_embedding_model
+from common.utils.readiness import setup_readiness
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the embedding model in the background; /ready reports 503 until it is
+    load_embedding_model()
+    yield
+
+
 app = FastAPI(
     title=settings.app_name,
     description=settings.description,
     version=settings.version,
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -25,6 +38,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Add response compression middleware
+from common.middleware import setup_compression
+setup_compression(app)
+
 # Add error handling middleware
 @app.middleware("http")
 async def error_handling_middleware(request: Request, call_next):
@@ -45,6 +62,10 @@ app.include_router(api_router, prefix=settings.api_prefix)
 async def health_check():
     return {"status": "healthy"}
 
+# Readiness of the embedding model and vector store
+setup_readiness(app, readiness)
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8003)
+    # Set SERVICE_UDS to serve on a Unix socket for a gateway on the same host
+    from common.utils.server import serve
+    serve(app, host="0.0.0.0", port=8003)
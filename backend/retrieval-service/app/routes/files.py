@@ -15,6 +15,7 @@ from app.services.files import (
     list_files,
     delete_file,
 )
+from common.utils.deadline import Deadline, DeadlineExceeded, get_deadline
 
 router = APIRouter()
 
@@ -23,6 +24,7 @@ async def upload_file(
     request: Request,
     file: UploadFile = File(...),
     collection_name: str = Form(...),
+    deadline: Deadline = Depends(get_deadline),
 ):
     """
     Upload a file and process it for retrieval
@@ -46,6 +48,7 @@ async def upload_file(
             file_path=file_path,
             original_filename=file.filename,
             collection_name=collection_name,
+            deadline=deadline,
         )
         
         return FileUploadResponse(
@@ -53,6 +56,11 @@ async def upload_file(
             filename=file.filename,
             document_ids=document_ids,
         )
+    except DeadlineExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=str(e),
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -16,6 +16,7 @@ from app.services.knowledge import (
     delete_knowledge_base,
     query_knowledge_base,
 )
+from common.utils.deadline import Deadline, DeadlineExceeded, get_deadline
 
 router = APIRouter()
 
@@ -72,7 +73,11 @@ async def delete(request: Request, kb_id: str):
         )
 
 @router.post("/query", response_model=KnowledgeBaseQueryResponse)
-async def query(request: Request, query_request: KnowledgeBaseQueryRequest):
+async def query(
+    request: Request,
+    query_request: KnowledgeBaseQueryRequest,
+    deadline: Deadline = Depends(get_deadline),
+):
     """
     Query a knowledge base
     """
@@ -82,10 +87,16 @@ async def query(request: Request, query_request: KnowledgeBaseQueryRequest):
             query=query_request.query,
             k=query_request.k,
             filter=query_request.filter,
+            deadline=deadline,
         )
         return KnowledgeBaseQueryResponse(
             results=results,
         )
+    except DeadlineExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=str(e),
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
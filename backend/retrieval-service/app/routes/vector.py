@@ -16,11 +16,16 @@ from app.services.vector import (
     delete_vectors,
     get_embedding,
 )
+from common.utils.deadline import Deadline, DeadlineExceeded, get_deadline
 
 router = APIRouter()
 
 @router.post("/search", response_model=VectorSearchResponse)
-async def search(request: Request, search_request: VectorSearchRequest):
+async def search(
+    request: Request,
+    search_request: VectorSearchRequest,
+    deadline: Deadline = Depends(get_deadline),
+):
     """
     Search for vectors in the vector database
     """
@@ -30,10 +35,16 @@ async def search(request: Request, search_request: VectorSearchRequest):
             query=search_request.query,
             k=search_request.k,
             filter=search_request.filter,
+            deadline=deadline,
         )
         return VectorSearchResponse(
             results=results,
         )
+    except DeadlineExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=str(e),
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -41,7 +52,11 @@ async def search(request: Request, search_request: VectorSearchRequest):
         )
 
 @router.post("/upsert", response_model=VectorUpsertResponse)
-async def upsert(request: Request, upsert_request: VectorUpsertRequest):
+async def upsert(
+    request: Request,
+    upsert_request: VectorUpsertRequest,
+    deadline: Deadline = Depends(get_deadline),
+):
     """
     Upsert vectors into the vector database
     """
@@ -51,10 +66,16 @@ async def upsert(request: Request, upsert_request: VectorUpsertRequest):
             texts=upsert_request.texts,
             metadatas=upsert_request.metadatas,
             ids=upsert_request.ids,
+            deadline=deadline,
         )
         return VectorUpsertResponse(
             ids=ids,
         )
+    except DeadlineExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=str(e),
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import List, Dict, Any, Optional
 import os
@@ -10,7 +11,7 @@ logger = logging.getLogger(__name__)
 
 async def load_document(file_path: str, mime_type: Optional[str] = None) -> List[Document]:
     """
-    Load a document from a file
+    Load a document from a file, without blocking the event loop
     """
     try:
         # Determine the file type if not provided
@@ -22,26 +23,30 @@ async def load_document(file_path: str, mime_type: Optional[str] = None) -> List
         
         # Load the document based on file type
         if ext in [".txt", "text/plain"]:
-            return await load_text(file_path)
+            loader = load_text
         elif ext in [".pdf", "application/pdf"]:
-            return await load_pdf(file_path)
+            loader = load_pdf
         elif ext in [".docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]:
-            return await load_docx(file_path)
+            loader = load_docx
         elif ext in [".csv", "text/csv"]:
-            return await load_csv(file_path)
+            loader = load_csv
         elif ext in [".md", "text/markdown"]:
-            return await load_markdown(file_path)
+            loader = load_markdown
         elif ext in [".html", ".htm", "text/html"]:
-            return await load_html(file_path)
+            loader = load_html
         else:
             # Default to text
-            return await load_text(file_path)
+            loader = load_text
+        
+        # Parsing and splitting block, so they run in a worker thread and a
+        # caller's deadline can stop waiting for them
+        return await asyncio.to_thread(loader, file_path)
     except Exception as e:
         logger.error(f"Error loading document: {e}")
         raise
 
 
-async def load_text(file_path: str) -> List[Document]:
+def load_text(file_path: str) -> List[Document]:
     """
     Load a text document
     """
@@ -68,7 +73,7 @@ async def load_text(file_path: str) -> List[Document]:
         raise
 
 
-async def load_pdf(file_path: str) -> List[Document]:
+def load_pdf(file_path: str) -> List[Document]:
     """
     Load a PDF document
     """
@@ -92,7 +97,7 @@ async def load_pdf(file_path: str) -> List[Document]:
         raise
 
 
-async def load_docx(file_path: str) -> List[Document]:
+def load_docx(file_path: str) -> List[Document]:
     """
     Load a DOCX document
     """
@@ -116,7 +121,7 @@ async def load_docx(file_path: str) -> List[Document]:
         raise
 
 
-async def load_csv(file_path: str) -> List[Document]:
+def load_csv(file_path: str) -> List[Document]:
     """
     Load a CSV document
     """
@@ -132,7 +137,7 @@ async def load_csv(file_path: str) -> List[Document]:
         raise
 
 
-async def load_markdown(file_path: str) -> List[Document]:
+def load_markdown(file_path: str) -> List[Document]:
     """
     Load a Markdown document
     """
@@ -156,7 +161,7 @@ async def load_markdown(file_path: str) -> List[Document]:
         raise
 
 
-async def load_html(file_path: str) -> List[Document]:
+def load_html(file_path: str) -> List[Document]:
     """
     Load an HTML document
     """
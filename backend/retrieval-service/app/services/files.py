@@ -9,6 +9,7 @@ from app.core.config import settings
 from app.models.files import FileInfo
 from app.services.vector import upsert_vectors
 from app.services.document_loaders import load_document
+from common.utils.deadline import Deadline
 
 logger = logging.getLogger(__name__)
 
@@ -20,10 +21,12 @@ async def process_file(
     file_path: str,
     original_filename: str,
     collection_name: str,
+    deadline: Optional[Deadline] = None,
 ) -> List[str]:
     """
-    Process a file for retrieval
+    Process a file for retrieval, giving up once the deadline passes
     """
+    deadline = deadline or Deadline()
     try:
         # Generate a file ID
         file_id = str(uuid.uuid4())
@@ -32,7 +35,7 @@ async def process_file(
         mime_type, _ = mimetypes.guess_type(file_path)
         
         # Load the document
-        documents = await load_document(file_path, mime_type)
+        documents = await deadline.run(load_document(file_path, mime_type), "document loading")
         
         # Upsert the documents into the vector database
         texts = [doc.page_content for doc in documents]
@@ -46,6 +49,7 @@ async def process_file(
             collection_name=collection_name,
             texts=texts,
             metadatas=metadatas,
+            deadline=deadline,
         )
         
         # Store file information
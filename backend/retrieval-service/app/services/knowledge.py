@@ -6,6 +6,7 @@ from datetime import datetime
 from app.core.config import settings
 from app.models.knowledge import KnowledgeBase, KnowledgeBaseQueryResult
 from app.services.vector import search_vectors
+from common.utils.deadline import Deadline
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +76,7 @@ async def query_knowledge_base(
     query: str,
     k: int = 5,
     filter: Optional[Dict[str, Any]] = None,
+    deadline: Optional[Deadline] = None,
 ) -> List[KnowledgeBaseQueryResult]:
     """
     Query a knowledge base
@@ -97,6 +99,7 @@ async def query_knowledge_base(
             query=query,
             k=k,
             filter=filter,
+            deadline=deadline,
         )
         
         # Convert to KnowledgeBaseQueryResult objects
@@ -1,9 +1,12 @@
+import asyncio
 import logging
 from typing import List, Dict, Any, Optional
 import uuid
 
 from app.core.config import settings
+from app.core.readiness import readiness
 from app.models.vector import VectorSearchResult
+from common.utils.deadline import Deadline
 
 # Import the appropriate vector database client based on configuration
 if settings.vector_db == "chroma":
@@ -25,32 +28,76 @@ else:
 # Initialize the vector database client
 vector_db_client = VectorDBClient()
 
-# Initialize the embedding model
+# The embedding model is loaded in the background at startup, since loading
+# sentence-transformers takes a while; see load_embedding_model
 from app.services.embeddings import get_embedding_model
-embedding_model = get_embedding_model()
+embedding_model = None
+_embedding_model_task: Optional[asyncio.Task] = None
 
 logger = logging.getLogger(__name__)
 
+embedding_model_component = readiness.component("embedding_model")
+if hasattr(vector_db_client, "heartbeat"):
+    readiness.component("vector_store", vector_db_client.heartbeat)
+
+
+async def _load_embedding_model() -> Any:
+    global embedding_model
+    try:
+        model = await asyncio.to_thread(get_embedding_model)
+    except Exception as e:
+        embedding_model_component.mark_failed(f"Error loading embedding model: {e}")
+        raise
+    embedding_model = model
+    embedding_model_component.mark_ready()
+    return model
+
+
+def load_embedding_model() -> "asyncio.Task":
+    """
+    Start loading the embedding model, unless it is loaded or loading already
+    """
+    global _embedding_model_task
+    task = _embedding_model_task
+    if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+        _embedding_model_task = asyncio.ensure_future(_load_embedding_model())
+    return _embedding_model_task
+
+
+async def ensure_embedding_model() -> Any:
+    """
+    The embedding model, waiting for it if it is still loading
+    """
+    if embedding_model is not None:
+        return embedding_model
+    # Shielded so a cancelled request does not abort the load for everyone
+    return await asyncio.shield(load_embedding_model())
+
 
 async def search_vectors(
     collection_name: str,
     query: str,
     k: int = 5,
     filter: Optional[Dict[str, Any]] = None,
+    deadline: Optional[Deadline] = None,
 ) -> List[VectorSearchResult]:
     """
-    Search for vectors in the vector database
+    Search for vectors in the vector database, giving up once the deadline passes
     """
+    deadline = deadline or Deadline()
     try:
         # Get the embedding for the query
-        query_embedding = await get_embedding(query)
+        query_embedding = await deadline.run(get_embedding(query), "embedding the query")
         
         # Search the vector database
-        results = await vector_db_client.search(
-            collection_name=collection_name,
-            query_embedding=query_embedding,
-            k=k,
-            filter=filter,
+        results = await deadline.run(
+            vector_db_client.search(
+                collection_name=collection_name,
+                query_embedding=query_embedding,
+                k=k,
+                filter=filter,
+            ),
+            "vector search",
         )
         
         # Convert to VectorSearchResult objects
@@ -76,10 +123,12 @@ async def upsert_vectors(
     texts: List[str],
     metadatas: Optional[List[Dict[str, Any]]] = None,
     ids: Optional[List[str]] = None,
+    deadline: Optional[Deadline] = None,
 ) -> List[str]:
     """
-    Upsert vectors into the vector database
+    Upsert vectors into the vector database, giving up once the deadline passes
     """
+    deadline = deadline or Deadline()
     try:
         # Generate IDs if not provided
         if ids is None:
@@ -88,16 +137,19 @@ async def upsert_vectors(
         # Generate embeddings for the texts
         embeddings = []
         for text in texts:
-            embedding = await get_embedding(text)
+            embedding = await deadline.run(get_embedding(text), "embedding documents")
             embeddings.append(embedding)
         
         # Upsert into the vector database
-        await vector_db_client.upsert(
-            collection_name=collection_name,
-            ids=ids,
-            embeddings=embeddings,
-            documents=texts,
-            metadatas=metadatas,
+        await deadline.run(
+            vector_db_client.upsert(
+                collection_name=collection_name,
+                ids=ids,
+                embeddings=embeddings,
+                documents=texts,
+                metadatas=metadatas,
+            ),
+            "vector upsert",
         )
         
         return ids
@@ -130,11 +182,12 @@ async def delete_vectors(
 
 async def get_embedding(text: str) -> List[float]:
     """
-    Get embedding for a text
+    Get embedding for a text, encoding it in a worker thread
     """
     try:
         # Get the embedding
-        embedding = embedding_model.encode(text).tolist()
+        model = await ensure_embedding_model()
+        embedding = (await asyncio.to_thread(model.encode, text)).tolist()
         return embedding
     except Exception as e:
         logger.error(f"Error getting embedding: {e}")
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import List, Dict, Any, Optional
 import chromadb
@@ -11,7 +12,10 @@ logger = logging.getLogger(__name__)
 
 class ChromaClient:
     """
-    Client for Chroma vector database
+    Client for Chroma vector database.
+
+    The chromadb client is synchronous, so every call runs in a worker thread
+    to keep the event loop free and let callers time out waiting for it.
     """
     
     def __init__(self):
@@ -31,6 +35,13 @@ class ChromaClient:
             logger.error(f"Error initializing Chroma client: {e}")
             raise
     
+    async def heartbeat(self) -> bool:
+        """
+        Check that the Chroma client can serve requests
+        """
+        await asyncio.to_thread(self.client.heartbeat)
+        return True
+    
     async def search(
         self,
         collection_name: str,
@@ -43,10 +54,11 @@ class ChromaClient:
         """
         try:
             # Get or create the collection
-            collection = self.client.get_or_create_collection(collection_name)
+            collection = await asyncio.to_thread(self.client.get_or_create_collection, collection_name)
             
             # Search the collection
-            results = collection.query(
+            results = await asyncio.to_thread(
+                collection.query,
                 query_embeddings=[query_embedding],
                 n_results=k,
                 where=filter,
@@ -71,10 +83,11 @@ class ChromaClient:
         """
         try:
             # Get or create the collection
-            collection = self.client.get_or_create_collection(collection_name)
+            collection = await asyncio.to_thread(self.client.get_or_create_collection, collection_name)
             
             # Upsert the vectors
-            collection.upsert(
+            await asyncio.to_thread(
+                collection.upsert,
                 ids=ids,
                 embeddings=embeddings,
                 documents=documents,
@@ -96,16 +109,16 @@ class ChromaClient:
         try:
             # Get the collection
             try:
-                collection = self.client.get_collection(collection_name)
+                collection = await asyncio.to_thread(self.client.get_collection, collection_name)
             except ValueError:
                 # Collection doesn't exist
                 return
             
             # Delete the vectors
             if ids:
-                collection.delete(ids=ids)
+                await asyncio.to_thread(collection.delete, ids=ids)
             elif filter:
-                collection.delete(where=filter)
+                await asyncio.to_thread(collection.delete, where=filter)
         except Exception as e:
             logger.error(f"Error deleting from Chroma collection: {e}")
             raise
@@ -0,0 +1,37 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services import document_loaders
+from common.utils.deadline import Deadline, DeadlineExceeded
+
+
+def test_load_text_splits_into_documents(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("word " * 500)
+    documents = asyncio.run(document_loaders.load_document(str(path)))
+    assert len(documents) > 1
+    assert all(document.metadata["source"] == str(path) for document in documents)
+
+
+def test_loading_runs_off_the_event_loop(tmp_path, monkeypatch):
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def slow_load(file_path):
+        threads.append(threading.get_ident())
+        time.sleep(0.5)
+        return []
+
+    monkeypatch.setattr(document_loaders, "load_text", slow_load)
+
+    async def main():
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            await Deadline.from_timeout(0.1).run(document_loaders.load_document("notes.txt"), "loading")
+        return time.monotonic() - started
+
+    assert asyncio.run(main()) < 0.4
+    assert threads and threads[0] != loop_thread
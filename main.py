@@ -1,5 +1,114 @@
+"""
+Single-process ("monolith") entry point for Open WebUI.
+
+Runs the API gateway and mounts the chat, inference and retrieval services in
+the same process. Gateway requests for those services are dispatched to the
+service apps directly over ASGI instead of HTTP, which removes a network hop
+and three extra processes for small and edge deployments.
+
+Every service is a separate project with its own top-level ``app`` package, so
+each one is imported in isolation and its modules are kept out of the way of
+the next. The gateway is imported last and keeps the ``app`` name.
+
+Environment:
+    MONOLITH_SERVICES  comma-separated services to run in-process
+                       (default: chat,inference,retrieval); any service not
+                       listed is still proxied over HTTP
+    HOST, PORT         address to bind (default: 0.0.0.0:8000)
+"""
+import importlib
+import os
+import sys
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent / "backend"
+
+SERVICE_DIRS = {
+    "chat": "chat-service",
+    "inference": "inference-service",
+    "retrieval": "retrieval-service",
+}
+
+
+def _pop_app_modules() -> Dict[str, Any]:
+    """
+    Remove the currently imported ``app`` package from sys.modules
+    """
+    names = [name for name in sys.modules if name == "app" or name.startswith("app.")]
+    return {name: sys.modules.pop(name) for name in names}
+
+
+def load_service_app(service_dir: Path) -> Tuple[Any, str]:
+    """
+    Import a service's ``app.main`` in isolation.
+
+    Returns the FastAPI app and the API prefix its routes are mounted under.
+    """
+    saved = _pop_app_modules()
+    sys.path.insert(0, str(service_dir))
+    try:
+        main_module = importlib.import_module("app.main")
+        config_module = importlib.import_module("app.core.config")
+        return main_module.app, config_module.settings.api_prefix
+    finally:
+        sys.path.remove(str(service_dir))
+        # The service keeps references to its own modules; drop the names so
+        # the next service (or the gateway) can claim the ``app`` package
+        _pop_app_modules()
+        sys.modules.update(saved)
+
+
+def create_app() -> Any:
+    """
+    Build the gateway app with the selected services running in-process
+    """
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+
+    selected = os.getenv("MONOLITH_SERVICES", ",".join(SERVICE_DIRS)).split(",")
+    service_apps = {}
+    for service in (name.strip() for name in selected):
+        if not service:
+            continue
+        if service not in SERVICE_DIRS:
+            raise ValueError(f"Unknown service for monolith mode: {service}")
+        service_apps[service] = load_service_app(BACKEND_DIR / SERVICE_DIRS[service])
+
+    gateway_dir = BACKEND_DIR / "api-gateway"
+    sys.path.insert(0, str(gateway_dir))
+    from app.main import app as gateway_app
+    from app.services.clients import upstream_clients
+
+    for service, (service_app, api_prefix) in service_apps.items():
+        upstream_clients.register_local_app(service, service_app, base_path=api_prefix)
+
+    # Run the services' startup and shutdown hooks around the gateway's own
+    gateway_lifespan = gateway_app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app):
+        async with AsyncExitStack() as stack:
+            for service_app, _ in service_apps.values():
+                await stack.enter_async_context(
+                    service_app.router.lifespan_context(service_app)
+                )
+            async with gateway_lifespan(app):
+                yield
+
+    gateway_app.router.lifespan_context = lifespan
+    return gateway_app
+
+
 def main():
-    print("Hello from open-webui-modular!")
+    import uvicorn
+
+    uvicorn.run(
+        create_app(),
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in a child process: create_app() rebinds the ``app`` package for each
+# service it loads, which would leak into anything else imported here
+STARTUP = textwrap.dedent(
+    """
+    import asyncio
+
+    import httpx
+    import jwt
+
+    import main
+
+    app = main.create_app()
+
+    from app.core.config import settings
+    from app.services.asgi import StreamingASGITransport
+
+
+    async def run():
+        token = jwt.encode({"sub": "user-1"}, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(
+                transport=StreamingASGITransport(app),
+                base_url=f"http://gateway{settings.api_prefix}",
+                headers={"Authorization": f"Bearer {token}"},
+            ) as client:
+                response = await client.get("/chat/chats/")
+                print(response.status_code, response.json()["chats"])
+
+
+    asyncio.run(run())
+    """
+)
+
+
+def test_monolith_starts_with_the_default_chat_store(tmp_path):
+    env = dict(os.environ)
+    env.pop("CHAT_STORE", None)
+    env.update(
+        MONOLITH_SERVICES="chat,inference",
+        DATABASE_URL=f"sqlite:///{tmp_path / 'monolith.db'}",
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP],
+        cwd=ROOT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "200 []"